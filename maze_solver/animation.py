@@ -0,0 +1,209 @@
+import os
+import struct
+import zlib
+import numpy as np
+from PIL import Image, GifImagePlugin
+
+# Animated image writers that stream frames to the file one at a time. PIL's
+# `save_all` keeps every frame in memory until the end, which does not scale to
+# animations of searches with millions of expansions. Here only the current frame is
+# held, and a frame may cover just the region that changed since the previous one:
+# GIF and APNG both draw a frame over the previous ones at an offset.
+#
+# Frames are palette images: 2D uint8 arrays of color indices into a shared palette.
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class GifWriter:
+    """
+    Writes an animated GIF frame by frame.
+
+    The header and the global color table are written when the writer is created,
+    and every frame is LZW-encoded by PIL and appended at once. Frames are kept on
+    screen under the next ones.
+
+    Methods:
+        add(pixels, offset, duration): Appends a frame.
+        close(): Writes the trailer and closes the file.
+    """
+
+    def __init__(self, filename, size, palette, loop=0):
+        """
+        Creates the file and writes the header.
+
+        Args:
+            filename (str): The path of the GIF file.
+            size (tuple): The (width, height) of the animation in pixels.
+            palette (numpy.ndarray): An (n, 3) uint8 array of colors, n at most 256.
+            loop (int): The number of times the animation plays, 0 for forever.
+
+        Raises:
+            ValueError: If the animation is larger than 65535 pixels in a dimension.
+        """
+        width, height = size
+        if max(width, height) > 0xFFFF:
+            raise ValueError(f"A GIF cannot be larger than 65535 pixels, got {width}x{height}")
+        colors = np.zeros((256, 3), dtype=np.uint8)
+        colors[:len(palette)] = palette
+        self.file = open(filename, "wb")
+        # Global color table of 256 entries (0xF7), then the NETSCAPE2.0 loop extension
+        self.file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF7, 0, 0) + colors.tobytes())
+        self.file.write(b"!\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\x00")
+        self.num_frames = 0
+
+    def add(self, pixels, offset=(0, 0), duration=40):
+        """
+        Appends a frame.
+
+        Args:
+            pixels (numpy.ndarray): A 2D uint8 array of color indices.
+            offset (tuple): The (x, y) position of the frame in pixels.
+            duration (int): How long the frame is shown, in milliseconds. GIF counts in
+                            hundredths of a second.
+        """
+        image = Image.fromarray(pixels, mode="P")
+        # Disposal 1 keeps the frame under the next one, which only paints what changed
+        for data in GifImagePlugin.getdata(image, offset=offset, duration=duration, disposal=1):
+            self.file.write(data)
+        self.num_frames += 1
+
+    def close(self):
+        """
+        Writes the trailer and closes the file.
+        """
+        if not self.file.closed:
+            self.file.write(b";")
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ApngWriter:
+    """
+    Writes an animated PNG frame by frame.
+
+    The number of frames is part of the header (the `acTL` chunk), so it is given up
+    front. Every frame is compressed with zlib and written as its own chunks; the first
+    one covers the whole image and is also what viewers without APNG support show.
+
+    Methods:
+        add(pixels, offset, duration): Appends a frame.
+        close(): Writes the end chunk and closes the file.
+    """
+
+    def __init__(self, filename, size, palette, num_frames, loop=0, level=6):
+        """
+        Creates the file and writes the header.
+
+        Args:
+            filename (str): The path of the PNG file.
+            size (tuple): The (width, height) of the animation in pixels.
+            palette (numpy.ndarray): An (n, 3) uint8 array of colors, n at most 256.
+            num_frames (int): The number of frames that will be added.
+            loop (int): The number of times the animation plays, 0 for forever.
+            level (int): The zlib compression level of the frames.
+        """
+        self.size = size
+        self.num_frames = num_frames
+        self.level = level
+        self.sequence = 0  # Sequence number shared by the fcTL and fdAT chunks
+        self.added = 0
+        self.file = open(filename, "wb")
+        self.file.write(PNG_SIGNATURE)
+        # 8-bit palette image, default compression, filtering and no interlacing
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", size[0], size[1], 8, 3, 0, 0, 0))
+        self._chunk(b"PLTE", np.asarray(palette, dtype=np.uint8).tobytes())
+        self._chunk(b"acTL", struct.pack(">II", num_frames, loop))
+
+    def _chunk(self, kind, data):
+        """
+        Writes one PNG chunk: its length, type, data and CRC.
+        """
+        self.file.write(struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data)))
+
+    def add(self, pixels, offset=(0, 0), duration=40):
+        """
+        Appends a frame.
+
+        Args:
+            pixels (numpy.ndarray): A 2D uint8 array of color indices.
+            offset (tuple): The (x, y) position of the frame in pixels.
+            duration (int): How long the frame is shown, in milliseconds.
+
+        Raises:
+            ValueError: If the first frame does not cover the whole image, or if more
+                        frames are added than announced.
+        """
+        height, width = pixels.shape
+        if self.added == 0 and (offset != (0, 0) or (width, height) != tuple(self.size)):
+            raise ValueError("The first frame of an APNG must cover the whole image")
+        if self.added == self.num_frames:
+            raise ValueError(f"Only {self.num_frames} frames were announced")
+        # Frame control: no disposal and no blending, so the frame replaces its region
+        self._chunk(b"fcTL", struct.pack(">IIIIIHHBB", self.sequence, width, height, offset[0], offset[1],
+                                         duration, 1000, 0, 0))
+        self.sequence += 1
+        # Every scanline starts with its filter type, 0 (none)
+        rows = np.zeros((height, width + 1), dtype=np.uint8)
+        rows[:, 1:] = pixels
+        data = zlib.compress(rows.tobytes(), self.level)
+        if self.added == 0:
+            self._chunk(b"IDAT", data)
+        else:
+            self._chunk(b"fdAT", struct.pack(">I", self.sequence) + data)
+            self.sequence += 1
+        self.added += 1
+
+    def close(self):
+        """
+        Writes the end chunk and closes the file.
+
+        Raises:
+            ValueError: If fewer frames were added than announced.
+        """
+        if self.file.closed:
+            return
+        self._chunk(b"IEND", b"")
+        self.file.close()
+        if self.added != self.num_frames:
+            raise ValueError(f"{self.num_frames} frames were announced but {self.added} were added")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is not None:
+            self.file.close()  # Keep the original error rather than a frame count mismatch
+            return
+        self.close()
+
+
+def frame_writer(filename, size, palette, num_frames, loop=0):
+    """
+    Creates the writer matching the extension of a file: `.gif` for GIF, `.png` or
+    `.apng` for APNG.
+
+    Args:
+        filename (str): The path of the animation file.
+        size (tuple): The (width, height) of the animation in pixels.
+        palette (numpy.ndarray): An (n, 3) uint8 array of colors, n at most 256.
+        num_frames (int): The number of frames that will be added.
+        loop (int): The number of times the animation plays, 0 for forever.
+
+    Returns:
+        GifWriter or ApngWriter: The writer, usable as a context manager.
+
+    Raises:
+        ValueError: If the extension is not supported.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".gif":
+        return GifWriter(filename, size, palette, loop)
+    if extension in (".png", ".apng"):
+        return ApngWriter(filename, size, palette, num_frames, loop)
+    raise ValueError(f"Unsupported animation format '{extension}', expected .gif, .png or .apng")
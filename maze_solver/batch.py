@@ -0,0 +1,83 @@
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from maze import Maze
+from search import Solver
+
+
+def solve_file(filename, algorithm="astar", engine="node"):
+    """
+    Loads and solves one maze file and describes the outcome as a JSON-serializable record.
+
+    Errors raised while loading or solving (a missing file, a wrong number of 'A' or
+    'B' points, a maze without solution, ...) are reported in the record instead of
+    being raised, so that one bad file does not stop a batch.
+
+    Args:
+        filename (str): The path to the maze file.
+        algorithm (str): The search algorithm to use.
+        engine (str): The search engine to use.
+
+    Returns:
+        dict: The file name, a status ("ok" or "error"), the wall time in seconds and
+              either the path length and number of explored states or the error message.
+    """
+    started = time.perf_counter()
+    record = {"file": filename}
+    try:
+        maze = Maze(filename)
+        solver = Solver(maze, algorithm=algorithm, engine=engine)
+        solver.solve()
+        record["status"] = "ok"
+        record["path_length"] = len(maze.solution[1])
+        record["num_explored"] = solver.num_explored
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+    record["wall_time"] = round(time.perf_counter() - started, 6)
+    return record
+
+
+def run_batch(directory, output, workers=None, chunksize=16, pattern="*.txt",
+              algorithm="astar", engine="node"):
+    """
+    Solves every maze file of a directory across a pool of processes and writes
+    one JSON record per file (JSON Lines) as results come in.
+
+    Files are handed to the workers in chunks, so that the per-task overhead of the
+    pool stays small when there are many small mazes. Records are written in the
+    same (sorted) order as the files.
+
+    Args:
+        directory (str): The directory containing the maze files.
+        output (file): A text stream the JSON Lines are written to.
+        workers (int): The number of worker processes. Defaults to the number of CPUs;
+                       1 solves the files in the current process.
+        chunksize (int): The number of files sent to a worker at a time.
+        pattern (str): The glob pattern selecting the maze files in the directory.
+        algorithm (str): The search algorithm to use.
+        engine (str): The search engine to use.
+
+    Returns:
+        dict: The number of files solved ("ok") and failed ("error").
+    """
+    filenames = sorted(path for path in glob.glob(os.path.join(directory, pattern)) if os.path.isfile(path))
+    task = partial(solve_file, algorithm=algorithm, engine=engine)
+    counts = {"ok": 0, "error": 0}
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    try:
+        if executor is None:
+            records = map(task, filenames)
+        else:
+            records = executor.map(task, filenames, chunksize=chunksize)
+        for record in records:
+            counts[record["status"]] += 1
+            output.write(json.dumps(record) + "\n")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return counts
@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from maze import Maze
+from search import Solver, ENGINES
+from generator import GENERATORS, MIN_SIZES, generate
+from mazefile import write_text
+
+# Example usage: python .\maze_solver\benchmark.py --sizes 100 1000 4000 --output bench.json
+#                python .\maze_solver\benchmark.py --sizes 100 1000 4000 --compare bench.json
+
+# Every solver mode, as (engine, algorithm)
+MODES = [(engine, algorithm) for engine, algorithms in ENGINES.items() for algorithm in algorithms]
+
+# Algorithms left out of the default sweep, which only run when named with `--modes`:
+# IDA* searches again from the start on every iteration and takes minutes on mazes a
+# few hundred cells wide, and beam search and SMA* may lose the goal by design.
+OPT_IN = {"idastar", "beam", "sma"}
+
+# The modes run when none are given
+DEFAULT_MODES = [(engine, algorithm) for engine, algorithm in MODES if algorithm not in OPT_IN]
+
+# Measures of every case, None in the records of failed cases
+MEASURES = ("load_time", "wall_time", "num_explored", "expansions_per_sec", "path_length", "peak_memory_mb")
+
+
+def maze_file(directory, kind, size, seed):
+    """
+    Returns the path of a generated maze, generating and writing it in the text format
+    the first time. Generated mazes are reused by later runs with the same parameters.
+
+    Args:
+        directory (str): The directory holding the generated mazes.
+        kind (str): The generator to use, one of `generator.GENERATORS`.
+        size (int): The number of rows and columns of the maze.
+        seed (int): The random seed.
+
+    Returns:
+        str: The path of the maze file.
+    """
+    filename = os.path.join(directory, f"{kind}-{size}-{seed}.txt")
+    if not os.path.exists(filename):
+        os.makedirs(directory, exist_ok=True)
+        write_text(filename, *generate(kind, size, seed))
+    return filename
+
+
+def run_case(filename, engine, algorithm, repeat=1, memory=True):
+    """
+    Loads and solves one maze with one solver mode, and measures it.
+
+    Each repetition loads the maze again, so that no state (such as a corridor graph)
+    is shared between runs; the fastest repetition is kept. Peak memory is measured
+    in a separate run with `tracemalloc`, which would otherwise slow down the timings.
+
+    Errors raised while loading or solving (a maze without solution, a beam too narrow
+    to reach the goal, ...) are reported in the record instead of being raised, as in
+    `batch.solve_file`, so that one failing case does not stop a sweep.
+
+    Args:
+        filename (str): The path of the maze file.
+        engine (str): The search engine to use.
+        algorithm (str): The search algorithm to use.
+        repeat (int): The number of timed runs.
+        memory (bool): Whether to measure the peak memory of the search.
+
+    Returns:
+        dict: A status ("ok" or "error"), the load and solve wall times in seconds, the
+              number of explored states, the expansions per second, the path length and
+              the peak memory in MiB allocated while solving (None when not measured).
+              Failed cases have the error message and None for every measure.
+    """
+    load_time = solve_time = float("inf")
+    peak = None
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            maze = Maze(filename)
+            loaded = time.perf_counter()
+            solver = Solver(maze, algorithm=algorithm, engine=engine)
+            solver.solve()
+            solved = time.perf_counter()
+            load_time = min(load_time, loaded - started)
+            solve_time = min(solve_time, solved - loaded)
+
+        if memory:
+            maze = Maze(filename)
+            memory_solver = Solver(maze, algorithm=algorithm, engine=engine)
+            tracemalloc.start()
+            try:
+                memory_solver.solve()
+                peak = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+            finally:
+                tracemalloc.stop()
+    except Exception as e:
+        return {"status": "error", "error": str(e), **dict.fromkeys(MEASURES)}
+
+    return {
+        "status": "ok",
+        "load_time": round(load_time, 6),
+        "wall_time": round(solve_time, 6),
+        "num_explored": solver.num_explored,
+        "expansions_per_sec": round(solver.num_explored / solve_time) if solve_time > 0 else None,
+        "path_length": len(solver.maze.solution[1]),
+        "peak_memory_mb": peak,
+    }
+
+
+def run_benchmark(sizes, kinds=None, modes=None, seed=0, repeat=1, memory=True,
+                  directory="benchmark_mazes", log=None):
+    """
+    Runs solver modes on every generated maze of a size sweep.
+
+    Args:
+        sizes (list): The maze sizes (rows and columns) to sweep.
+        kinds (list): The generators to use. Defaults to all of `generator.GENERATORS`.
+        modes (list): (engine, algorithm) pairs to run. Defaults to `DEFAULT_MODES`, every
+                      mode but the slow or incomplete algorithms of `OPT_IN`.
+        seed (int): The random seed of the generated mazes.
+        repeat (int): The number of timed runs per case.
+        memory (bool): Whether to measure peak memory.
+        directory (str): The directory holding the generated mazes.
+        log (file): A text stream receiving one progress line per case. Defaults to None.
+
+    Returns:
+        dict: The environment the benchmark ran in and a list of records, one per
+              (kind, size, engine, algorithm), each with the status and measures of
+              `run_case`. Failed cases are recorded and the sweep goes on.
+    """
+    records = []
+    for kind in kinds or sorted(GENERATORS):
+        for size in sizes:
+            filename = maze_file(directory, kind, size, seed)
+            for engine, algorithm in modes or DEFAULT_MODES:
+                record = {"kind": kind, "size": size, "seed": seed, "engine": engine, "algorithm": algorithm}
+                record.update(run_case(filename, engine, algorithm, repeat, memory))
+                records.append(record)
+                if log is None:
+                    continue
+                if record["status"] == "ok":
+                    print(f"{kind:<12}{size:>6}  {engine}:{algorithm:<20}{record['wall_time']:>10.4f} s"
+                          f"{record['num_explored']:>10} explored", file=log)
+                else:
+                    print(f"{kind:<12}{size:>6}  {engine}:{algorithm:<20}  error: {record['error']}", file=log)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "records": records,
+    }
+
+
+def compare(results, baseline, threshold=1.25):
+    """
+    Compares benchmark results with a saved baseline.
+
+    A case regresses when its solve or load time grows by more than `threshold` times
+    the baseline, or when its path length or number of explored states changes (which
+    points to a change of behavior rather than of speed). A case that succeeded in
+    the baseline and now fails, or the other way round, is reported by its status;
+    the measures of failed cases are not compared. Cases missing from either side
+    are ignored.
+
+    Args:
+        results (dict): The results of `run_benchmark`.
+        baseline (dict): Earlier results of `run_benchmark`.
+        threshold (float): The slowdown ratio above which a time is reported.
+
+    Returns:
+        list: One dict per regression, with the case, the measure, the baseline and
+              current values and their ratio (None for changed counts).
+    """
+    def key(record):
+        return record["kind"], record["size"], record["seed"], record["engine"], record["algorithm"]
+
+    previous = {key(record): record for record in baseline["records"]}
+    regressions = []
+    for record in results["records"]:
+        old = previous.get(key(record))
+        if old is None:
+            continue
+        case = dict(zip(("kind", "size", "seed", "engine", "algorithm"), key(record)))
+        # Baselines written before failed cases were recorded only hold successful ones
+        status, old_status = record.get("status", "ok"), old.get("status", "ok")
+        if status != old_status:
+            regressions.append({**case, "measure": "status", "baseline": old_status,
+                                "current": status, "ratio": None})
+        if status != "ok" or old_status != "ok":
+            continue
+        for measure in ("path_length", "num_explored"):
+            if record[measure] != old[measure]:
+                regressions.append({**case, "measure": measure, "baseline": old[measure],
+                                    "current": record[measure], "ratio": None})
+        for measure in ("wall_time", "load_time"):
+            # Ignore timer noise on cases that take well under a millisecond
+            if old[measure] > 0 and record[measure] > 1e-3 and record[measure] > threshold * old[measure]:
+                regressions.append({**case, "measure": measure, "baseline": old[measure],
+                                    "current": record[measure], "ratio": round(record[measure] / old[measure], 3)})
+    return regressions
+
+
+def parse_args(argv=None):
+    """
+    Parses the command-line arguments.
+
+    Args:
+        argv (list): The arguments to parse. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the solver modes on generated mazes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 250, 500],
+                        help="maze sizes to sweep (default: 100 250 500)")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(GENERATORS),
+                        help="maze generators to use (default: all)")
+    parser.add_argument("--modes", nargs="+", metavar="ENGINE:ALGORITHM",
+                        help=f"solver modes to run (default: all but {', '.join(sorted(OPT_IN))})")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the mazes (default: 0)")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per case, the fastest is kept (default: 1)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    parser.add_argument("--mazes", default="benchmark_mazes",
+                        help="directory of the generated mazes (default: benchmark_mazes)")
+    parser.add_argument("--output", metavar="FILE", help="file the JSON results are written to")
+    parser.add_argument("--compare", metavar="FILE", help="baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio reported as a regression (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    if args.modes is not None:
+        modes = []
+        for mode in args.modes:
+            engine, _, algorithm = mode.partition(":")
+            if algorithm not in ENGINES.get(engine, {}):
+                parser.error(f"unknown solver mode '{mode}', expected one of "
+                             f"{[f'{e}:{a}' for e, a in MODES]}")
+            modes.append((engine, algorithm))
+        args.modes = modes
+    smallest = max(MIN_SIZES[kind] for kind in args.kinds or GENERATORS)
+    if min(args.sizes) < smallest:
+        parser.error(f"sizes must be at least {smallest} for the selected generators")
+    return args
+
+
+def main():
+    """
+    Runs the benchmark, writes the results and compares them with a baseline.
+
+    Exits with status 1 if the comparison finds regressions.
+    """
+    args = parse_args()
+    results = run_benchmark(args.sizes, args.kinds, args.modes, args.seed, args.repeat,
+                            not args.no_memory, args.mazes, log=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(json.dumps(regression))
+        print(f"{len(regressions)} regression(s) against {args.compare}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+# Ensure that the main function is executed only if this script is run directly.
+if __name__ == "__main__":
+    main()
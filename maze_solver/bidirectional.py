@@ -0,0 +1,171 @@
+from array import array
+from heapq import heappush, heappop
+from flat_search import (
+    INDEX_BITS, INDEX_MASK, UNREACHED,
+    flat_deltas, manhattan_field, path_solution, trace_parents,
+)
+
+
+def stitch(parent_forward, parent_backward, start, goal, meet, width):
+    """
+    Joins the half-path from the start to the meeting cell with the half-path
+    from the meeting cell to the goal.
+
+    Args:
+        parent_forward (array): Parent pointers of the search from the start.
+        parent_backward (array): Parent pointers of the search from the goal. The parent
+                                 of a cell is the next cell on its way to the goal.
+        start (int): Flat index of the start cell.
+        goal (int): Flat index of the goal cell.
+        meet (int): Flat index of the cell where both searches met.
+        width (int): The width of the maze.
+
+    Returns:
+        tuple: The solution as (actions, cells).
+    """
+    path = trace_parents(parent_forward, meet, start)
+    path.reverse()
+    # The goal side is already ordered from the meeting cell towards the goal
+    path.extend(trace_parents(parent_backward, meet, goal)[1:])
+    return path_solution(path, width)
+
+
+def bidirectional_bfs(maze, trace=None):
+    """
+    Runs breadth-first searches from the start and from the goal at the same time.
+
+    Each step expands one whole layer of the side with the smaller frontier. As soon as
+    a layer reaches a cell already reached by the other side, the shortest meeting
+    found in that layer gives a shortest path.
+
+    Args:
+        maze (Maze): The maze to solve.
+        trace (array): An `array("i")` the flat index of every cell expanded by either
+                       side is appended to, in expansion order, or None to record nothing.
+
+    Returns:
+        tuple: A tuple (solution, closed, num_explored), where `closed` is a bytearray
+               flagging the cells expanded by either side.
+
+    Raises:
+        Exception: If no solution is found, an exception is raised.
+    """
+    width = maze.width
+    size = maze.height * width
+    flat_moves = maze.flat_moves
+    deltas = flat_deltas(width)
+    start = maze.start[0] * width + maze.start[1]
+    goal = maze.goal[0] * width + maze.goal[1]
+    closed = bytearray(size)
+    if start == goal:
+        return ([], []), closed, 1
+
+    dist = (array("i", [-1]) * size, array("i", [-1]) * size)
+    parent = (array("i", [-1]) * size, array("i", [-1]) * size)
+    layers = ([start], [goal])
+    dist[0][start] = 0
+    dist[1][goal] = 0
+    best = UNREACHED
+    meet = -1
+    num_explored = 0
+
+    while layers[0] and layers[1]:
+        side = 0 if len(layers[0]) <= len(layers[1]) else 1
+        this_dist, other_dist, this_parent = dist[side], dist[1 - side], parent[side]
+        next_layer = []
+        for idx in layers[side]:
+            num_explored += 1
+            closed[idx] = 1
+            if trace is not None:
+                trace.append(idx)
+            d = this_dist[idx] + 1
+            for delta in deltas[flat_moves[idx]]:
+                child = idx + delta
+                if this_dist[child] >= 0:
+                    continue
+                this_dist[child] = d
+                this_parent[child] = idx
+                if other_dist[child] >= 0 and d + other_dist[child] < best:
+                    best = d + other_dist[child]
+                    meet = child
+                next_layer.append(child)
+        if best != UNREACHED:
+            return stitch(parent[0], parent[1], start, goal, meet, width), closed, num_explored
+        layers = (next_layer, layers[1]) if side == 0 else (layers[0], next_layer)
+
+    raise Exception("No solution")
+
+
+def bidirectional_astar(maze, trace=None):
+    """
+    Runs A* searches from the start (towards the goal) and from the goal (towards the
+    start) at the same time, always expanding the side with the lower f value on top.
+
+    Every time a cell is reached by both sides, the combined path length becomes a
+    candidate. The search stops once the lowest f value of either side is no smaller
+    than the best candidate, since no shorter path can then exist.
+
+    Args:
+        maze (Maze): The maze to solve.
+        trace (array): An `array("i")` the flat index of every cell expanded by either
+                       side is appended to, in expansion order, or None to record nothing.
+
+    Returns:
+        tuple: A tuple (solution, closed, num_explored), where `closed` is a bytearray
+               flagging the cells expanded by either side.
+
+    Raises:
+        Exception: If no solution is found, an exception is raised.
+    """
+    width = maze.width
+    size = maze.height * width
+    flat_moves = maze.flat_moves
+    deltas = flat_deltas(width)
+    start = maze.start[0] * width + maze.start[1]
+    goal = maze.goal[0] * width + maze.goal[1]
+    closed = bytearray(size)
+    if start == goal:
+        return ([], []), closed, 1
+
+    h = (manhattan_field(maze, maze.goal), manhattan_field(maze, maze.start))
+    g_score = (array("i", [UNREACHED]) * size, array("i", [UNREACHED]) * size)
+    parent = (array("i", [-1]) * size, array("i", [-1]) * size)
+    side_closed = (bytearray(size), bytearray(size))
+    heaps = ([(h[0][start] << INDEX_BITS) | start], [(h[1][goal] << INDEX_BITS) | goal])
+    g_score[0][start] = 0
+    g_score[1][goal] = 0
+    best = UNREACHED
+    meet = -1
+    num_explored = 0
+
+    while heaps[0] and heaps[1]:
+        if max(heaps[0][0], heaps[1][0]) >> INDEX_BITS >= best:
+            break  # Every shorter path would need an f value below the top of both sides
+        side = 0 if heaps[0][0] <= heaps[1][0] else 1
+        heap, this_h, this_g, other_g = heaps[side], h[side], g_score[side], g_score[1 - side]
+        this_parent, this_closed = parent[side], side_closed[side]
+
+        idx = heappop(heap) & INDEX_MASK
+        if this_closed[idx]:
+            continue  # Stale entry
+        this_closed[idx] = 1
+        closed[idx] = 1
+        num_explored += 1
+        if trace is not None:
+            trace.append(idx)
+
+        g = this_g[idx] + 1
+        for delta in deltas[flat_moves[idx]]:
+            child = idx + delta
+            if this_g[child] <= g:
+                continue
+            this_g[child] = g
+            this_parent[child] = idx
+            heappush(heap, ((g + this_h[child]) << INDEX_BITS) | child)
+            if other_g[child] != UNREACHED and g + other_g[child] < best:
+                best = g + other_g[child]
+                meet = child
+
+    if best == UNREACHED:
+        raise Exception("No solution")
+    return stitch(parent[0], parent[1], start, goal, meet, width), closed, num_explored
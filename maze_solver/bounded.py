@@ -0,0 +1,324 @@
+from array import array
+from heapq import heapify, heappush, heappop, nsmallest
+import numpy as np
+from flat_search import INDEX_BITS, INDEX_MASK, UNREACHED, flat_deltas, manhattan_field, path_solution, trace_parents
+
+# Memory-bounded searches for mazes whose A* frontier does not fit in memory. They work
+# on flat cell indices like `flat_search`, cap the size of their frontier, and report
+# whether the path they return is guaranteed to be optimal. Only the frontier is
+# capped: the per-cell arrays (g-scores, parent pointers, closed flags) still take a
+# few bytes per cell, which is far less than the heap entries, Node objects and sets
+# of an unbounded search but still grows with the maze.
+
+# Default cap on the number of cells kept per layer by beam search.
+DEFAULT_BEAM_WIDTH = 1000
+
+# Default cap on the number of heap entries of the bounded A* search.
+DEFAULT_MAX_FRONTIER = 1 << 20
+
+
+def estimates(maze, heuristic=None):
+    """
+    Returns the heuristic of a bounded search for every cell: the field of a precomputed
+    heuristic, or the Manhattan distance scaled by the cheapest cell cost.
+
+    Args:
+        maze (Maze): The maze to solve.
+        heuristic (FieldHeuristic): A precomputed heuristic (see `heuristics`), or None.
+
+    Returns:
+        array: An int32 array of estimates indexed by flat cell index.
+    """
+    if heuristic is not None:
+        return heuristic.field(maze.goal)
+    return manhattan_field(maze, maze.goal, maze.min_cost)
+
+
+def record_frontier(stats, pushes, pops, peak, stale_skipped=0):
+    """
+    Adds the frontier counters of a bounded search to a `SearchStats`, if one is given.
+
+    Args:
+        stats (SearchStats): The statistics to update, or None.
+        pushes (int): The number of entries added to the frontier.
+        pops (int): The number of entries removed from the frontier.
+        peak (int): The largest number of entries in the frontier at once.
+        stale_skipped (int): The number of entries skipped because their cell was expanded.
+    """
+    if stats is None:
+        return
+    stats.pushes += pushes
+    stats.pops += pops
+    stats.stale_skipped += stale_skipped
+    stats.peak_frontier = max(stats.peak_frontier, peak)
+
+
+def ida_star(maze, heuristic=None, stats=None):
+    """
+    Runs iterative-deepening A* (IDA*): a series of depth-first searches, each one
+    pruning the cells whose f = g + h exceeds a bound, the bound growing to the smallest
+    pruned f value after every iteration. The heuristic is the Manhattan distance scaled
+    by the cheapest cell cost, unless a precomputed one is given.
+
+    The frontier is only the current path and the pending siblings of its cells. Besides
+    it, one int per cell holds the lowest g found in the current iteration, which stops
+    the depth-first search from going around cycles or reaching a cell again by a path
+    that is not cheaper; the buffer is allocated once and refilled on every iteration.
+    The heuristic takes another int per cell. The path is optimal, but every iteration
+    searches again from the start, so IDA* is slow on winding mazes where the bound has
+    to grow many times.
+
+    Args:
+        maze (Maze): The maze to solve.
+        heuristic (FieldHeuristic): A precomputed heuristic (see `heuristics`) replacing
+                                    the Manhattan distance. Defaults to None.
+        stats (SearchStats): Statistics receiving the frontier counters of all iterations
+                             (see `record_frontier`). Defaults to None.
+
+    Returns:
+        tuple: A tuple (solution, num_explored, iterations), where `num_explored` counts
+               the expansions of all iterations.
+
+    Raises:
+        Exception: If no solution is found, an exception is raised.
+    """
+    width = maze.width
+    size = maze.height * width
+    flat_moves = maze.flat_moves
+    costs = maze.flat_costs
+    deltas = flat_deltas(width)
+    h = estimates(maze, heuristic)
+    start = maze.start[0] * width + maze.start[1]
+    goal = maze.goal[0] * width + maze.goal[1]
+
+    def children(idx, g):
+        # Children as (f, index, g), sorted so that the most promising one is popped first
+        found = []
+        for delta in deltas[flat_moves[idx]]:
+            child = idx + delta
+            child_g = g + (costs[child] if costs is not None else 1)
+            found.append((child_g + h[child], child, child_g))
+        found.sort(reverse=True)
+        return found
+
+    best = np.empty(size, dtype=np.int32)
+    best_g = memoryview(best)  # Lowest g reached in this iteration, refilled by NumPy
+    bound = h[start]
+    num_explored = 0
+    iterations = 0
+    pushes = pops = peak = 0
+    try:
+        while True:
+            iterations += 1
+            best.fill(UNREACHED)
+            best_g[start] = 0
+            next_bound = UNREACHED
+            path = [start]
+            pending = [children(start, 0)]  # Unvisited children of every cell of the path
+            live = len(pending[0])  # Entries of `pending`, the frontier
+            pushes += live
+            peak = max(peak, live)
+            num_explored += 1
+            if start == goal:
+                return ([], []), num_explored, iterations
+
+            while pending:
+                siblings = pending[-1]
+                if not siblings:
+                    # Every child was searched, backtrack
+                    pending.pop()
+                    path.pop()
+                    continue
+                f, child, g = siblings.pop()
+                live -= 1
+                pops += 1
+                if g >= best_g[child]:
+                    continue  # Already reached in this iteration by a path at least as cheap
+                best_g[child] = g
+                if f > bound:
+                    next_bound = min(next_bound, f)
+                    continue
+                path.append(child)
+                if child == goal:
+                    return path_solution(path, width), num_explored, iterations
+                num_explored += 1
+                found = children(child, g)
+                pending.append(found)
+                live += len(found)
+                pushes += len(found)
+                if live > peak:
+                    peak = live
+
+            if next_bound == UNREACHED:
+                raise Exception("No solution")
+            bound = next_bound
+    finally:
+        record_frontier(stats, pushes, pops, peak)
+
+
+def beam_search(maze, beam_width=DEFAULT_BEAM_WIDTH, heuristic=None, stats=None):
+    """
+    Runs a beam search: a breadth-first search by layers that only keeps the
+    `beam_width` most promising cells of every layer (lowest f = g + h) and drops the
+    others. Each cell is only reached once.
+
+    The frontier is capped at `beam_width` cells per layer, plus the candidates of the
+    next layer before they are cut. The parent pointers needed to rebuild the path, the
+    g-scores and the heuristic are not capped: they take one int per cell each. The path
+    is not guaranteed to be the shortest, and the search can miss the goal when its way
+    through was dropped.
+
+    Args:
+        maze (Maze): The maze to solve.
+        beam_width (int): The number of cells kept per layer.
+        heuristic (FieldHeuristic): A precomputed heuristic (see `heuristics`) replacing
+                                    the Manhattan distance. Defaults to None.
+        stats (SearchStats): Statistics receiving the frontier counters (see
+                             `record_frontier`). Defaults to None.
+
+    Returns:
+        tuple: A tuple (solution, num_explored, num_dropped), where `num_dropped` is the
+               number of cells dropped from the layers.
+
+    Raises:
+        ValueError: If `beam_width` is below 1.
+        Exception: If no solution is found, an exception is raised.
+    """
+    if beam_width < 1:
+        raise ValueError("beam_width must be at least 1")
+    width = maze.width
+    size = maze.height * width
+    flat_moves = maze.flat_moves
+    costs = maze.flat_costs
+    deltas = flat_deltas(width)
+    h = estimates(maze, heuristic)
+    start = maze.start[0] * width + maze.start[1]
+    goal = maze.goal[0] * width + maze.goal[1]
+
+    parent = array("i", [-1]) * size
+    g_score = array("i", [UNREACHED]) * size
+    parent[start] = start
+    g_score[start] = 0
+    layer = [start]
+    num_explored = 0
+    num_dropped = 0
+    pushes = peak = 0
+
+    try:
+        while layer:
+            candidates = []
+            for idx in layer:
+                num_explored += 1
+                if idx == goal:
+                    path = trace_parents(parent, goal, start)
+                    path.reverse()
+                    return path_solution(path, width), num_explored, num_dropped
+                for delta in deltas[flat_moves[idx]]:
+                    child = idx + delta
+                    if parent[child] >= 0:
+                        continue  # Already reached
+                    parent[child] = idx
+                    g = g_score[child] = g_score[idx] + (costs[child] if costs is not None else 1)
+                    candidates.append(((g + h[child]) << INDEX_BITS) | child)
+            pushes += len(candidates)
+            peak = max(peak, len(layer) + len(candidates))
+            if len(candidates) > beam_width:
+                num_dropped += len(candidates) - beam_width
+                candidates = nsmallest(beam_width, candidates)
+            layer = [entry & INDEX_MASK for entry in candidates]
+    finally:
+        record_frontier(stats, pushes + 1, num_explored, peak)
+
+    raise Exception("No solution within the beam width" if num_dropped else "No solution")
+
+
+def bounded_astar(maze, max_frontier=DEFAULT_MAX_FRONTIER, heuristic=None, stats=None):
+    """
+    Runs A* with a cap on the size of its heap, in the spirit of SMA*: whenever the heap
+    grows past `max_frontier` entries, its worst half (highest f) is dropped, and the
+    dropped cells are forgotten so that they can be reached again later by another path.
+
+    Only the heap is capped. The g-scores, parent pointers and closed flags are arrays
+    over every cell (9 bytes per cell), as is the heuristic, and are not bounded.
+
+    While nothing is dropped the search is plain A* and its path is optimal. Once
+    entries have been dropped, the path is still valid but no longer guaranteed to be the
+    shortest, and the search can miss the goal.
+
+    Args:
+        maze (Maze): The maze to solve.
+        max_frontier (int): The maximum number of heap entries.
+        heuristic (FieldHeuristic): A precomputed heuristic (see `heuristics`) replacing
+                                    the Manhattan distance. Defaults to None.
+        stats (SearchStats): Statistics receiving the frontier counters (see
+                             `record_frontier`). Defaults to None.
+
+    Returns:
+        tuple: A tuple (solution, num_explored, num_dropped), where `num_dropped` is the
+               number of heap entries dropped.
+
+    Raises:
+        ValueError: If `max_frontier` is below 2.
+        Exception: If no solution is found, an exception is raised.
+    """
+    if max_frontier < 2:
+        raise ValueError("max_frontier must be at least 2")
+    width = maze.width
+    size = maze.height * width
+    flat_moves = maze.flat_moves
+    costs = maze.flat_costs
+    deltas = flat_deltas(width)
+    h = estimates(maze, heuristic)
+    start = maze.start[0] * width + maze.start[1]
+    goal = maze.goal[0] * width + maze.goal[1]
+
+    g_score = array("i", [UNREACHED]) * size
+    parent = array("i", [-1]) * size
+    closed = bytearray(size)
+    g_score[start] = 0
+    heap = [(h[start] << INDEX_BITS) | start]
+    num_explored = 0
+    num_dropped = 0
+    pushes, pops, peak = 1, 0, 1
+
+    try:
+        while heap:
+            idx = heappop(heap) & INDEX_MASK
+            pops += 1
+            if closed[idx]:
+                continue  # Stale entry, the cell was already expanded
+            num_explored += 1
+            if idx == goal:
+                path = trace_parents(parent, goal, start)
+                path.reverse()
+                return path_solution(path, width), num_explored, num_dropped
+            closed[idx] = 1
+
+            base = g_score[idx]
+            for delta in deltas[flat_moves[idx]]:
+                child = idx + delta
+                g = base + (costs[child] if costs is not None else 1)
+                if g_score[child] <= g or closed[child]:
+                    continue
+                g_score[child] = g
+                parent[child] = idx
+                heappush(heap, ((g + h[child]) << INDEX_BITS) | child)
+                pushes += 1
+
+            if len(heap) > peak:
+                peak = len(heap)
+            if len(heap) > max_frontier:
+                # Keep the best half; forget the cells whose only entries were dropped
+                kept = nsmallest(max_frontier // 2, heap)
+                live = {entry & INDEX_MASK for entry in kept}
+                for entry in heap:
+                    child = entry & INDEX_MASK
+                    if child not in live and not closed[child]:
+                        g_score[child] = UNREACHED
+                num_dropped += len(heap) - len(kept)
+                heap = kept
+                heapify(heap)
+    finally:
+        record_frontier(stats, pushes, pops, peak, pops - num_explored)
+
+    raise Exception("No solution within the frontier budget" if num_dropped else "No solution")
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from flat_search import bfs_tree, path_solution, trace_parents
+
+
+class PathCache:
+    """
+    A size-bounded cache of single-source shortest-path trees over one maze.
+
+    Each entry is the breadth-first search tree of one source cell. Since moves are
+    symmetric, a tree answers every query that starts or ends at its source: paths
+    from the source are read backwards from the goal, and paths to the source are read
+    forwards from the start. Either way a cached query costs O(path length). When the
+    cache is full, the least recently used tree is evicted. Every tree is dropped when
+    a wall of the maze changes (see `Maze.set_wall`).
+
+    Attributes:
+        maze (Maze): The maze the trees are computed on.
+        max_sources (int): The maximum number of trees kept at once.
+        hits (int): The number of queries answered from a cached tree.
+        misses (int): The number of queries that needed a new tree.
+        evictions (int): The number of trees dropped to make room for new ones.
+
+    Methods:
+        path(start, goal): Returns the (actions, cells) solution between two cells.
+        tree(source): Returns the shortest-path tree of a cell, computing it if needed.
+        clear(): Drops every cached tree.
+    """
+
+    def __init__(self, maze, max_sources=16):
+        """
+        Initializes an empty cache.
+
+        Args:
+            maze (Maze): The maze the trees are computed on.
+            max_sources (int): The maximum number of trees kept at once.
+
+        Raises:
+            ValueError: If `max_sources` is below 1, or the maze has terrain costs
+                        (breadth-first trees are only shortest for unit costs).
+        """
+        if max_sources < 1:
+            raise ValueError("max_sources must be at least 1")
+        if maze.weighted:
+            raise ValueError("Path caching does not support weighted mazes")
+        self.maze = maze
+        self.max_sources = max_sources
+        self.trees = OrderedDict()  # Source flat index -> parent array, least recent first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        maze.listeners.append(self._on_wall_change)
+
+    def _on_wall_change(self, row, col, wall):
+        """
+        Drops the cached trees, which no longer match the walls.
+        """
+        self.clear()
+
+    def tree(self, source):
+        """
+        Returns the shortest-path tree rooted at a cell, computing and caching it if needed.
+
+        Args:
+            source (int): Flat index of the root cell.
+
+        Returns:
+            array: The parent flat index of every reached cell, -1 for unreachable cells.
+        """
+        parent = self.trees.get(source)
+        if parent is None:
+            parent = bfs_tree(self.maze, source)
+            self.trees[source] = parent
+            if len(self.trees) > self.max_sources:
+                self.trees.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.trees.move_to_end(source)
+        return parent
+
+    def path(self, start, goal):
+        """
+        Finds a shortest path between two open cells, reusing a cached tree rooted at
+        either of them when there is one.
+
+        Args:
+            start (tuple): The start cell (row, column).
+            goal (tuple): The goal cell (row, column).
+
+        Returns:
+            tuple: The solution as (actions, cells), or None if the goal cannot be reached.
+
+        Raises:
+            ValueError: If either cell is outside the maze or is a wall.
+        """
+        width = self.maze.width
+        for row, col in (start, goal):
+            if not (0 <= row < self.maze.height and 0 <= col < width) or self.maze.grid[row, col]:
+                raise ValueError(f"Cell {(row, col)} is not an open cell of the maze")
+        components = self.maze.components
+        if components is not None and not components.connected(start, goal):
+            return None  # Known to be unreachable, no tree is needed
+        source = start[0] * width + start[1]
+        target = goal[0] * width + goal[1]
+
+        if source in self.trees or target not in self.trees:
+            self.hits += source in self.trees
+            self.misses += source not in self.trees
+            parent = self.tree(source)
+            if parent[target] < 0:
+                return None
+            path = trace_parents(parent, target, source)
+            path.reverse()
+        else:
+            # Only the goal has a tree: walk from the start towards it
+            self.hits += 1
+            parent = self.tree(target)
+            if parent[source] < 0:
+                return None
+            path = trace_parents(parent, source, target)
+        return path_solution(path, width)
+
+    def clear(self):
+        """
+        Drops every cached tree. The counters are kept.
+        """
+        self.trees.clear()
@@ -0,0 +1,283 @@
+import argparse
+import asyncio
+import json
+import os
+from itertools import count
+from time import perf_counter
+import numpy as np
+from maze import Maze
+from search import ENGINES
+from components import label_components
+from server import DEFAULT_HOST, DEFAULT_PORT, LINE_LIMIT, percentiles
+
+# Example usage: python .\maze_solver\client.py .\data\maze2.txt --requests 2000 --connections 4 --depth 8
+#                python .\maze_solver\client.py .\data\maze2.txt --socket /tmp/maze.sock --engine flat --json
+
+
+class SolveClient:
+    """
+    A client of the solve server (see `server.SolveServer`) over one connection.
+
+    Requests are pipelined: any number of coroutines can await `request` on the same
+    client at once. Each request gets a new id, and a background task reads the answers
+    and hands each one to the request with the same id, whatever their order.
+
+    Methods:
+        connect(host, port, path): Opens a connection (a class method).
+        request(payload): Sends a request and returns its answer.
+        solve(maze, ...): Sends a solve request and returns its answer.
+        stats(): Returns the statistics of the server.
+        close(): Closes the connection.
+    """
+
+    def __init__(self, reader, writer):
+        """
+        Wraps an open connection and starts reading the answers.
+
+        Args:
+            reader (asyncio.StreamReader): The stream of answers.
+            writer (asyncio.StreamWriter): The stream of requests.
+        """
+        self.reader = reader
+        self.writer = writer
+        self.ids = count()
+        self.waiting = {}  # Request id -> future of its answer
+        self.reading = asyncio.create_task(self._read_answers())
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """
+        Opens a connection to a server.
+
+        Args:
+            host (str): The TCP address of the server.
+            port (int): The TCP port of the server.
+            path (str): The path of the server's Unix socket, used instead of TCP.
+
+        Returns:
+            SolveClient: The connected client.
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=LINE_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+        return cls(reader, writer)
+
+    async def _read_answers(self):
+        """
+        Resolves the waiting requests with the answers, until the connection is closed.
+        """
+        try:
+            while line := await self.reader.readline():
+                answer = json.loads(line)
+                future = self.waiting.pop(answer.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(answer)
+        finally:
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("The server closed the connection"))
+            self.waiting.clear()
+
+    async def request(self, payload):
+        """
+        Sends a request and waits for its answer.
+
+        Args:
+            payload (dict): The request (see `server.parse_request`); its "id" is replaced.
+
+        Returns:
+            dict: The answer of the server.
+
+        Raises:
+            ConnectionError: If the connection is closed before the answer arrives.
+        """
+        if self.reading.done():
+            raise ConnectionError("The server closed the connection")
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        self.writer.write(json.dumps({**payload, "id": request_id}).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def solve(self, maze, start=None, goal=None, algorithm="astar", engine="node", path=False):
+        """
+        Asks the server to solve a maze.
+
+        Args:
+            maze (str): The path of the maze file, as seen by the server.
+            start (tuple): The start cell (row, column). Defaults to the 'A' of the file.
+            goal (tuple): The goal cell (row, column). Defaults to the 'B' of the file.
+            algorithm (str): The search algorithm.
+            engine (str): The search engine.
+            path (bool): Whether to return the cells of the path.
+
+        Returns:
+            dict: The answer of the server (see `server.solve_request`).
+        """
+        payload = {"maze": maze, "algorithm": algorithm, "engine": engine, "path": path}
+        if start is not None:
+            payload["start"] = list(start)
+        if goal is not None:
+            payload["goal"] = list(goal)
+        return await self.request(payload)
+
+    async def stats(self):
+        """
+        Returns the statistics of the server (see `server.LatencyStats.summary`).
+        """
+        return await self.request({"op": "stats"})
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        await asyncio.gather(self.reading, return_exceptions=True)
+
+
+def random_queries(maze, num_queries, seed=0):
+    """
+    Draws random (start, goal) pairs from the connected component of the maze's start,
+    so that every query has a solution.
+
+    Args:
+        maze (Maze): The maze to draw the cells from.
+        num_queries (int): The number of pairs.
+        seed (int): The random seed.
+
+    Returns:
+        list: (start, goal) pairs of (row, column) tuples.
+    """
+    labels = label_components(maze)
+    cells = np.flatnonzero(labels == labels[maze.start[0] * maze.width + maze.start[1]])
+    rng = np.random.default_rng(seed)
+    rows, cols = np.divmod(rng.choice(cells, size=(num_queries, 2)), maze.width)
+    return [((r1, c1), (r2, c2)) for (r1, r2), (c1, c2) in zip(rows.tolist(), cols.tolist())]
+
+
+async def run_load(filename, queries, connections=4, depth=8, algorithm="astar", engine="node",
+                   host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+    """
+    Sends queries to a server as fast as it answers them and measures the throughput.
+
+    Every connection keeps up to `depth` requests in flight, so `connections * depth`
+    requests are pipelined at once.
+
+    Args:
+        filename (str): The path of the maze file, as seen by the server.
+        queries (list): (start, goal) pairs; None uses the points of the file.
+        connections (int): The number of connections to open.
+        depth (int): The number of requests in flight per connection.
+        algorithm (str): The search algorithm.
+        engine (str): The search engine.
+        host (str): The TCP address of the server.
+        port (int): The TCP port of the server.
+        path (str): The path of the server's Unix socket, used instead of TCP.
+
+    Returns:
+        dict: The number of requests and errors, the elapsed time in seconds, the
+              throughput in requests per second, the latency percentiles seen by the
+              client in milliseconds (see `server.percentiles`), and the server's statistics.
+    """
+    clients = [await SolveClient.connect(host, port, path) for _ in range(connections)]
+    pending = iter(queries)  # Shared by every sender, so that they split the queries
+    latencies = []
+    errors = []
+
+    async def send(client):
+        for start, goal in pending:
+            sent = perf_counter()
+            answer = await client.solve(filename, start, goal, algorithm, engine)
+            latencies.append(perf_counter() - sent)
+            if answer["status"] != "ok":
+                errors.append(answer["error"])
+
+    started = perf_counter()
+    try:
+        await asyncio.gather(*(send(client) for client in clients for _ in range(depth)))
+        elapsed = perf_counter() - started
+        server_stats = await clients[0].stats()
+    finally:
+        for client in clients:
+            await client.close()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "elapsed": round(elapsed, 6),
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+        "latency": percentiles(latencies),
+        "server": server_stats,
+    }
+
+
+def parse_args(argv=None):
+    """
+    Parses the command-line arguments.
+
+    Args:
+        argv (list): The arguments to parse. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Measure the throughput of a solve server on one maze.")
+    parser.add_argument("maze", help="path to the maze file")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"TCP address of the server (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port of the server (default: {DEFAULT_PORT})")
+    parser.add_argument("--socket", metavar="PATH", help="connect to a Unix socket instead of TCP")
+    parser.add_argument("--requests", type=int, default=1000, help="number of requests to send (default: 1000)")
+    parser.add_argument("--connections", type=int, default=4, help="number of connections (default: 4)")
+    parser.add_argument("--depth", type=int, default=8,
+                        help="requests in flight per connection (default: 8)")
+    parser.add_argument("--algorithm", default="astar", help="search algorithm to use (default: astar)")
+    parser.add_argument("--engine", default="node", choices=sorted(ENGINES),
+                        help="search engine to use (default: node)")
+    parser.add_argument("--fixed", action="store_true",
+                        help="solve from the 'A' to the 'B' of the file every time instead of random cells")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the queries (default: 0)")
+    parser.add_argument("--json", action="store_true", help="print the results as one JSON line")
+    args = parser.parse_args(argv)
+
+    if min(args.requests, args.connections, args.depth) < 1:
+        parser.error("--requests, --connections and --depth must be at least 1")
+    if args.algorithm not in ENGINES[args.engine]:
+        parser.error(f"the {args.engine} engine does not provide the '{args.algorithm}' algorithm, "
+                     f"expected one of {sorted(ENGINES[args.engine])}")
+    return args
+
+
+def main():
+    """
+    Sends the requested load to a running server and prints the throughput and latencies.
+    """
+    args = parse_args()
+    filename = os.path.abspath(args.maze)  # The server may run in another directory
+    if args.fixed:
+        queries = [(None, None)] * args.requests
+    else:
+        queries = random_queries(Maze(filename), args.requests, args.seed)
+    results = asyncio.run(run_load(filename, queries, args.connections, args.depth, args.algorithm,
+                                   args.engine, args.host, args.port, args.socket))
+    if args.json:
+        print(json.dumps(results))
+        return
+    server = results["server"]
+    print(f"Requests:          {results['requests']} ({results['errors']} failed)")
+    if results["first_error"]:
+        print(f"First error:       {results['first_error']}")
+    print(f"Elapsed:           {results['elapsed']:.3f} s")
+    print(f"Throughput:        {results['throughput']} requests/s")
+    print(f"Maze loads:        {server['maze_loads']}")
+    for name, summary in (("Latency", results["latency"]), ("Server solve", server["solve"])):
+        print(f"{name + ' (ms):':<19}" + ", ".join(f"{key} {value}" for key, value in summary.items()))
+
+# Ensure that the main function is executed only if this script is run directly.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+from collections import deque
+import numpy as np
+from flat_search import flat_deltas
+from utils import DOWN, LEFT
+
+
+class UnreachableError(Exception):
+    """
+    Raised before any search when the start and the goal lie in different connected
+    components of the maze, so that there is no solution.
+    """
+
+
+def label_components(maze):
+    """
+    Labels the connected components of the open cells in vectorized passes. The
+    horizontal runs of open cells are labeled first, from the cumulative count of run
+    starts; a union-find over the runs then joins the runs that touch vertically. Each
+    round hooks the larger root of every joining edge under the smaller one, flattens
+    the trees by pointer jumping, and drops the edges whose runs already share a root.
+
+    Args:
+        maze (Maze): The maze to label.
+
+    Returns:
+        numpy.ndarray: An int32 array indexed by flat cell index holding, for every open
+                       cell, the smallest flat index of its component, and -1 for walls.
+    """
+    masks = np.frombuffer(maze.flat_moves, dtype=np.uint8)
+    open_cells = maze.grid.reshape(-1) == 0
+    # A run starts at every open cell that cannot move left
+    run_starts = open_cells & ((masks & LEFT) == 0)
+    starts = np.flatnonzero(run_starts).astype(np.int32)
+    run_of = np.cumsum(run_starts, dtype=np.int32) - 1  # Run of every open cell
+
+    # Pairs of runs joined by a vertical move. Cells of the same pair of runs are
+    # consecutive in flat order, so dropping repeats of the previous pair suffices
+    down = np.flatnonzero(masks & DOWN)
+    u, v = run_of[down], run_of[down + maze.width]
+    first = np.ones(len(u), dtype=bool)
+    first[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+    u, v = u[first], v[first]
+
+    parent = np.arange(len(starts), dtype=np.int32)
+    while len(u):
+        pu, pv = parent[u], parent[v]
+        joined = pu != pv
+        u, v, pu, pv = u[joined], v[joined], pu[joined], pv[joined]
+        if not len(u):
+            break
+        # Both ends are roots after the pointer jumping, hook the larger one
+        np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))
+        deep = np.flatnonzero(parent[parent] != parent)  # Runs whose parent is not a root
+        while len(deep):
+            parent[deep] = parent[parent[deep]]
+            deep = deep[parent[parent[deep]] != parent[deep]]
+
+    # The root run of a component is its first one, which starts at its smallest index
+    labels = np.full(masks.size, -1, dtype=np.int32)
+    labels[open_cells] = starts[parent[run_of[open_cells]]]
+    return labels
+
+
+class ComponentIndex:
+    """
+    A connected-components index of the open cells, which answers whether two cells
+    are connected in O(1) before any search starts.
+
+    Every open cell holds the id of its component in `labels`. The index registers
+    itself in `maze.listeners` and stays up to date as walls change:
+
+    - Opening a cell joins the components of its open neighbors by recording the merged
+      ids in a small union-find (`aliases`), without touching the labels of their cells.
+    - Closing a cell can split its component. Searches from its open neighbors run in
+      turn, one cell at a time, and stop as soon as they all meet; a search that runs
+      out of cells before meeting the others has found a separated piece, which gets a
+      new id. The work is bounded by the smaller pieces, not by the component size.
+
+    Attributes:
+        maze (Maze): The indexed maze.
+        labels (numpy.ndarray): The component id of every cell by flat index, -1 for walls.
+                                Ids merged by opened cells resolve through `aliases`.
+        aliases (dict): Component id -> the id it was merged into.
+        num_components (int): The number of connected components.
+
+    Methods:
+        component(cell): Returns the id of the component of a cell.
+        connected(a, b): Returns whether two cells are connected.
+        check(start, goal): Raises UnreachableError if the two cells are not connected.
+        detach(): Stops listening to the maze's wall changes.
+    """
+
+    def __init__(self, maze):
+        """
+        Labels the components of the maze.
+
+        Args:
+            maze (Maze): The maze to index.
+        """
+        self.maze = maze
+        self.width = maze.width
+        self.deltas = flat_deltas(maze.width)
+        self.labels = label_components(maze)
+        self.aliases = {}
+        self.next_id = self.labels.size  # Ids of split pieces, above every flat index
+        roots = np.arange(self.labels.size, dtype=np.int32)
+        self.num_components = int(np.count_nonzero(self.labels == roots))
+        maze.listeners.append(self._on_wall_change)
+
+    def detach(self):
+        """
+        Stops listening to the maze's wall changes. The index must not be used afterwards.
+        """
+        self.maze.listeners.remove(self._on_wall_change)
+
+    def _find(self, label):
+        """
+        Resolves a component id through the merges, compressing the chain of aliases.
+        """
+        aliases = self.aliases
+        root = label
+        while root in aliases:
+            root = aliases[root]
+        while label != root:
+            next_label = aliases[label]
+            aliases[label] = root
+            label = next_label
+        return root
+
+    def component(self, cell):
+        """
+        Returns the id of the component of a cell.
+
+        Args:
+            cell (tuple): The cell (row, column).
+
+        Returns:
+            int: The component id, or None if the cell is a wall.
+
+        Raises:
+            ValueError: If the cell is outside the maze.
+        """
+        row, col = cell
+        if not (0 <= row < self.maze.height and 0 <= col < self.width):
+            raise ValueError(f"Cell {cell} is outside the maze")
+        label = int(self.labels[row * self.width + col])
+        return self._find(label) if label >= 0 else None
+
+    def connected(self, a, b):
+        """
+        Returns whether a path joins two cells.
+
+        Args:
+            a (tuple): The first cell (row, column).
+            b (tuple): The second cell (row, column).
+
+        Returns:
+            bool: True if both cells are open and in the same component.
+
+        Raises:
+            ValueError: If a cell is outside the maze.
+        """
+        first = self.component(a)
+        return first is not None and first == self.component(b)
+
+    def check(self, start, goal):
+        """
+        Fails fast when there is no path between two cells.
+
+        Args:
+            start (tuple): The start cell (row, column).
+            goal (tuple): The goal cell (row, column).
+
+        Raises:
+            ValueError: If a cell is outside the maze or is a wall.
+            UnreachableError: If the cells are not connected.
+        """
+        for cell in (start, goal):
+            if self.component(cell) is None:
+                raise ValueError(f"Cell {cell} is not an open cell of the maze")
+        if not self.connected(start, goal):
+            raise UnreachableError(f"No solution: {goal} cannot be reached from {start}")
+
+    def _open_neighbors(self, idx):
+        """
+        Returns the flat indices of the open cells next to a cell, from the grid bounds,
+        since the move masks of a wall do not point to its neighbors.
+        """
+        row, col = divmod(idx, self.width)
+        grid = self.maze.grid
+        found = []
+        for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if 0 <= r < self.maze.height and 0 <= c < self.width and not grid[r, c]:
+                found.append(r * self.width + c)
+        return found
+
+    def _on_wall_change(self, row, col, wall):
+        """
+        Updates the labels after a cell was closed or opened.
+        """
+        idx = row * self.width + col
+        neighbors = self._open_neighbors(idx)
+        if wall:
+            self.labels[idx] = -1
+            if not neighbors:
+                self.num_components -= 1  # The cell was a component on its own
+            elif len(neighbors) > 1:
+                self._split(neighbors)
+            return
+
+        roots = {self._find(int(self.labels[n])) for n in neighbors}
+        if not roots:
+            self.labels[idx] = self.next_id  # A new component of one cell
+            self.next_id += 1
+            self.num_components += 1
+            return
+        root = roots.pop()
+        for other in roots:
+            self.aliases[other] = root
+        self.num_components -= len(roots)
+        self.labels[idx] = root
+
+    def _split(self, seeds):
+        """
+        Finds the pieces a component was split into by a new wall, searching from the
+        open neighbors of the wall in turn until the searches meet. Searches that meet
+        are merged; a search that runs out of cells first labels its piece with a new id.
+        The last search left keeps the old id.
+
+        Args:
+            seeds (list): Flat indices of the open neighbors of the new wall.
+        """
+        flat_moves, deltas, labels = self.maze.flat_moves, self.deltas, self.labels
+        owner = {seed: group for group, seed in enumerate(seeds)}  # Cell -> search that reached it
+        merged = list(range(len(seeds)))  # Union-find over the searches
+        queues = [deque([seed]) for seed in seeds]
+        reached = [[seed] for seed in seeds]
+        live = set(range(len(seeds)))
+
+        def find(group):
+            while merged[group] != group:
+                group = merged[group]
+            return group
+
+        while len(live) > 1:
+            for group in list(live):
+                if group not in live:
+                    continue  # Merged into another search during this turn
+                if not queues[group]:
+                    # This search ran out of cells: its piece is cut off from the others
+                    new = self.next_id
+                    self.next_id += 1
+                    for cell in reached[group]:
+                        labels[cell] = new
+                    self.num_components += 1
+                    live.discard(group)
+                    if len(live) == 1:
+                        break
+                    continue
+
+                cell = queues[group].popleft()
+                for delta in deltas[flat_moves[cell]]:
+                    child = cell + delta
+                    other = owner.get(child)
+                    if other is None:
+                        owner[child] = group
+                        queues[group].append(child)
+                        reached[group].append(child)
+                        continue
+                    other = find(other)
+                    if other != group:
+                        # The two searches met: keep the larger one
+                        small, large = sorted((group, other), key=lambda g: len(reached[g]))
+                        merged[small] = large
+                        queues[large].extend(queues[small])
+                        reached[large].extend(reached[small])
+                        live.discard(small)
+                        group = large
+                if len(live) == 1:
+                    break
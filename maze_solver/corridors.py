@@ -0,0 +1,368 @@
+from array import array
+from heapq import heappush, heappop
+import numpy as np
+from flat_search import UNREACHED, flat_deltas, path_solution
+from mazefile import fingerprint
+
+
+class CorridorGraph:
+    """
+    A compressed, weighted graph of a maze, built once and reused for many queries.
+
+    Dead-end branches are pruned first: cells that have a single open neighbor are
+    removed one after the other, and each remembers the neighbor it hung from, so
+    that any cell in a pruned branch can walk back to the remaining core in a
+    straight line. In the core, every cell with other than two open neighbors
+    (junctions, and the last cell of fully pruned components) becomes a graph node,
+    and every run of two-neighbor cells between two nodes becomes an edge that
+    stores its length and its cells. Queries run on the nodes and only expand the
+    corridors back into cells at the end.
+
+    Attributes:
+        width (int): The width of the maze the graph was built from.
+        height (int): The height of the maze the graph was built from.
+        fingerprint (str): A hash of the maze walls, used to check a saved graph against a maze.
+        toward (array): For pruned cells, the flat index of the neighbor closer to the core; -1 otherwise.
+        node_of (array): The node id of every core node cell; -1 otherwise.
+        edge_of (array): The edge id of every corridor cell; -1 otherwise.
+        offset_of (array): The position of every corridor cell within its edge.
+        nodes (list): The flat index of every node.
+        edge_u (list): The first node of every edge.
+        edge_v (list): The second node of every edge.
+        edge_cells (list): The flat indices of the cells of every edge, from `edge_u` to `edge_v`
+                           (both excluded). An edge is `len(cells) + 1` moves long.
+        adjacency (list): For every node, a list of (edge id, neighbor node, length) tuples.
+
+    Methods:
+        search(start, goal): Finds a shortest path between two cells.
+        save(filename): Writes the graph to a compressed .npz file.
+        load(filename, maze): Reads a graph written by `save`.
+    """
+
+    def __init__(self, maze=None):
+        """
+        Builds the corridor graph of a maze.
+
+        Args:
+            maze (Maze): The maze to index. If None, an empty graph is created for `load` to fill.
+        """
+        if maze is None:
+            return
+        self.width = maze.width
+        self.height = maze.height
+        self.fingerprint = fingerprint(maze)
+        size = maze.height * maze.width
+        flat_moves = maze.flat_moves
+        deltas = flat_deltas(maze.width)
+
+        # Number of open neighbors of every cell, from the move masks
+        degree = bytearray(np.array([bin(mask).count("1") for mask in range(16)],
+                                    dtype=np.uint8)[maze.moves.reshape(-1)].tobytes())
+        core = bytearray((maze.grid.reshape(-1) == 0).astype(np.uint8).tobytes())
+        self.toward = array("i", [-1]) * size
+
+        # Prune dead ends, one cell at a time, until only cycles and junctions remain
+        pending = np.flatnonzero(np.frombuffer(degree, dtype=np.uint8) == 1).tolist()
+        while pending:
+            idx = pending.pop()
+            if not core[idx] or degree[idx] != 1:
+                continue
+            core[idx] = 0
+            for delta in deltas[flat_moves[idx]]:
+                other = idx + delta
+                if core[other]:
+                    self.toward[idx] = other
+                    degree[other] -= 1
+                    if degree[other] == 1:
+                        pending.append(other)
+                    break
+
+        # Every core cell that is not in the middle of a corridor is a node
+        self.node_of = array("i", [-1]) * size
+        self.edge_of = array("i", [-1]) * size
+        self.offset_of = array("i", [-1]) * size
+        self.nodes = []
+        self.edge_u = []
+        self.edge_v = []
+        self.edge_cells = []
+        core_cells = np.flatnonzero(np.frombuffer(core, dtype=np.uint8)).tolist()
+        for idx in core_cells:
+            if degree[idx] != 2:
+                self._add_node(idx)
+        for node in range(len(self.nodes)):
+            self._trace_edges(node, core, flat_moves, deltas)
+
+        # Cycles without any junction have no node yet; promote one of their cells
+        for idx in core_cells:
+            if self.node_of[idx] < 0 and self.edge_of[idx] < 0:
+                self._trace_edges(self._add_node(idx), core, flat_moves, deltas)
+
+        self._build_adjacency()
+
+    def _add_node(self, idx):
+        """
+        Registers a cell as a graph node and returns its node id.
+        """
+        self.node_of[idx] = len(self.nodes)
+        self.nodes.append(idx)
+        return len(self.nodes) - 1
+
+    def _trace_edges(self, node, core, flat_moves, deltas):
+        """
+        Follows every corridor leaving a node until it reaches another node,
+        and records each corridor that has not been recorded yet as an edge.
+        """
+        origin = self.nodes[node]
+        for delta in deltas[flat_moves[origin]]:
+            idx = origin + delta
+            if not core[idx]:
+                continue
+            if self.node_of[idx] >= 0:
+                # Two adjacent nodes: record the edge once, from the lower id
+                if node < self.node_of[idx]:
+                    self._add_edge(node, self.node_of[idx], [])
+                continue
+            if self.edge_of[idx] >= 0:
+                continue  # Already traced from its other end
+            cells = []
+            prev = origin
+            while self.node_of[idx] < 0:
+                cells.append(idx)
+                for step in deltas[flat_moves[idx]]:
+                    nxt = idx + step
+                    if core[nxt] and nxt != prev:
+                        break
+                prev, idx = idx, nxt
+            self._add_edge(node, self.node_of[idx], cells)
+
+    def _add_edge(self, u, v, cells):
+        """
+        Registers a corridor between nodes `u` and `v`.
+        """
+        edge = len(self.edge_cells)
+        self.edge_u.append(u)
+        self.edge_v.append(v)
+        self.edge_cells.append(cells)
+        for offset, idx in enumerate(cells):
+            self.edge_of[idx] = edge
+            self.offset_of[idx] = offset
+
+    def _build_adjacency(self):
+        """
+        Builds the per-node list of (edge id, neighbor node, length) tuples.
+        """
+        self.adjacency = [[] for _ in self.nodes]
+        for edge, (u, v, cells) in enumerate(zip(self.edge_u, self.edge_v, self.edge_cells)):
+            if u == v:
+                continue  # A loop back to the same node never shortens a path
+            self.adjacency[u].append((edge, v, len(cells) + 1))
+            self.adjacency[v].append((edge, u, len(cells) + 1))
+
+    def _to_core(self, idx):
+        """
+        Walks from a cell back to the core along the pruned branch it belongs to.
+
+        Returns:
+            list: The flat indices from `idx` to the first core cell, both included.
+        """
+        path = [idx]
+        while self.toward[idx] >= 0:
+            idx = self.toward[idx]
+            path.append(idx)
+        return path
+
+    def _exits(self, idx):
+        """
+        Lists the nodes reachable from a core cell without crossing another node.
+
+        Returns:
+            list: (node, distance, path) tuples, where `path` holds the flat indices
+                  strictly between the cell and the node.
+        """
+        if self.node_of[idx] >= 0:
+            return [(self.node_of[idx], 0, [])]
+        edge, offset = self.edge_of[idx], self.offset_of[idx]
+        cells = self.edge_cells[edge]
+        return [
+            (self.edge_u[edge], offset + 1, cells[offset - 1::-1] if offset else []),
+            (self.edge_v[edge], len(cells) - offset, cells[offset + 1:]),
+        ]
+
+    def _edge_path(self, edge, u):
+        """
+        Returns the cells of an edge when it is walked starting from node `u`.
+        """
+        cells = self.edge_cells[edge]
+        return cells if self.edge_u[edge] == u else cells[::-1]
+
+    def search(self, start, goal):
+        """
+        Finds a shortest path between two open cells of the maze.
+
+        Both cells first walk back to the core along their pruned branches. If they
+        share a branch, the path stays inside it. Otherwise A* runs on the graph nodes,
+        with the Manhattan distance to the goal as heuristic, starting from the nodes at
+        either end of the start's corridor and finishing at the nodes at either end of
+        the goal's corridor. The corridors used are expanded back into cells at the end.
+
+        Args:
+            start (tuple): The start cell (row, column).
+            goal (tuple): The goal cell (row, column).
+
+        Returns:
+            tuple: A tuple (solution, expanded, num_explored), where `solution` is the
+                   `(actions, cells)` tuple, `expanded` is the list of flat indices of
+                   the nodes expanded, and `num_explored` is their number.
+
+        Raises:
+            Exception: If no solution is found, an exception is raised.
+        """
+        width = self.width
+        head = self._to_core(start[0] * width + start[1])
+        tail = self._to_core(goal[0] * width + goal[1])
+
+        # Inside the same pruned tree, the path goes through the lowest common cell
+        if head[-1] == tail[-1]:
+            shared = set(head)
+            meet = next(idx for idx in tail if idx in shared)
+            path = head[:head.index(meet) + 1] + tail[:tail.index(meet)][::-1]
+            return path_solution(path, width), [], 0
+
+        source, target = head[-1], tail[-1]
+        goal_row, goal_col = divmod(target, width)
+        finish = {}
+        for node, distance, path in self._exits(target):
+            if distance < finish.get(node, (UNREACHED,))[0]:
+                finish[node] = (distance, path)
+
+        best = UNREACHED
+        best_route = None
+        # Both ends on the same corridor: walking along it is a candidate
+        if self.edge_of[source] >= 0 and self.edge_of[source] == self.edge_of[target]:
+            cells = self.edge_cells[self.edge_of[source]]
+            a, b = self.offset_of[source], self.offset_of[target]
+            best = abs(a - b)
+            best_route = cells[a:b + 1] if a <= b else cells[b:a + 1][::-1]
+
+        g_score = {}
+        parent = {}
+        heap = []
+        for node, distance, path in self._exits(source):
+            if distance < g_score.get(node, UNREACHED):
+                g_score[node] = distance
+                parent[node] = (None, path)
+                row, col = divmod(self.nodes[node], width)
+                heappush(heap, (distance + abs(row - goal_row) + abs(col - goal_col), node))
+
+        closed = set()
+        expanded = []
+        while heap:
+            f, node = heappop(heap)
+            if f >= best:
+                break  # No remaining route can beat the best one found
+            if node in closed:
+                continue
+            closed.add(node)
+            expanded.append(self.nodes[node])
+            g = g_score[node]
+            if node in finish and g + finish[node][0] < best:
+                best = g + finish[node][0]
+                best_route = node
+            for edge, other, length in self.adjacency[node]:
+                if g + length < g_score.get(other, UNREACHED):
+                    g_score[other] = g + length
+                    parent[other] = (edge, node)
+                    row, col = divmod(self.nodes[other], width)
+                    heappush(heap, (g + length + abs(row - goal_row) + abs(col - goal_col), other))
+
+        if best_route is None:
+            raise Exception("No solution")
+
+        if isinstance(best_route, list):
+            core_path = best_route
+        else:
+            # Walk the parent pointers back from the last node, collecting the corridors
+            pieces = []
+            node = best_route
+            while True:
+                edge, previous = parent[node]
+                pieces.append([self.nodes[node]])
+                if edge is None:
+                    pieces.append(previous)  # Cells between the source and the first node
+                    break
+                pieces.append(self._edge_path(edge, previous))
+                node = previous
+            core_path = [source]
+            for piece in reversed(pieces):
+                core_path.extend(piece)
+            if core_path[1] == source:
+                del core_path[1]  # The source is itself a node
+            if core_path[-1] != target:
+                core_path.extend(finish[best_route][1][::-1])
+                core_path.append(target)
+
+        path = head[:-1] + core_path + tail[:-1][::-1]
+        return path_solution(path, width), expanded, len(expanded)
+
+    def save(self, filename):
+        """
+        Writes the graph to a compressed NumPy .npz file.
+
+        Args:
+            filename (str): The path of the file to write.
+        """
+        lengths = np.array([len(cells) for cells in self.edge_cells], dtype=np.int64)
+        flat = [idx for cells in self.edge_cells for idx in cells]
+        np.savez_compressed(
+            filename,
+            shape=np.array([self.height, self.width], dtype=np.int64),
+            fingerprint=np.array(self.fingerprint),
+            toward=np.frombuffer(self.toward, dtype=np.int32),
+            nodes=np.array(self.nodes, dtype=np.int32),
+            edge_u=np.array(self.edge_u, dtype=np.int32),
+            edge_v=np.array(self.edge_v, dtype=np.int32),
+            edge_lengths=lengths,
+            edge_cells=np.array(flat, dtype=np.int32),
+        )
+
+    @classmethod
+    def load(cls, filename, maze):
+        """
+        Reads a graph written by `save` and checks that it matches the maze.
+
+        Args:
+            filename (str): The path of the file to read.
+            maze (Maze): The maze the graph is used with.
+
+        Returns:
+            CorridorGraph: The loaded graph.
+
+        Raises:
+            ValueError: If the graph was built from a different maze.
+        """
+        with np.load(filename) as data:
+            if str(data["fingerprint"]) != fingerprint(maze):
+                raise ValueError(f"Corridor graph '{filename}' was built for a different maze")
+            graph = cls()
+            graph.height, graph.width = (int(value) for value in data["shape"])
+            graph.fingerprint = str(data["fingerprint"])
+            graph.toward = array("i", data["toward"].astype(np.int32).tobytes())
+            graph.nodes = data["nodes"].tolist()
+            graph.edge_u = data["edge_u"].tolist()
+            graph.edge_v = data["edge_v"].tolist()
+            bounds = np.concatenate(([0], np.cumsum(data["edge_lengths"])))
+            flat = data["edge_cells"].tolist()
+            graph.edge_cells = [flat[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+        size = graph.height * graph.width
+        graph.node_of = array("i", [-1]) * size
+        graph.edge_of = array("i", [-1]) * size
+        graph.offset_of = array("i", [-1]) * size
+        for node, idx in enumerate(graph.nodes):
+            graph.node_of[idx] = node
+        for edge, cells in enumerate(graph.edge_cells):
+            for offset, idx in enumerate(cells):
+                graph.edge_of[idx] = edge
+                graph.offset_of[idx] = offset
+        graph._build_adjacency()
+        return graph
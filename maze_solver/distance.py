@@ -0,0 +1,180 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from flat_search import UNREACHED, flat_deltas
+from utils import UP, DOWN, LEFT, RIGHT
+
+# Breadth-first distance fields for analytics (heatmaps, reachability): the number of
+# moves from one or several source cells to every cell, computed as a NumPy wavefront
+# over the move masks instead of one Python step per cell.
+
+# Below this many cells, a layer is expanded with a plain loop: each NumPy call costs a
+# few microseconds whatever its size, which dominates in long one-cell-wide corridors.
+SMALL_LAYER = 32
+
+
+def wavefront(flat_moves, width, sources):
+    """
+    Runs a breadth-first search from every source at once, one layer at a time. Each
+    layer is an array of flat cell indices; its neighbors are found for the four
+    directions in bulk from the move mask bits, and the cells not reached yet become
+    the next layer.
+
+    Args:
+        flat_moves (bytearray): The move mask of every cell by flat index (see `Maze.flat_moves`).
+        width (int): The width of the maze.
+        sources (list): Flat indices of the source cells.
+
+    Returns:
+        numpy.ndarray: An int32 array indexed by flat cell index, holding the number of
+                       moves from the nearest source, `UNREACHED` for unreachable cells.
+    """
+    size = len(flat_moves)
+    # The plain loop reads and writes the array, NumPy works on views of the same memory
+    dist_array = array("i", [UNREACHED]) * size
+    dist = np.frombuffer(dist_array, dtype=np.int32)
+    masks = np.frombuffer(flat_moves, dtype=np.uint8)
+    steps = ((UP, -width), (DOWN, width), (LEFT, -1), (RIGHT, 1))
+    deltas = flat_deltas(width)
+    slot = np.empty(size, dtype=np.int64)  # Scratch array used to drop duplicate cells
+
+    layer = np.unique(np.asarray(sources, dtype=np.int64))
+    dist[layer] = 0
+    d = 0
+    while len(layer):
+        d += 1
+        if len(layer) < SMALL_LAYER:
+            next_layer = []
+            for idx in layer.tolist():
+                for delta in deltas[flat_moves[idx]]:
+                    child = idx + delta
+                    if dist_array[child] == UNREACHED:
+                        dist_array[child] = d
+                        next_layer.append(child)
+            layer = np.array(next_layer, dtype=np.int64)
+            continue
+
+        layer_masks = masks[layer]
+        children = np.concatenate([layer[(layer_masks & bit) != 0] + delta for bit, delta in steps])
+        children = children[dist[children] == UNREACHED]
+        dist[children] = d
+        # A cell reached from two sides appears twice: keep its first occurrence only
+        positions = np.arange(len(children))
+        slot[children[::-1]] = positions[::-1]
+        layer = children[slot[children] == positions]
+    return dist
+
+
+def _open_sources(maze, sources):
+    """
+    Converts source cells to flat indices, checking that they are open cells of the maze.
+
+    Raises:
+        ValueError: If there is no source, or one is outside the maze or is a wall.
+    """
+    if not sources:
+        raise ValueError("At least one source cell is needed")
+    indices = []
+    for row, col in sources:
+        if not (0 <= row < maze.height and 0 <= col < maze.width) or maze.grid[row, col]:
+            raise ValueError(f"Source {(row, col)} is not an open cell of the maze")
+        indices.append(row * maze.width + col)
+    return indices
+
+
+def distance_field(maze, sources):
+    """
+    Computes the number of moves from the nearest of the source cells to every cell.
+
+    Args:
+        maze (Maze): The maze to measure.
+        sources (list): The source cells as (row, column) tuples.
+
+    Returns:
+        numpy.ndarray: A (height, width) int32 array, `UNREACHED` for walls and for
+                       cells that no source can reach.
+
+    Raises:
+        ValueError: If there is no source, or one is outside the maze or is a wall.
+    """
+    indices = _open_sources(maze, sources)
+    return wavefront(maze.flat_moves, maze.width, indices).reshape(maze.height, maze.width)
+
+
+# Shared memory attached by every worker process: the blocks, kept open for the
+# lifetime of the worker, and the views over them.
+_shared = {}
+
+
+def _attach(moves_name, fields_name, count, size, width):
+    """
+    Pool initializer: attaches the worker process to the shared move masks and
+    output fields.
+    """
+    moves = shared_memory.SharedMemory(name=moves_name)
+    fields = shared_memory.SharedMemory(name=fields_name)
+    _shared.update(
+        blocks=(moves, fields),
+        width=width,
+        moves=moves.buf[:size],
+        fields=np.ndarray((count, size), dtype=np.int32, buffer=fields.buf),
+    )
+
+
+def _fill_field(task):
+    """
+    Worker task: computes the field of one source into its row of the shared output.
+    """
+    row, source = task
+    _shared["fields"][row] = wavefront(_shared["moves"], _shared["width"], [source])
+    return row
+
+
+def distance_fields(maze, sources, workers=1):
+    """
+    Computes one distance field per source cell, optionally across a pool of processes.
+
+    In the parallel mode, the move masks are copied once into a shared memory block
+    that every worker attaches to, and each worker writes its fields straight into a
+    second shared block, so that neither the maze nor the results are pickled.
+
+    Args:
+        maze (Maze): The maze to measure.
+        sources (list): The source cells as (row, column) tuples.
+        workers (int): The number of worker processes. None uses one per CPU; 1
+                       computes the fields in the current process.
+
+    Returns:
+        numpy.ndarray: A (len(sources), height, width) int32 array, the field of every
+                       source in order, `UNREACHED` for walls and unreachable cells.
+
+    Raises:
+        ValueError: If there is no source, or one is outside the maze or is a wall.
+    """
+    indices = _open_sources(maze, sources)
+    size = maze.height * maze.width
+    shape = (len(indices), maze.height, maze.width)
+    if workers == 1 or len(indices) == 1:
+        fields = np.empty(shape, dtype=np.int32)
+        for row, source in enumerate(indices):
+            fields[row] = wavefront(maze.flat_moves, maze.width, [source]).reshape(shape[1:])
+        return fields
+
+    moves = shared_memory.SharedMemory(create=True, size=size)
+    output = shared_memory.SharedMemory(create=True, size=4 * size * len(indices))
+    try:
+        moves.buf[:size] = maze.flat_moves
+        initargs = (moves.name, output.name, len(indices), size, maze.width)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=initargs) as executor:
+            for _ in executor.map(_fill_field, enumerate(indices)):
+                pass
+        fields = np.ndarray(shape, dtype=np.int32, buffer=output.buf)
+        result = fields.copy()
+        del fields  # The block cannot be closed while a view exports it
+        return result
+    finally:
+        moves.close()
+        moves.unlink()
+        output.close()
+        output.unlink()
@@ -0,0 +1,369 @@
+from array import array
+import numpy as np
+from utils import MOVES, UP, DOWN, LEFT, RIGHT
+
+# Row and column offset of every action, used to name the moves of a rebuilt path.
+ACTIONS = {"up": (-1, 0), "down": (1, 0), "left": (0, -1), "right": (0, 1)}
+
+# Action of every move, keyed by `(row offset + 1) * 3 + column offset + 1`.
+STEP_ACTIONS = {(dr + 1) * 3 + dc + 1: action for action, (dr, dc) in ACTIONS.items()}
+
+# Sentinel g-score for cells that have not been reached yet.
+UNREACHED = 2 ** 31 - 1
+
+# Below this many cells, a BFS layer is expanded with a plain loop rather than NumPy
+# calls, whose fixed cost dominates in one-cell-wide corridors (see `distance.wavefront`).
+SMALL_LAYER = 32
+
+# Heap entries of the searches that keep a binary heap pack the priority above the
+# flat cell index in a single int, so that heap comparisons never look inside a tuple.
+INDEX_BITS = 32
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+
+def flat_deltas(width):
+    """
+    Builds, for every move mask, the flat index deltas of the moves it allows.
+
+    Args:
+        width (int): The width of the maze, used to turn row moves into flat index deltas.
+
+    Returns:
+        tuple: A 16-entry tuple indexed by move mask.
+    """
+    return tuple(tuple(dr * width + dc for _, dr, dc in MOVES[mask]) for mask in range(16))
+
+
+def manhattan_field(maze, goal, scale=1):
+    """
+    Computes the Manhattan distance from every cell to the goal in one vectorized pass.
+
+    Args:
+        maze (Maze): The maze whose cells are measured.
+        goal (tuple): The goal cell (row, column).
+        scale (int): Factor applied to every distance.
+
+    Returns:
+        array: An int32 array of distances indexed by flat cell index.
+    """
+    rows = np.abs(np.arange(maze.height, dtype=np.int32) - goal[0])
+    cols = np.abs(np.arange(maze.width, dtype=np.int32) - goal[1])
+    return array("i", ((rows[:, None] + cols[None, :]) * np.int32(scale)).tobytes())
+
+
+def flat_cells(indices, width):
+    """
+    Converts flat cell indices into a set of (row, column) states.
+
+    Args:
+        indices (numpy.ndarray): Flat cell indices.
+        width (int): The width of the maze.
+
+    Returns:
+        set: The corresponding set of (row, column) tuples.
+    """
+    rows, cols = np.divmod(indices, width)
+    return set(zip(rows.tolist(), cols.tolist()))
+
+
+def trace_parents(parent, idx, root):
+    """
+    Follows parent pointers from a cell back to the root of its search tree.
+
+    Args:
+        parent (array): Parent flat index of every reached cell.
+        idx (int): Flat index of the cell to start from.
+        root (int): Flat index of the root of the search tree.
+
+    Returns:
+        list: The flat indices from `idx` to `root`, both included.
+    """
+    path = [idx]
+    while idx != root:
+        idx = parent[idx]
+        path.append(idx)
+    return path
+
+
+def path_solution(path, width):
+    """
+    Converts a path of flat indices into the `(actions, cells)` solution format.
+
+    Args:
+        path (list): Flat indices of consecutive cells, starting with the start cell.
+        width (int): The width of the maze.
+
+    Returns:
+        tuple: A tuple (actions, cells). The start cell is not included in `cells`.
+    """
+    rows, cols = np.divmod(np.asarray(path, dtype=np.int64), width)
+    # Actions are named from row/column offsets, since index deltas are ambiguous when width is 1
+    offsets = (np.diff(rows) + 1) * 3 + np.diff(cols) + 1
+    actions = [STEP_ACTIONS[offset] for offset in offsets.tolist()]
+    return actions, list(zip(rows[1:].tolist(), cols[1:].tolist()))
+
+
+def rebuild_path(parent, start, goal, width):
+    """
+    Follows parent pointers from the goal back to the start and converts the
+    flat indices into the `(actions, cells)` solution format.
+
+    Args:
+        parent (array): Parent flat index of every reached cell.
+        start (int): Flat index of the start cell.
+        goal (int): Flat index of the goal cell.
+        width (int): The width of the maze.
+
+    Returns:
+        tuple: A tuple (actions, cells). The start cell is not included in `cells`.
+    """
+    path = trace_parents(parent, goal, start)
+    path.reverse()
+    return path_solution(path, width)
+
+
+def flat_astar(maze, g_weight=1, h_weight=1, heuristic=None, trace=None):
+    """
+    Runs a best-first search on flat cell indices (`row * width + col`), ordered by
+    `f = g_weight * g + h_weight * h` with the Manhattan heuristic `h`. The default
+    weights give A*; `(1, 0)` gives Dijkstra and `(0, 1)` gives greedy best-first search.
+    On weighted mazes, `g` sums the costs of the cells entered and `h` is scaled by the
+    cheapest cell cost, so A* and Dijkstra still return least-cost paths.
+
+    Instead of Node objects and a dictionary of heap entries, g-scores, parent
+    pointers and the closed set live in preallocated arrays and the heuristic is
+    precomputed for every cell. Priorities are small non-negative ints, so the
+    frontier is a bucket queue rather than a binary heap: a list indexed by `f`
+    whose entries are stacks of cell indices. Pushing and popping are O(1) list
+    operations; the lowest non-empty bucket is found by moving a cursor, which
+    only goes back when a push lands below it (greedy search). Within a bucket the
+    cell pushed last is expanded first, which breaks f ties towards the deeper cells,
+    that is towards the lower h. Stale entries are skipped when popped and the path
+    is only rebuilt once the goal has been reached.
+
+    Args:
+        maze (Maze): The maze to solve.
+        g_weight (int): Weight of the path cost in the priority.
+        h_weight (int): Weight of the heuristic in the priority.
+        heuristic (FieldHeuristic): A precomputed heuristic (see `heuristics`) whose field
+                                    replaces the Manhattan distance, unscaled: any non-zero
+                                    `h_weight` counts as 1. Defaults to None.
+        trace (array): An `array("i")` the flat index of every expanded cell is appended
+                       to, in expansion order, or None to record nothing. Defaults to None.
+
+    Returns:
+        tuple: A tuple (solution, closed, num_explored), where `solution` is the
+               `(actions, cells)` tuple, `closed` is a bytearray flagging the expanded
+               cells by flat index, and `num_explored` is the number of states removed
+               from the frontier (including the goal).
+
+    Raises:
+        Exception: If no solution is found, an exception is raised.
+    """
+    width = maze.width
+    size = maze.height * width
+    flat_moves = maze.flat_moves
+    costs = maze.flat_costs
+    deltas = flat_deltas(width)
+    start = maze.start[0] * width + maze.start[1]
+    goal = maze.goal[0] * width + maze.goal[1]
+    if heuristic is not None and h_weight:
+        h = heuristic.field(maze.goal)
+        if h[start] >= UNREACHED:
+            # The estimate is only infinite away from the goal's component; elsewhere every
+            # cell reached has finite estimates, so no bucket index is ever that large
+            raise Exception("No solution")
+    else:
+        # Scaling by the cheapest cell cost keeps the heuristic admissible on weighted mazes
+        h = manhattan_field(maze, maze.goal, h_weight * maze.min_cost)
+
+    g_score = array("i", [UNREACHED]) * size
+    parent = array("i", [-1]) * size
+    closed = bytearray(size)
+
+    g_score[start] = 0
+    current = h[start]  # Cursor on the lowest bucket that may be non-empty
+    buckets = [None] * current + [[start]]
+    top = len(buckets)
+    num_explored = 0
+
+    while True:
+        bucket = buckets[current]
+        if not bucket:
+            current += 1
+            if current == top:
+                break
+            continue
+        idx = bucket.pop()
+        if closed[idx]:
+            continue  # Stale entry, the cell was already expanded
+        num_explored += 1
+        if trace is not None:
+            trace.append(idx)
+        if idx == goal:
+            return rebuild_path(parent, start, goal, width), closed, num_explored
+        closed[idx] = 1
+
+        if costs is None:
+            g = g_score[idx] + 1  # Each move has a cost of 1
+            for delta in deltas[flat_moves[idx]]:
+                child = idx + delta
+                if g_score[child] <= g or closed[child]:
+                    continue
+                g_score[child] = g
+                parent[child] = idx
+                f = g * g_weight + h[child]
+                if f >= top:
+                    buckets.extend([None] * (f + 1 - top))
+                    top = f + 1
+                if buckets[f] is None:
+                    buckets[f] = [child]
+                else:
+                    buckets[f].append(child)
+                if f < current:
+                    current = f
+        else:
+            base = g_score[idx]
+            for delta in deltas[flat_moves[idx]]:
+                child = idx + delta
+                g = base + costs[child]  # Moving into a cell costs its terrain cost
+                if g_score[child] <= g or closed[child]:
+                    continue
+                g_score[child] = g
+                parent[child] = idx
+                f = g * g_weight + h[child]
+                if f >= top:
+                    buckets.extend([None] * (f + 1 - top))
+                    top = f + 1
+                if buckets[f] is None:
+                    buckets[f] = [child]
+                else:
+                    buckets[f].append(child)
+                if f < current:
+                    current = f
+
+    raise Exception("No solution")
+
+
+def flat_bfs(maze, trace=None):
+    """
+    Runs a breadth-first search on flat cell indices, one layer at a time. Each layer
+    is an array of flat indices whose neighbors are found for the four directions in
+    bulk from the move mask bits, as in `distance.wavefront`, and the parent of every
+    cell reached is kept in the same pass. The search stops as soon as the goal is
+    reached, and the path is rebuilt from the parent pointers. On unweighted mazes
+    this expands the same states as Dijkstra, at a fraction of the cost per state.
+
+    Layers of fewer than `SMALL_LAYER` cells are expanded by a plain FIFO loop instead,
+    as in the long one-cell-wide corridors of perfect mazes.
+
+    The expanded states are the layers closer to the start than the goal, then the
+    goal itself: the states a queue-based BFS removes from its frontier when the goal
+    is the first cell of its layer.
+
+    Args:
+        maze (Maze): The maze to solve. Terrain costs are ignored: every move counts 1.
+        trace (array): An `array("i")` the flat index of every expanded cell is appended
+                       to, layer by layer, or None to record nothing. Defaults to None.
+
+    Returns:
+        tuple: A tuple (solution, closed, num_explored), as returned by `flat_astar`.
+
+    Raises:
+        Exception: If no solution is found, an exception is raised.
+    """
+    width = maze.width
+    size = maze.height * width
+    flat_moves = maze.flat_moves
+    deltas = flat_deltas(width)
+    start = maze.start[0] * width + maze.start[1]
+    goal = maze.goal[0] * width + maze.goal[1]
+    # The plain loop reads and writes the array, NumPy works on views of the same memory
+    parent_array = array("i", [-1]) * size
+    parent = np.frombuffer(parent_array, dtype=np.int32)
+    masks = np.frombuffer(flat_moves, dtype=np.uint8)
+    steps = ((UP, -width), (DOWN, width), (LEFT, -1), (RIGHT, 1))
+    slot = np.empty(size, dtype=np.int64)  # Scratch array used to drop duplicate cells
+
+    parent_array[start] = start
+    layer = [start]  # A list while it is small, an array of flat indices once it grows
+    while parent_array[goal] < 0:
+        if not len(layer):
+            raise Exception("No solution")
+        if len(layer) < SMALL_LAYER:
+            # Narrow layers go through one FIFO list, which grows while it is iterated;
+            # the goal and the layer width are only checked where a new layer begins
+            queue = layer
+            end = len(queue)  # Where the next layer begins
+            pos = 0
+            for idx in queue:
+                if pos == end:
+                    if parent_array[goal] >= 0 or len(queue) - end >= SMALL_LAYER:
+                        break
+                    end = len(queue)
+                pos += 1
+                for delta in deltas[flat_moves[idx]]:
+                    child = idx + delta
+                    if parent_array[child] < 0:
+                        parent_array[child] = idx
+                        queue.append(child)
+            if trace is not None:
+                trace.extend(queue[:pos])
+            layer = queue[pos:]
+            continue
+
+        layer = np.asarray(layer, dtype=np.int64)
+        if trace is not None:
+            trace.frombytes(layer.astype(np.int32).tobytes())
+        layer_masks = masks[layer]
+        sources = [layer[(layer_masks & bit) != 0] for bit, _ in steps]
+        children = np.concatenate([cells + delta for cells, (_, delta) in zip(sources, steps)])
+        sources = np.concatenate(sources)
+        fresh = parent[children] < 0
+        children, sources = children[fresh], sources[fresh]
+        # A cell reached from two sides appears twice: keep its first occurrence only
+        positions = np.arange(len(children))
+        slot[children[::-1]] = positions[::-1]
+        first = slot[children] == positions
+        layer = children[first]
+        parent[layer] = sources[first]
+        if len(layer) < SMALL_LAYER:
+            layer = layer.tolist()
+
+    # Every cell reached was expanded, except those of the goal's layer
+    reached = parent >= 0
+    reached[np.asarray(layer, dtype=np.int64)] = False
+    reached[goal] = True
+    if trace is not None:
+        trace.append(goal)
+    closed = bytearray(reached.view(np.uint8).tobytes())
+    return rebuild_path(parent_array, start, goal, width), closed, int(np.count_nonzero(reached))
+
+
+def bfs_tree(maze, source):
+    """
+    Runs a full breadth-first search from one cell and returns its shortest-path tree.
+
+    Args:
+        maze (Maze): The maze to search.
+        source (int): Flat index of the root cell.
+
+    Returns:
+        array: The parent flat index of every cell reached (the root is its own parent),
+               and -1 for cells that cannot be reached.
+    """
+    flat_moves = maze.flat_moves
+    deltas = flat_deltas(maze.width)
+    parent = array("i", [-1]) * (maze.height * maze.width)
+    parent[source] = source
+    layer = [source]
+    while layer:
+        next_layer = []
+        for idx in layer:
+            for delta in deltas[flat_moves[idx]]:
+                child = idx + delta
+                if parent[child] < 0:
+                    parent[child] = idx
+                    next_layer.append(child)
+        layer = next_layer
+    return parent
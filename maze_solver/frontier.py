@@ -1,4 +1,5 @@
 import heapq
+from collections import deque
 from node import Node
 
 class Frontier():
@@ -7,8 +8,12 @@ class Frontier():
     nodes that need to be explored. It provides basic operations such as adding a node, checking 
     if a state exists in the frontier, and checking if the frontier is empty.
 
+    Nodes are kept in a deque, so that both ends can be pushed and popped in O(1), and
+    their states are mirrored in a set, so that membership checks are O(1) as well.
+
     Attributes:
-        frontier (list): A list that holds nodes (objects of the Node class) to be explored.
+        frontier (deque): A deque that holds nodes (objects of the Node class) to be explored.
+        states (set): The states of the nodes currently in the frontier.
 
     Methods:
         add(node): Adds a new node to the frontier.
@@ -18,12 +23,13 @@ class Frontier():
 
     def __init__(self):
         """
-        Initializes the frontier as an empty list.
+        Initializes the frontier as an empty deque.
 
         Example:
             frontier = Frontier()
         """
-        self.frontier = []  # The frontier is initialized as an empty list.
+        self.frontier = deque()  # The frontier is initialized as an empty deque.
+        self.states = set()  # States of the nodes in the frontier, for O(1) membership checks.
 
     def add(self, node):
         """
@@ -35,7 +41,8 @@ class Frontier():
         Example:
             frontier.add(Node(state=(0, 0), parent=None, action="start"))
         """
-        self.frontier.append(node)  # Adds the node to the list of frontier nodes.
+        self.frontier.append(node)  # Adds the node to the deque of frontier nodes.
+        self.states.add(node.state)  # Records its state for membership checks.
 
     def contains_state(self, state):
         """
@@ -50,7 +57,7 @@ class Frontier():
         Example:
             frontier.contains_state((1, 2))
         """
-        return any(node.state == state for node in self.frontier)  # Checks for the state in the frontier.
+        return state in self.states  # Checks for the state in the frontier.
 
     def empty(self):
         """
@@ -64,6 +71,15 @@ class Frontier():
         """
         return len(self.frontier) == 0  # Returns True if the frontier has no nodes.
 
+    def __len__(self):
+        """
+        Returns the number of nodes in the frontier.
+
+        Returns:
+            int: The number of nodes in the frontier.
+        """
+        return len(self.states)
+
 
 class StackFrontier(Frontier):
     """
@@ -90,8 +106,8 @@ class StackFrontier(Frontier):
         if self.empty():
             raise Exception("empty frontier")  # Raises an error if the frontier is empty.
         else:
-            node = self.frontier[-1]  # Gets the last node.
-            self.frontier = self.frontier[:-1]  # Removes the last node from the frontier.
+            node = self.frontier.pop()  # Removes the last node from the frontier.
+            self.states.discard(node.state)  # Forgets its state.
             return node  # Returns the node.
 
 
@@ -120,8 +136,8 @@ class QueueFrontier(Frontier):
         if self.empty():
             raise Exception("empty frontier")  # Raises an error if the frontier is empty.
         else:
-            node = self.frontier[0]  # Gets the first node.
-            self.frontier = self.frontier[1:]  # Removes the first node from the frontier.
+            node = self.frontier.popleft()  # Removes the first node from the frontier.
+            self.states.discard(node.state)  # Forgets its state.
             return node  # Returns the node.
         
 class AStarFrontier(Frontier):
@@ -129,9 +145,13 @@ class AStarFrontier(Frontier):
     A subclass of Frontier that implements an A* search algorithm frontier,
     where nodes are added and removed based on the lowest cost (f = g + h).
 
+    Adding a node whose state is already in the frontier replaces it (decrease-key):
+    the old heap entry is marked as removed and skipped when it reaches the top.
+
     Methods:
-        add(node, cost): Adds a node to the frontier with a given cost.
+        add(node, cost): Adds a node to the frontier with a given cost, replacing any node with the same state.
         remove(): Removes and returns the node with the lowest cost.
+        cost(state): Returns the cost of the node with a given state.
     """
 
     def __init__(self):
@@ -139,20 +159,22 @@ class AStarFrontier(Frontier):
         Initializes the A* frontier as an empty priority queue.
         """
         super().__init__()
-        self.frontier = []
-        self.entry_finder = {}  # Mapping of nodes to entries
+        self.frontier = []  # Heap of [cost, counter, node] entries
+        self.entry_finder = {}  # Mapping of states to live entries
         self.counter = 0  # Unique sequence count
 
     def add(self, node, cost):
         """
-        Adds a node to the frontier with a given cost.
+        Adds a node to the frontier with a given cost. If a node with the same state
+        is already in the frontier, it is replaced.
 
         Args:
             node (Node): The node to be added to the frontier.
             cost (float): The cost associated with the node (f = g + h).
         """
-        if node.state in self.entry_finder:
-            self.remove(node)
+        old = self.entry_finder.pop(node.state, None)
+        if old is not None:
+            old[-1] = None  # Mark the replaced entry as removed
         entry = [cost, self.counter, node]
         self.entry_finder[node.state] = entry
         heapq.heappush(self.frontier, entry)
@@ -170,11 +192,23 @@ class AStarFrontier(Frontier):
         """
         while self.frontier:
             cost, _, node = heapq.heappop(self.frontier)
-            if node.state in self.entry_finder:
+            if node is not None:  # Skip entries replaced by a lower cost
                 del self.entry_finder[node.state]
                 return node
         raise Exception("empty frontier")
 
+    def cost(self, state):
+        """
+        Returns the cost of the node with a given state.
+
+        Args:
+            state (tuple): A state in the frontier.
+
+        Returns:
+            float: The cost the node was added with.
+        """
+        return self.entry_finder[state][0]
+
     def contains_state(self, state):
         """
         Checks if the frontier contains a node with a given state.
@@ -185,4 +219,22 @@ class AStarFrontier(Frontier):
         Returns:
             bool: True if the frontier contains a node with the state, False otherwise.
         """
-        return state in self.entry_finder
\ No newline at end of file
+        return state in self.entry_finder
+
+    def empty(self):
+        """
+        Checks if the frontier is empty. Only live entries are counted.
+
+        Returns:
+            bool: True if the frontier is empty, False otherwise.
+        """
+        return not self.entry_finder
+
+    def __len__(self):
+        """
+        Returns the number of live nodes in the frontier, without stale heap entries.
+
+        Returns:
+            int: The number of nodes in the frontier.
+        """
+        return len(self.entry_finder)
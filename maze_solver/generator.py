@@ -0,0 +1,227 @@
+import random
+import numpy as np
+
+# Maze generators by name. Each one takes (size, seed) and returns (grid, start, goal)
+# for a size x size maze, where grid is a uint8 array with 1 for walls. The same size
+# and seed always give the same maze.
+GENERATORS = {}
+
+# Smallest size each generator accepts, by name.
+MIN_SIZES = {}
+
+
+def generator(name, min_size=3):
+    """
+    Registers a maze generator function under a name in `GENERATORS`.
+
+    Args:
+        name (str): The name of the generator.
+        min_size (int): The smallest size for which the start and goal differ.
+
+    Returns:
+        callable: A decorator returning the function unchanged.
+    """
+    def register(func):
+        GENERATORS[name] = func
+        MIN_SIZES[name] = min_size
+        return func
+    return register
+
+
+def generate(kind, size, seed=0):
+    """
+    Generates a maze.
+
+    Args:
+        kind (str): The generator to use, one of `GENERATORS`.
+        size (int): The number of rows and columns of the maze.
+        seed (int): The random seed.
+
+    Returns:
+        tuple: (grid, start, goal), where `grid` is a (size, size) uint8 array with 1 for
+               walls and `start` and `goal` are (row, column) tuples.
+
+    Raises:
+        ValueError: If the generator is unknown or the size is too small.
+    """
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown maze generator '{kind}', expected one of {sorted(GENERATORS)}")
+    if size < MIN_SIZES[kind]:
+        raise ValueError(f"The {kind} generator needs a size of at least {MIN_SIZES[kind]}, got {size}")
+    return GENERATORS[kind](size, seed)
+
+
+def _carved(size, carved):
+    """
+    Builds the wall grid of a perfect maze from its carved cells. Sizes below 5 have a
+    single passage cell, so the perfect-maze generators are registered with a minimum
+    size of 5.
+
+    Args:
+        size (int): The number of rows and columns of the maze.
+        carved (bytearray): 0 for every carved cell of the flat grid, 1 elsewhere.
+
+    Returns:
+        tuple: (grid, start, goal), with the start and goal in opposite corners.
+    """
+    grid = np.frombuffer(carved, dtype=np.uint8).reshape(size, size).copy()
+    last = 2 * ((size - 1) // 2) - 1  # Row and column of the last passage cell
+    return grid, (1, 1), (last, last)
+
+
+@generator("backtracker", min_size=5)
+def recursive_backtracker(size, seed):
+    """
+    Generates a perfect maze with the recursive backtracker (randomized depth-first
+    search), which gives long, winding corridors with few branches.
+
+    Passages are on odd rows and columns, and walls are carved between them.
+
+    Args:
+        size (int): The number of rows and columns of the maze.
+        seed (int): The random seed.
+
+    Returns:
+        tuple: (grid, start, goal), as for `generate`.
+    """
+    rng = random.Random(seed)
+    cells = (size - 1) // 2  # Passage cells per row and column
+    carved = bytearray(b"\x01") * (size * size)
+    visited = bytearray(cells * cells)
+
+    visited[0] = 1
+    carved[size + 1] = 0
+    stack = [0]
+    while stack:
+        cell = stack[-1]
+        row, col = divmod(cell, cells)
+        choices = []
+        if row > 0 and not visited[cell - cells]:
+            choices.append(cell - cells)
+        if row < cells - 1 and not visited[cell + cells]:
+            choices.append(cell + cells)
+        if col > 0 and not visited[cell - 1]:
+            choices.append(cell - 1)
+        if col < cells - 1 and not visited[cell + 1]:
+            choices.append(cell + 1)
+        if not choices:
+            stack.pop()
+            continue
+        nxt = choices[rng.randrange(len(choices))]
+        visited[nxt] = 1
+        next_row, next_col = divmod(nxt, cells)
+        # Carve the next cell and the wall between both cells
+        carved[(2 * next_row + 1) * size + 2 * next_col + 1] = 0
+        carved[(row + next_row + 1) * size + col + next_col + 1] = 0
+        stack.append(nxt)
+    return _carved(size, carved)
+
+
+@generator("prim", min_size=5)
+def prim(size, seed):
+    """
+    Generates a perfect maze with randomized Prim's algorithm, which grows the maze
+    from random frontier cells and gives many short dead ends.
+
+    Args:
+        size (int): The number of rows and columns of the maze.
+        seed (int): The random seed.
+
+    Returns:
+        tuple: (grid, start, goal), as for `generate`.
+    """
+    rng = random.Random(seed)
+    cells = (size - 1) // 2
+    carved = bytearray(b"\x01") * (size * size)
+    state = bytearray(cells * cells)  # 0 outside, 1 frontier, 2 in the maze
+
+    def neighbors(cell):
+        row, col = divmod(cell, cells)
+        if row > 0:
+            yield cell - cells
+        if row < cells - 1:
+            yield cell + cells
+        if col > 0:
+            yield cell - 1
+        if col < cells - 1:
+            yield cell + 1
+
+    state[0] = 2
+    carved[size + 1] = 0
+    frontier = list(neighbors(0))
+    for cell in frontier:
+        state[cell] = 1
+    while frontier:
+        # Take a random frontier cell (swap with the last one and pop)
+        i = rng.randrange(len(frontier))
+        frontier[i], frontier[-1] = frontier[-1], frontier[i]
+        cell = frontier.pop()
+        inside = [n for n in neighbors(cell) if state[n] == 2]
+        other = inside[rng.randrange(len(inside))]
+        row, col = divmod(cell, cells)
+        other_row, other_col = divmod(other, cells)
+        carved[(2 * row + 1) * size + 2 * col + 1] = 0
+        carved[(row + other_row + 1) * size + col + other_col + 1] = 0
+        state[cell] = 2
+        for n in neighbors(cell):
+            if state[n] == 0:
+                state[n] = 1
+                frontier.append(n)
+    return _carved(size, carved)
+
+
+@generator("rooms")
+def open_rooms(size, seed, room=12):
+    """
+    Generates a grid of open rooms separated by one-cell walls, with one door at a
+    random position in every wall between two neighboring rooms.
+
+    Args:
+        size (int): The number of rows and columns of the maze.
+        seed (int): The random seed.
+        room (int): The distance between two parallel walls.
+
+    Returns:
+        tuple: (grid, start, goal), with the start and goal in opposite corners.
+    """
+    rng = np.random.default_rng(seed)
+    grid = np.zeros((size, size), dtype=np.uint8)
+    lines = np.arange(room, size - 1, room)  # Wall rows, and wall columns
+    grid[lines, :] = 1
+    grid[:, lines] = 1
+
+    # Spans of open cells between consecutive wall lines
+    span_starts = np.concatenate(([0], lines + 1))
+    span_ends = np.concatenate((lines, [size]))
+    for line in lines:
+        doors = span_starts + rng.integers(0, span_ends - span_starts)
+        grid[line, doors] = 0  # Doors in a wall row, one per room column
+        doors = span_starts + rng.integers(0, span_ends - span_starts)
+        grid[doors, line] = 0  # Doors in a wall column, one per room row
+    return grid, (0, 0), (size - 1, size - 1)
+
+
+@generator("obstacles")
+def random_obstacles(size, seed, density=0.3):
+    """
+    Generates an open grid with randomly placed wall cells. A random monotone path
+    from the top-left to the bottom-right corner is kept open, so the maze always
+    has a solution.
+
+    Args:
+        size (int): The number of rows and columns of the maze.
+        seed (int): The random seed.
+        density (float): The probability of a cell being a wall.
+
+    Returns:
+        tuple: (grid, start, goal), with the start and goal in opposite corners.
+    """
+    rng = np.random.default_rng(seed)
+    grid = (rng.random((size, size)) < density).astype(np.uint8)
+
+    # Shuffle the down and right steps of a corner-to-corner path and carve it
+    steps = rng.permutation(np.repeat([0, 1], size - 1))  # 0: down, 1: right
+    cols = np.concatenate(([0], np.cumsum(steps)))
+    rows = np.arange(len(cols)) - cols
+    grid[rows, cols] = 0
+    return grid, (0, 0), (size - 1, size - 1)
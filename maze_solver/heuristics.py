@@ -0,0 +1,372 @@
+from abc import ABC, abstractmethod
+from array import array
+from heapq import heappush, heappop
+import numpy as np
+from flat_search import INDEX_BITS, INDEX_MASK, UNREACHED, flat_deltas
+from mazefile import fingerprint
+from distance import wavefront
+
+# Precomputed heuristics that are much tighter than the Manhattan distance in winding
+# mazes. Both answer from a per-goal field of estimates, one int per cell, so that the
+# flat engine can use the field directly and the node engine can look states up in it.
+
+
+def distances_from(maze, source):
+    """
+    Computes the cost of the cheapest path from one cell to every cell: breadth-first
+    search on unweighted mazes (the NumPy `wavefront` of `distance`), Dijkstra's
+    algorithm on weighted ones.
+
+    Args:
+        maze (Maze): The maze to measure.
+        source (int): Flat index of the source cell.
+
+    Returns:
+        numpy.ndarray: An int32 array of path costs indexed by flat cell index,
+                       `UNREACHED` for cells that cannot be reached.
+    """
+    costs = maze.flat_costs
+    if costs is None:
+        return wavefront(maze.flat_moves, maze.width, [source])
+
+    flat_moves = maze.flat_moves
+    deltas = flat_deltas(maze.width)
+    dist = array("i", [UNREACHED]) * (maze.height * maze.width)
+    dist[source] = 0
+    heap = [source]  # Entries pack the cost above the flat index
+    while heap:
+        entry = heappop(heap)
+        d, idx = entry >> INDEX_BITS, entry & INDEX_MASK
+        if d > dist[idx]:
+            continue  # Stale entry
+        for delta in deltas[flat_moves[idx]]:
+            child = idx + delta
+            cost = d + costs[child]
+            if cost < dist[child]:
+                dist[child] = cost
+                heappush(heap, (cost << INDEX_BITS) | child)
+    return np.frombuffer(dist, dtype=np.int32).copy()
+
+
+def _compact(dist, dtype=None):
+    """
+    Stores distances in the smallest unsigned type that holds them, with the type's
+    maximum value marking unreachable cells.
+
+    Args:
+        dist (numpy.ndarray): int32 distances, `UNREACHED` for unreachable cells.
+        dtype (numpy.dtype): The type to use. Defaults to uint16 when it can hold every
+                             distance, and uint32 otherwise.
+
+    Returns:
+        numpy.ndarray: The distances as uint16 or uint32.
+    """
+    reached = dist != UNREACHED
+    if dtype is None:
+        small = not reached.any() or dist[reached].max() < np.iinfo(np.uint16).max
+        dtype = np.uint16 if small else np.uint32
+    return np.where(reached, dist, np.iinfo(dtype).max).astype(dtype)
+
+
+def _expand(table):
+    """
+    Converts a compact distance table back to int32, with `UNREACHED` for unreachable cells.
+    """
+    dist = table.astype(np.int32)
+    dist[table == np.iinfo(table.dtype).max] = UNREACHED
+    return dist
+
+
+class FieldHeuristic(ABC):
+    """
+    Abstract base class of the precomputed heuristics. A heuristic is called like
+    `utils.manhattan_distance`, as `heuristic(state, goal)`, and also provides the whole
+    field of estimates for a goal (`field`), which the flat engine uses directly. The
+    field of the last goal is cached.
+
+    The heuristic registers itself in `maze.listeners`: once a wall changes, its tables
+    no longer bound the real distances, and using it raises a ValueError until it is
+    built again.
+
+    Attributes:
+        maze (Maze): The maze the heuristic was computed for.
+        fingerprint (str): The hash of the maze walls and costs, checked when loading.
+        stale (bool): Whether a wall changed since the heuristic was computed.
+
+    Methods:
+        field(goal): Returns the estimated cost to the goal of every cell.
+        save(filename): Writes the precomputed tables to a compressed .npz file.
+        detach(): Stops listening to the maze's wall changes.
+    """
+
+    def __init__(self, maze):
+        """
+        Initializes the shared state and registers the wall-change listener.
+
+        Args:
+            maze (Maze): The maze the heuristic is computed for.
+        """
+        self.maze = maze
+        self.fingerprint = fingerprint(maze)
+        self.stale = False
+        self._goal = None
+        self._field = None
+        maze.listeners.append(self._on_wall_change)
+
+    def _on_wall_change(self, row, col, wall):
+        """
+        Marks the tables as outdated.
+        """
+        self.stale = True
+        self._goal = self._field = None
+
+    def detach(self):
+        """
+        Stops listening to the maze's wall changes.
+        """
+        self.maze.listeners.remove(self._on_wall_change)
+
+    def field(self, goal):
+        """
+        Returns the estimated cost from every cell to a goal.
+
+        Args:
+            goal (tuple): The goal cell (row, column).
+
+        Returns:
+            array: An int32 array of estimates indexed by flat cell index.
+
+        Raises:
+            ValueError: If the walls changed since the heuristic was computed.
+        """
+        if self.stale:
+            raise ValueError(f"{type(self).__name__} was computed before the walls changed, build it again")
+        if goal != self._goal:
+            self._field = array("i", self._compute_field(goal[0] * self.maze.width + goal[1]).tobytes())
+            self._goal = goal
+        return self._field
+
+    def __call__(self, state, goal):
+        """
+        Estimates the cost from a cell to the goal, with the interface of `manhattan_distance`.
+
+        Args:
+            state (tuple): The cell (row, column).
+            goal (tuple): The goal cell (row, column).
+
+        Returns:
+            int: The estimated cost.
+        """
+        field = self._field if goal == self._goal else self.field(goal)
+        return field[state[0] * self.maze.width + state[1]]
+
+    @abstractmethod
+    def _compute_field(self, goal):
+        """
+        Computes the field of a goal given by flat index, as an int32 NumPy array.
+        Subclasses implement it from their precomputed tables.
+        """
+
+    @classmethod
+    def _check(cls, data, filename, maze):
+        """
+        Checks that saved tables are of this kind and match the maze.
+
+        Raises:
+            ValueError: If the file holds another kind of heuristic or was computed for another maze.
+        """
+        if str(data["kind"]) != cls.__name__:
+            raise ValueError(f"'{filename}' holds a {data['kind']}, not a {cls.__name__}")
+        if str(data["fingerprint"]) != fingerprint(maze):
+            raise ValueError(f"Heuristic '{filename}' was computed for a different maze")
+
+
+class DistanceField(FieldHeuristic):
+    """
+    The exact cost from every cell to one fixed goal, computed with a single search
+    from the goal. With it, A* only expands cells that lie on a shortest path (and
+    ties between them).
+
+    Attributes:
+        goal (tuple): The goal cell the distances lead to.
+        distances (numpy.ndarray): A compact (height, width) uint16 or uint32 array of
+                                   costs from the goal, the type's maximum for unreachable cells.
+    """
+
+    def __init__(self, maze, goal=None, distances=None):
+        """
+        Computes the distance field, or wraps one loaded by `load`.
+
+        Args:
+            maze (Maze): The maze to measure.
+            goal (tuple): The goal cell (row, column). Defaults to `maze.goal`.
+            distances (numpy.ndarray): Precomputed compact distances. Defaults to None,
+                                       which computes them.
+        """
+        super().__init__(maze)
+        self.goal = tuple(goal) if goal is not None else maze.goal
+        if distances is None:
+            dist = distances_from(maze, self.goal[0] * maze.width + self.goal[1])
+            distances = _compact(dist).reshape(maze.height, maze.width)
+        self.distances = distances
+
+    def _compute_field(self, goal):
+        """
+        Converts the distances from the goal into costs to the goal.
+
+        Raises:
+            ValueError: If `goal` is not the goal of the field.
+        """
+        if goal != self.goal[0] * self.maze.width + self.goal[1]:
+            raise ValueError(f"The distance field leads to {self.goal}, not to {divmod(goal, self.maze.width)}")
+        dist = _expand(self.distances.ravel())
+        costs = self.maze.costs
+        if costs is not None:
+            # A path into the goal pays for the goal but not for the cell it leaves
+            reached = dist != UNREACHED
+            dist[reached] += int(costs.flat[goal]) - costs.ravel()[reached].astype(np.int32)
+        return dist
+
+    def save(self, filename):
+        """
+        Writes the field to a compressed NumPy .npz file.
+
+        Args:
+            filename (str): The path of the file to write.
+        """
+        np.savez_compressed(filename, kind=np.array(type(self).__name__), fingerprint=np.array(self.fingerprint),
+                            goal=np.array(self.goal, dtype=np.int64), distances=self.distances)
+
+    @classmethod
+    def load(cls, filename, maze):
+        """
+        Reads a field written by `save` and checks that it matches the maze.
+
+        Args:
+            filename (str): The path of the file to read.
+            maze (Maze): The maze the field is used with.
+
+        Returns:
+            DistanceField: The loaded field.
+
+        Raises:
+            ValueError: If the file holds another heuristic or was computed for a different maze.
+        """
+        with np.load(filename) as data:
+            cls._check(data, filename, maze)
+            return cls(maze, goal=tuple(int(v) for v in data["goal"]), distances=data["distances"])
+
+
+class LandmarkHeuristic(FieldHeuristic):
+    """
+    The ALT heuristic (A*, landmarks, triangle inequality). The exact costs from a few
+    landmark cells to every cell are precomputed, and the cost from a cell to any goal
+    is bounded from below by the triangle inequality through each landmark: the path
+    from the landmark to the goal is at most as long as the path through the cell.
+
+    Landmarks are picked by farthest-point selection, each one being the cell farthest
+    from the landmarks already chosen, which spreads them towards the ends of the maze
+    where their bounds are tightest.
+
+    Attributes:
+        landmarks (list): The landmark cells, as (row, column) tuples.
+        tables (numpy.ndarray): A compact (landmarks, height, width) uint16 or uint32 array
+                                of costs from every landmark, the type's maximum for
+                                unreachable cells.
+    """
+
+    def __init__(self, maze, num_landmarks=8, seed=None, landmarks=None, tables=None):
+        """
+        Picks the landmarks and computes their tables, or wraps tables loaded by `load`.
+
+        Args:
+            maze (Maze): The maze to measure.
+            num_landmarks (int): The number of landmarks to pick.
+            seed (tuple): The cell the selection starts from; the first landmark is the
+                          cell farthest from it. Defaults to `maze.start`. Landmarks are
+                          picked among the cells connected to it.
+            landmarks (list): Precomputed landmark cells. Defaults to None.
+            tables (numpy.ndarray): Precomputed compact tables. Defaults to None.
+
+        Raises:
+            ValueError: If `num_landmarks` is below 1.
+        """
+        super().__init__(maze)
+        if tables is not None:
+            self.landmarks, self.tables = [tuple(cell) for cell in landmarks], tables
+            return
+        if num_landmarks < 1:
+            raise ValueError("num_landmarks must be at least 1")
+
+        width = maze.width
+        seed = seed if seed is not None else maze.start
+        nearest = distances_from(maze, seed[0] * width + seed[1]).astype(np.int64)
+        nearest[nearest == UNREACHED] = -1  # Never pick cells outside the seed's component
+        self.landmarks, tables = [], []
+        for _ in range(num_landmarks):
+            landmark = int(nearest.argmax())
+            if nearest[landmark] <= 0 and self.landmarks:
+                break  # Every reachable cell is already a landmark
+            dist = distances_from(maze, landmark)
+            self.landmarks.append(divmod(landmark, width))
+            tables.append(_compact(dist).reshape(maze.height, width))
+            np.minimum(nearest, np.where(dist == UNREACHED, -1, dist), out=nearest)
+        if any(table.dtype == np.uint32 for table in tables):
+            tables = [_compact(_expand(table), np.uint32) for table in tables]
+        self.tables = np.stack(tables)
+
+    def _compute_field(self, goal):
+        """
+        Takes, for every cell, the best lower bound over all landmarks:
+        d(cell, goal) >= d(L, goal) - d(L, cell), and d(cell, goal) >= d(cell, L) - d(goal, L).
+        """
+        costs = self.maze.costs
+        if costs is not None:
+            cell_costs = costs.ravel().astype(np.int32)
+            goal_cost = int(cell_costs[goal])
+        field = np.zeros(self.maze.height * self.maze.width, dtype=np.int32)
+        for table in self.tables:
+            dist = _expand(table.ravel())
+            to_goal = int(dist[goal])
+            if to_goal == UNREACHED:
+                continue  # The landmark says nothing about this goal
+            reached = dist != UNREACHED
+            bound = to_goal - dist
+            if costs is None:
+                np.abs(bound, out=bound)
+            else:
+                # Costs from a cell to the landmark differ from the costs the other way
+                # by the costs of the two end cells
+                np.maximum(bound, dist - to_goal + goal_cost - cell_costs, out=bound)
+            bound[~reached] = 0
+            np.maximum(field, bound, out=field)
+        return field
+
+    def save(self, filename):
+        """
+        Writes the landmarks and their tables to a compressed NumPy .npz file.
+
+        Args:
+            filename (str): The path of the file to write.
+        """
+        np.savez_compressed(filename, kind=np.array(type(self).__name__), fingerprint=np.array(self.fingerprint),
+                            landmarks=np.array(self.landmarks, dtype=np.int64).reshape(-1, 2), tables=self.tables)
+
+    @classmethod
+    def load(cls, filename, maze):
+        """
+        Reads landmarks written by `save` and checks that they match the maze.
+
+        Args:
+            filename (str): The path of the file to read.
+            maze (Maze): The maze the heuristic is used with.
+
+        Returns:
+            LandmarkHeuristic: The loaded heuristic.
+
+        Raises:
+            ValueError: If the file holds another heuristic or was computed for a different maze.
+        """
+        with np.load(filename) as data:
+            cls._check(data, filename, maze)
+            return cls(maze, landmarks=data["landmarks"].tolist(), tables=data["tables"])
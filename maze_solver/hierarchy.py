@@ -0,0 +1,418 @@
+from heapq import heappush, heappop
+import numpy as np
+from flat_search import INDEX_BITS, INDEX_MASK, UNREACHED, path_solution
+from distance import wavefront
+from utils import UP, DOWN, LEFT, RIGHT
+
+# Default side of the square clusters, in cells.
+DEFAULT_CLUSTER_SIZE = 32
+
+# A uint64 word with every bit set.
+UNMASKED = (1 << 64) - 1
+
+# Entrances at least this long get a transition at both ends instead of one in the middle.
+LONG_ENTRANCE = 6
+
+
+class ClusterGraph:
+    """
+    A hierarchical abstraction of a maze for HPA* (hierarchical path-finding A*).
+
+    The grid is split into square clusters of `cluster_size` cells. Along every border
+    between two clusters, each run of cells that are open on both sides is an entrance,
+    crossed by one transition in its middle, or by one at each end when it is long.
+    The cells of the transitions are the nodes of an abstract graph: transitions join
+    the two sides of a border with a move of cost 1, and the nodes of a cluster are
+    joined by their shortest distance inside the cluster.
+
+    Queries run A* on the abstract graph and only refine the segments of the chosen
+    route into cells, with a breadth-first search inside one cluster each. The path is
+    valid but not always the shortest, since it has to go through transition cells.
+
+    The distances inside a cluster are computed the first time a query reaches it (or
+    by `precompute`) and cached per cluster. The graph registers itself in
+    `maze.listeners`: a wall change only drops the cache of its own cluster, and, when
+    the cell lies on a border and the transitions of that border changed, the cache of
+    the cluster on the other side.
+
+    Attributes:
+        maze (Maze): The maze the graph is built on.
+        cluster_size (int): The side of the clusters, in cells.
+        transitions (dict): Border key -> list of (cell, cell across) flat index pairs.
+                            Keys are ("v", row block, column block) for the border on the
+                            left of a cluster and ("h", row block, column block) for the
+                            border above it.
+        links (dict): Transition cell -> list of the cells across its borders.
+        edges (dict): Cluster (row block, column block) -> {node: [(node, distance)]}, the
+                      cached distances between the nodes of each cluster.
+        clusters_built (int): The number of cluster distance tables computed so far.
+
+    Methods:
+        search(start, goal): Finds a path between two cells.
+        precompute(): Computes the distance tables of every cluster.
+        detach(): Stops listening to the maze's wall changes.
+    """
+
+    def __init__(self, maze, cluster_size=DEFAULT_CLUSTER_SIZE):
+        """
+        Finds the transitions on every cluster border of a maze. The distances inside
+        the clusters are computed on demand.
+
+        Args:
+            maze (Maze): The maze to abstract.
+            cluster_size (int): The side of the clusters, in cells.
+
+        Raises:
+            ValueError: If `cluster_size` is below 2, or the maze has terrain costs.
+        """
+        if cluster_size < 2:
+            raise ValueError("cluster_size must be at least 2")
+        if maze.weighted:
+            raise ValueError("Hierarchical search does not support weighted mazes")
+        self.maze = maze
+        self.cluster_size = cluster_size
+        self.width = maze.width
+        self.row_blocks = -(-maze.height // cluster_size)
+        self.col_blocks = -(-maze.width // cluster_size)
+        self.transitions = {}
+        self.links = {}
+        self.edges = {}
+        self.clusters_built = 0
+
+        for rb in range(self.row_blocks):
+            for cb in range(self.col_blocks):
+                for key in self._borders((rb, cb))[:2]:  # Left and top: each border once
+                    if key is not None:
+                        self._scan_border(key)
+        maze.listeners.append(self._on_wall_change)
+
+    def detach(self):
+        """
+        Stops listening to the maze's wall changes. The graph must not be used afterwards.
+        """
+        self.maze.listeners.remove(self._on_wall_change)
+
+    def _cluster_of(self, idx):
+        """
+        Returns the (row block, column block) of the cluster holding a flat cell index.
+        """
+        row, col = divmod(idx, self.width)
+        return row // self.cluster_size, col // self.cluster_size
+
+    def _bounds(self, cluster):
+        """
+        Returns the (first row, end row, first column, end column) of a cluster.
+        """
+        rb, cb = cluster
+        size = self.cluster_size
+        return (rb * size, min((rb + 1) * size, self.maze.height),
+                cb * size, min((cb + 1) * size, self.width))
+
+    def _borders(self, cluster):
+        """
+        Returns the keys of the left, top, right and bottom borders of a cluster, with
+        None on the sides of the maze.
+        """
+        rb, cb = cluster
+        return (("v", rb, cb) if cb > 0 else None,
+                ("h", rb, cb) if rb > 0 else None,
+                ("v", rb, cb + 1) if cb + 1 < self.col_blocks else None,
+                ("h", rb + 1, cb) if rb + 1 < self.row_blocks else None)
+
+    def _scan_border(self, key):
+        """
+        Finds the entrances of one border and replaces its transitions.
+
+        Args:
+            key (tuple): The border key.
+
+        Returns:
+            bool: Whether the transitions of the border changed.
+        """
+        kind, rb, cb = key
+        grid, width = self.maze.grid, self.width
+        if kind == "v":
+            # Cells on both sides of column cb * size, for the rows of the cluster
+            first, end, _, _ = self._bounds((rb, cb))
+            col = cb * self.cluster_size
+            pairs = (grid[first:end, col - 1] == 0) & (grid[first:end, col] == 0)
+            cell = lambda i: ((first + i) * width + col - 1, (first + i) * width + col)
+        else:
+            _, _, first, end = self._bounds((rb, cb))
+            row = rb * self.cluster_size
+            pairs = (grid[row - 1, first:end] == 0) & (grid[row, first:end] == 0)
+            cell = lambda i: ((row - 1) * width + first + i, row * width + first + i)
+
+        # Runs of open pairs: +1 where a run starts, -1 just after it ends
+        steps = np.diff(np.concatenate(([0], pairs.view(np.int8), [0])))
+        found = []
+        for begin, stop in zip(np.flatnonzero(steps == 1).tolist(), np.flatnonzero(steps == -1).tolist()):
+            if stop - begin < LONG_ENTRANCE:
+                found.append(cell((begin + stop - 1) // 2))
+            else:
+                found.append(cell(begin))
+                found.append(cell(stop - 1))
+
+        old = self.transitions.get(key)
+        if found == old:
+            return False
+        old = old or []
+        for a, b in old:
+            self.links[a].remove(b)
+            self.links[b].remove(a)
+        for a, b in found:
+            self.links.setdefault(a, []).append(b)
+            self.links.setdefault(b, []).append(a)
+        for a, b in old:
+            for cell_idx in (a, b):
+                if cell_idx in self.links and not self.links[cell_idx]:
+                    del self.links[cell_idx]
+        self.transitions[key] = found
+        return True
+
+    def _nodes(self, cluster):
+        """
+        Returns the transition cells inside a cluster.
+        """
+        nodes = []
+        left, top, right, bottom = self._borders(cluster)
+        # Transitions are (cell before the border, cell after it)
+        for key, side in ((left, 1), (top, 1), (right, 0), (bottom, 0)):
+            if key is not None:
+                nodes.extend(pair[side] for pair in self.transitions[key])
+        return list(dict.fromkeys(nodes))  # A corner cell can cross two borders
+
+    def _local_moves(self, cluster):
+        """
+        Returns the move masks of a cluster, cut off at its borders, as a
+        (rows, columns) uint8 array, with the cluster bounds.
+        """
+        first_row, end_row, first_col, end_col = bounds = self._bounds(cluster)
+        masks = self.maze.moves[first_row:end_row, first_col:end_col].copy()
+        masks[0, :] &= ~np.uint8(UP)
+        masks[-1, :] &= ~np.uint8(DOWN)
+        masks[:, 0] &= ~np.uint8(LEFT)
+        masks[:, -1] &= ~np.uint8(RIGHT)
+        return masks, bounds
+
+    def _distances(self, cluster, source):
+        """
+        Runs a breadth-first search from a cell without leaving its cluster.
+
+        Args:
+            cluster (tuple): The cluster of the cell.
+            source (int): Flat index of the cell.
+
+        Returns:
+            function: Maps a flat cell index of the cluster to its distance from the
+                      source, `UNREACHED` if it cannot be reached inside the cluster.
+        """
+        masks, (first_row, _, first_col, end_col) = self._local_moves(cluster)
+        local_width = end_col - first_col
+        row, col = divmod(source, self.width)
+        dist = wavefront(bytearray(masks.tobytes()), local_width,
+                         [(row - first_row) * local_width + col - first_col])
+
+        def distance(idx):
+            r, c = divmod(idx, self.width)
+            return int(dist[(r - first_row) * local_width + c - first_col])
+        return distance
+
+    def _cluster_edges(self, cluster):
+        """
+        Returns the distances between the nodes of a cluster, computing and caching them
+        if needed.
+
+        The breadth-first searches from all the nodes run together, bit-parallel: every
+        cell holds one bit per node in uint64 words, and each layer moves all the bits
+        to the neighboring cells with a few whole-array operations. A node is at
+        distance d from another when the other's bit first reaches it at layer d.
+        """
+        table = self.edges.get(cluster)
+        if table is not None:
+            return table
+        nodes = self._nodes(cluster)
+        table = {node: [] for node in nodes}
+        self.edges[cluster] = table
+        self.clusters_built += 1
+        if len(nodes) < 2:
+            return table
+
+        masks, (first_row, _, first_col, _) = self._local_moves(cluster)
+        rows, cols = np.divmod(np.array(nodes), self.width)
+        rows -= first_row
+        cols -= first_col
+        # One bit per node: node i is bit i % 64 of word i // 64
+        order = np.arange(len(nodes))
+        words = order // 64
+        bits = np.left_shift(np.uint64(1), (order % 64).astype(np.uint64))
+        front = np.zeros(((len(nodes) + 63) // 64,) + masks.shape, dtype=np.uint64)
+        np.bitwise_or.at(front, (words, rows, cols), bits)
+        seen = front.copy()
+        # All-ones where the move is allowed, to let the bits through
+        allow = {bit: np.where(masks & bit, np.uint64(UNMASKED), np.uint64(0)) for bit in (UP, DOWN, LEFT, RIGHT)}
+
+        d = 0
+        while True:
+            d += 1
+            reached = np.zeros_like(front)
+            # A cell receives the bits of every neighbor it can move to
+            reached[:, 1:, :] |= front[:, :-1, :] & allow[UP][1:, :]
+            reached[:, :-1, :] |= front[:, 1:, :] & allow[DOWN][:-1, :]
+            reached[:, :, 1:] |= front[:, :, :-1] & allow[LEFT][:, 1:]
+            reached[:, :, :-1] |= front[:, :, 1:] & allow[RIGHT][:, :-1]
+            reached &= ~seen
+            if not reached.any():
+                break
+            seen |= reached
+            front = reached
+            hits = reached[:, rows, cols]  # New bits at every node, (words, nodes)
+            for target in np.flatnonzero(hits.any(axis=0)).tolist():
+                for word, value in enumerate(hits[:, target].tolist()):
+                    while value:
+                        low = value & -value
+                        table[nodes[word * 64 + low.bit_length() - 1]].append((nodes[target], d))
+                        value ^= low
+        return table
+
+    def precompute(self):
+        """
+        Computes the distance tables of every cluster, instead of on first use.
+        """
+        for rb in range(self.row_blocks):
+            for cb in range(self.col_blocks):
+                self._cluster_edges((rb, cb))
+
+    def _on_wall_change(self, row, col, wall):
+        """
+        Drops the cached distances of the cluster of a changed cell, and updates the
+        transitions of the borders the cell lies on.
+        """
+        cluster = (row // self.cluster_size, col // self.cluster_size)
+        self.edges.pop(cluster, None)
+        first_row, end_row, first_col, end_col = self._bounds(cluster)
+        left, top, right, bottom = self._borders(cluster)
+        rb, cb = cluster
+        for key, on_border, other in ((left, col == first_col, (rb, cb - 1)),
+                                      (top, row == first_row, (rb - 1, cb)),
+                                      (right, col == end_col - 1, (rb, cb + 1)),
+                                      (bottom, row == end_row - 1, (rb + 1, cb))):
+            if key is not None and on_border and self._scan_border(key):
+                self.edges.pop(other, None)  # Its nodes changed too
+
+    def _refine(self, a, b):
+        """
+        Expands an abstract edge into cells: a single move across a border, or a
+        shortest path inside the cluster of both cells.
+
+        Returns:
+            list: The flat indices from `a` (excluded) to `b` (included).
+        """
+        cluster = self._cluster_of(a)
+        if self._cluster_of(b) != cluster:
+            return [b]
+        # Walk down the distances to `b`, one neighbor one step closer at a time
+        distance = self._distances(cluster, b)
+        masks, (first_row, _, first_col, _) = self._local_moves(cluster)
+        cells = []
+        idx, d = a, distance(a)
+        while d:
+            r, c = divmod(idx, self.width)
+            mask = masks[r - first_row, c - first_col]
+            for bit, delta in ((UP, -self.width), (DOWN, self.width), (LEFT, -1), (RIGHT, 1)):
+                if mask & bit and distance(idx + delta) == d - 1:
+                    idx, d = idx + delta, d - 1
+                    break
+            cells.append(idx)
+        return cells
+
+    def search(self, start, goal):
+        """
+        Finds a path between two open cells with HPA*.
+
+        The start and the goal are joined to the nodes of their own clusters by a
+        breadth-first search inside each cluster, then A* runs on the abstract graph
+        with the Manhattan distance to the goal as heuristic. Only the abstract edges of
+        the route found are refined into cells.
+
+        Args:
+            start (tuple): The start cell (row, column).
+            goal (tuple): The goal cell (row, column).
+
+        Returns:
+            tuple: A tuple (solution, expanded, num_explored), where `solution` is the
+                   `(actions, cells)` tuple, `expanded` is the list of flat indices of
+                   the abstract nodes expanded, and `num_explored` is their number.
+
+        Raises:
+            Exception: If no solution is found, an exception is raised.
+        """
+        width = self.width
+        source = start[0] * width + start[1]
+        target = goal[0] * width + goal[1]
+        if source == target:
+            return path_solution([source], width), [], 0
+        goal_row, goal_col = goal
+        start_cluster = self._cluster_of(source)
+        goal_cluster = self._cluster_of(target)
+
+        # Temporary edges from the start to its cluster's nodes and from the goal's
+        # cluster's nodes to the goal
+        from_start = self._distances(start_cluster, source)
+        to_goal = self._distances(goal_cluster, target)
+        finish = {node: d for node in self._nodes(goal_cluster) if (d := to_goal(node)) < UNREACHED}
+        best = from_start(target) if start_cluster == goal_cluster else UNREACHED
+        best_node = source if best < UNREACHED else None  # Route straight inside the cluster
+
+        g_score = {}
+        parent = {}
+        heap = []
+        for node in self._nodes(start_cluster):
+            d = from_start(node)
+            if d < g_score.get(node, UNREACHED):
+                g_score[node] = d
+                parent[node] = source
+                row, col = divmod(node, width)
+                heappush(heap, ((d + abs(row - goal_row) + abs(col - goal_col)) << INDEX_BITS) | node)
+
+        closed = set()
+        expanded = []
+        while heap:
+            entry = heappop(heap)
+            if entry >> INDEX_BITS >= best:
+                break  # No remaining route can beat the best one found
+            node = entry & INDEX_MASK
+            if node in closed:
+                continue
+            closed.add(node)
+            expanded.append(node)
+            g = g_score[node]
+            if node in finish and g + finish[node] < best:
+                best = g + finish[node]
+                best_node = node
+
+            neighbors = self._cluster_edges(self._cluster_of(node))[node]
+            for other, length in neighbors + [(across, 1) for across in self.links.get(node, ())]:
+                if g + length < g_score.get(other, UNREACHED):
+                    g_score[other] = g + length
+                    parent[other] = node
+                    row, col = divmod(other, width)
+                    heappush(heap, ((g + length + abs(row - goal_row) + abs(col - goal_col)) << INDEX_BITS) | other)
+
+        if best_node is None:
+            raise Exception("No solution")
+
+        # The abstract route, from the start to the goal
+        route = [target]
+        node = best_node
+        while node != source:
+            route.append(node)
+            node = parent[node]
+        route.append(source)
+        route.reverse()
+
+        path = [source]
+        for a, b in zip(route, route[1:]):
+            if a != b:  # The goal can itself be the last node
+                path.extend(self._refine(a, b))
+        return path_solution(path, width), expanded, len(expanded)
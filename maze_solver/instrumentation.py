@@ -0,0 +1,202 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class SearchStats:
+    """
+    Opt-in counters, timers and event hook for a `Solver`.
+
+    The solver only touches this object when one is given, and then swaps its frontier,
+    `Maze.neighbors` and heuristic for instrumented wrappers (see `wrap_frontier` and
+    `timed`), so the search loop itself is the same with and without instrumentation.
+
+    Frontier and neighbor counters are collected by the node engine, and the frontier
+    counters also by the memory-bounded searches (see `bounded.record_frontier`). Every
+    strategy reports its total time in the "search" timer and fires the "goal" event.
+
+    Attributes:
+        hook (callable): Called as `hook(event, state)` on every expansion ("expand",
+                         node engine only) and when the goal is found ("goal").
+        pushes (int): The number of nodes added to the frontier.
+        pops (int): The number of nodes removed from the frontier.
+        stale_skipped (int): The number of outdated heap entries skipped by `AStarFrontier.remove`.
+        peak_frontier (int): The largest number of nodes in the frontier at once.
+        neighbor_calls (int): The number of calls to `Maze.neighbors`.
+        heuristic_calls (int): The number of heuristic evaluations.
+        timers (dict): Seconds spent per phase: "search" (the whole strategy), "frontier",
+                       "neighbors" and "heuristic", plus any phase timed with `phase`
+                       (`main.py` adds "load" and "render").
+
+    Methods:
+        phase(name): A context manager adding the time spent in its block to a timer.
+        emit(event, state): Fires the hook, if there is one.
+        wrap_frontier(frontier): Returns an instrumented view of a frontier.
+        timed(timer, counter, func): Returns a counting and timing wrapper of a function.
+        summary(): Returns the counters and timers as a JSON-serializable dict.
+    """
+
+    def __init__(self, hook=None):
+        """
+        Initializes the counters and timers to zero.
+
+        Args:
+            hook (callable): Called as `hook(event, state)` on search events. Defaults to None.
+        """
+        self.hook = hook
+        self.pushes = 0
+        self.pops = 0
+        self.stale_skipped = 0
+        self.peak_frontier = 0
+        self.neighbor_calls = 0
+        self.heuristic_calls = 0
+        self.timers = defaultdict(float)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Adds the time spent in the block to the timer `name`.
+
+        Args:
+            name (str): The name of the timer.
+        """
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] += perf_counter() - started
+
+    def emit(self, event, state):
+        """
+        Fires the hook with an event, if there is a hook.
+
+        Args:
+            event (str): The name of the event, "expand" or "goal".
+            state (tuple): The cell the event is about.
+        """
+        if self.hook is not None:
+            self.hook(event, state)
+
+    def wrap_frontier(self, frontier):
+        """
+        Returns an instrumented view of a frontier, counting and timing its operations.
+
+        Args:
+            frontier (Frontier): The frontier to instrument.
+
+        Returns:
+            InstrumentedFrontier: A frontier with the same interface.
+        """
+        return InstrumentedFrontier(frontier, self)
+
+    def timed(self, timer, counter, func):
+        """
+        Returns a wrapper of `func` that counts its calls in the attribute `counter`
+        and adds the time spent in it to the timer `timer`.
+
+        Args:
+            timer (str): The name of the timer, e.g. "neighbors".
+            counter (str): The name of the counter attribute, e.g. "neighbor_calls".
+            func (callable): The function to wrap.
+
+        Returns:
+            callable: The wrapper.
+        """
+        timers = self.timers
+
+        def wrapper(*args):
+            started = perf_counter()
+            result = func(*args)
+            timers[timer] += perf_counter() - started
+            setattr(self, counter, getattr(self, counter) + 1)
+            return result
+
+        return wrapper
+
+    def summary(self):
+        """
+        Returns the counters and timers.
+
+        Returns:
+            dict: The counters by name, and the timers (in seconds) under "time".
+        """
+        return {
+            "pushes": self.pushes,
+            "pops": self.pops,
+            "stale_skipped": self.stale_skipped,
+            "peak_frontier": self.peak_frontier,
+            "neighbor_calls": self.neighbor_calls,
+            "heuristic_calls": self.heuristic_calls,
+            "time": {name: round(seconds, 6) for name, seconds in self.timers.items()},
+        }
+
+
+class InstrumentedFrontier:
+    """
+    Wraps a frontier to count pushes, pops, skipped stale entries and the peak size,
+    to time every frontier operation and to fire the "expand" event on each removal.
+
+    Attributes:
+        frontier (Frontier): The wrapped frontier.
+        stats (SearchStats): The statistics being collected.
+    """
+
+    def __init__(self, frontier, stats):
+        """
+        Initializes the wrapper.
+
+        Args:
+            frontier (Frontier): The frontier to wrap.
+            stats (SearchStats): The statistics to update.
+        """
+        self.frontier = frontier
+        self.stats = stats
+
+    def add(self, *args):
+        """
+        Adds a node to the wrapped frontier (with its cost for priority frontiers).
+        """
+        stats = self.stats
+        started = perf_counter()
+        self.frontier.add(*args)
+        stats.timers["frontier"] += perf_counter() - started
+        stats.pushes += 1
+        stats.peak_frontier = max(stats.peak_frontier, len(self.frontier))
+
+    def remove(self):
+        """
+        Removes a node from the wrapped frontier and fires the "expand" event.
+
+        Returns:
+            Node: The removed node.
+        """
+        stats = self.stats
+        entries = len(self.frontier.frontier)  # Heap entries, live or stale
+        started = perf_counter()
+        node = self.frontier.remove()
+        stats.timers["frontier"] += perf_counter() - started
+        stats.pops += 1
+        stats.stale_skipped += entries - len(self.frontier.frontier) - 1
+        stats.emit("expand", node.state)
+        return node
+
+    def contains_state(self, state):
+        """
+        Checks if the wrapped frontier contains a node with a given state.
+        """
+        started = perf_counter()
+        found = self.frontier.contains_state(state)
+        self.stats.timers["frontier"] += perf_counter() - started
+        return found
+
+    def empty(self):
+        """
+        Checks if the wrapped frontier is empty.
+        """
+        return self.frontier.empty()
+
+    def cost(self, state):
+        """
+        Returns the cost of a node of the wrapped priority frontier.
+        """
+        return self.frontier.cost(state)
@@ -0,0 +1,199 @@
+from array import array
+from heapq import heappush, heappop
+import numpy as np
+from utils import UP, DOWN, LEFT, RIGHT
+from flat_search import INDEX_BITS, INDEX_MASK, UNREACHED, manhattan_field, path_solution
+
+VERTICAL = UP | DOWN
+HORIZONTAL = LEFT | RIGHT
+
+# Directions to try from a jump point, given the direction it was entered with.
+# Horizontal jumps stop at every cell where a vertical turn becomes possible, and
+# vertical jumps stop wherever a sideways jump would find something, so these are
+# the only moves needed.
+SUCCESSORS = {
+    0: (UP, DOWN, LEFT, RIGHT),
+    UP: (UP, LEFT, RIGHT),
+    DOWN: (DOWN, LEFT, RIGHT),
+    LEFT: (LEFT, UP, DOWN),
+    RIGHT: (RIGHT, UP, DOWN),
+}
+
+
+def _first_stop(stop, hit, reverse, axis):
+    """
+    For every cell, finds the first stop cell met when moving along an axis.
+
+    Args:
+        stop (numpy.ndarray): Cells where a jump in this direction ends.
+        hit (numpy.ndarray): Stop cells that are jump points (the others are dead ends).
+        reverse (bool): Move towards lower indices instead of higher ones.
+        axis (int): 0 to move along columns, 1 to move along rows.
+
+    Returns:
+        numpy.ndarray: The flat index of the stop cell, or its bitwise complement
+                       (a negative number) when the jump ends without a jump point.
+    """
+    index = np.arange(stop.size, dtype=np.int32).reshape(stop.shape)
+    if reverse:
+        first = np.maximum.accumulate(np.where(stop, index, -1), axis=axis)
+    else:
+        first = np.flip(np.minimum.accumulate(
+            np.flip(np.where(stop, index, stop.size), axis=axis), axis=axis), axis=axis)
+    return np.where(hit.reshape(-1)[first], first, ~first).astype(np.int32)
+
+
+def jump_tables(maze, goal):
+    """
+    Precomputes, for every cell and direction, where a jump starting at that cell ends.
+
+    A jump moving horizontally stops at the goal, at a wall, or at a cell where an up or
+    down move opens up that was blocked one cell back (a forced neighbor). A jump moving
+    vertically stops at the goal, at a wall, at a forced sideways neighbor, or at a cell
+    from which a horizontal jump would reach a jump point. All four tables are computed
+    with a handful of vectorized passes over the move masks.
+
+    Args:
+        maze (Maze): The maze to precompute.
+        goal (tuple): The goal cell (row, column).
+
+    Returns:
+        dict: An int32 `array` per direction bit, indexed by the flat index of the first
+              cell of the jump. Values are the flat index of the jump point reached, or
+              the bitwise complement of the last cell scanned when there is none.
+    """
+    moves = maze.moves
+    is_goal = np.zeros(moves.shape, dtype=bool)
+    is_goal[goal] = True
+
+    behind = np.zeros_like(moves)  # Moves of the cell the jump came from
+    behind[:, 1:] = moves[:, :-1]
+    hit = ((moves & ~behind & VERTICAL) != 0) | is_goal
+    right = _first_stop(hit | ((moves & RIGHT) == 0), hit, False, 1)
+
+    behind = np.zeros_like(moves)
+    behind[:, :-1] = moves[:, 1:]
+    hit = ((moves & ~behind & VERTICAL) != 0) | is_goal
+    left = _first_stop(hit | ((moves & LEFT) == 0), hit, True, 1)
+
+    # A vertical jump stops wherever a jump to either side would reach a jump point
+    sideways = np.zeros(moves.shape, dtype=bool)
+    sideways[:, 1:] |= ((moves[:, 1:] & LEFT) != 0) & (left.reshape(moves.shape)[:, :-1] >= 0)
+    sideways[:, :-1] |= ((moves[:, :-1] & RIGHT) != 0) & (right.reshape(moves.shape)[:, 1:] >= 0)
+
+    behind = np.zeros_like(moves)
+    behind[1:, :] = moves[:-1, :]
+    hit = ((moves & ~behind & HORIZONTAL) != 0) | is_goal | sideways
+    down = _first_stop(hit | ((moves & DOWN) == 0), hit, False, 0)
+
+    behind = np.zeros_like(moves)
+    behind[:-1, :] = moves[1:, :]
+    hit = ((moves & ~behind & HORIZONTAL) != 0) | is_goal | sideways
+    up = _first_stop(hit | ((moves & UP) == 0), hit, True, 0)
+
+    return {bit: array("i", table.tobytes())
+            for bit, table in ((UP, up), (DOWN, down), (LEFT, left), (RIGHT, right))}
+
+
+def jump_point_search(maze, trace=None):
+    """
+    Runs Jump Point Search on the 4-connected, uniform-cost grid of the maze.
+
+    Instead of adding every neighbor to the frontier, the search jumps in a straight
+    line until it reaches the goal, a dead end, or a cell where the shortest paths can
+    turn (a jump point). Only jump points are pushed on the heap, so large open areas
+    are crossed in a few expansions. The jumps themselves are looked up in tables
+    precomputed by `jump_tables`, so no cell is scanned in Python. A* runs on the jump
+    points with the Manhattan heuristic, and the straight segments between them are
+    expanded back into cells at the end, so the path has the same length as the one
+    found by A*.
+
+    Args:
+        maze (Maze): The maze to solve.
+        trace (array): An `array("i")` the flat index of every expanded jump point is
+                       appended to, in expansion order, or None to record nothing.
+
+    Returns:
+        tuple: A tuple (solution, expanded, scanned, num_explored), where `expanded`
+               flags the jump points that were expanded, `scanned` flags every cell
+               jumped over (both bytearrays by flat index), and `num_explored` is the
+               number of jump points removed from the frontier.
+
+    Raises:
+        Exception: If no solution is found, an exception is raised.
+    """
+    width = maze.width
+    size = maze.height * width
+    flat_moves = maze.flat_moves
+    step = {UP: -width, DOWN: width, LEFT: -1, RIGHT: 1}
+    tables = jump_tables(maze, maze.goal)
+    h = manhattan_field(maze, maze.goal)
+    start = maze.start[0] * width + maze.start[1]
+    goal = maze.goal[0] * width + maze.goal[1]
+
+    g_score = array("i", [UNREACHED]) * size
+    parent = array("i", [-1]) * size
+    entered = bytearray(size)  # Direction each jump point was reached with
+    closed = bytearray(size)
+    scanned = bytearray(size)
+
+    g_score[start] = 0
+    heap = [(h[start] << INDEX_BITS) | start]
+    num_explored = 0
+
+    while heap:
+        idx = heappop(heap) & INDEX_MASK
+        if closed[idx]:
+            continue  # Stale entry
+        num_explored += 1
+        if trace is not None:
+            trace.append(idx)
+        if idx == goal:
+            return expand_jumps(parent, start, goal, width), closed, scanned, num_explored
+        closed[idx] = 1
+
+        moves = flat_moves[idx]
+        for bit in SUCCESSORS[entered[idx]]:
+            if not moves & bit:
+                continue
+            delta = step[bit]
+            point = tables[bit][idx + delta]
+            end = point if point >= 0 else ~point
+            count = abs(end - idx) // abs(delta)
+            scanned[idx + delta:end + delta if end + delta >= 0 else None:delta] = b"\x01" * count
+            if point < 0:
+                continue  # Dead end, nothing to expand in this direction
+            g = g_score[idx] + count
+            if g_score[point] <= g:
+                continue
+            g_score[point] = g
+            parent[point] = idx
+            entered[point] = bit
+            heappush(heap, ((g + h[point]) << INDEX_BITS) | point)
+
+    raise Exception("No solution")
+
+
+def expand_jumps(parent, start, goal, width):
+    """
+    Rebuilds the cell-by-cell path from the parent pointers between jump points.
+
+    Args:
+        parent (array): Parent jump point of every reached jump point.
+        start (int): Flat index of the start cell.
+        goal (int): Flat index of the goal cell.
+        width (int): The width of the maze.
+
+    Returns:
+        tuple: The solution as (actions, cells).
+    """
+    points = [goal]
+    while points[-1] != start:
+        points.append(parent[points[-1]])
+    points.reverse()
+
+    path = [start]
+    for a, b in zip(points, points[1:]):
+        delta = (1 if b > a else -1) * (1 if b // width == a // width else width)
+        path.extend(range(a + delta, b + delta, delta))
+    return path_solution(path, width)
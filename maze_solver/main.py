@@ -1,48 +1,280 @@
+import argparse
+import json
 import os
 import sys
+from contextlib import nullcontext
 from maze import Maze
-from search import Solver
-from visualizer import MazeVisualizer
+from search import Solver, ALGORITHMS, ENGINES, UNTRACED
+from visualizer import MazeVisualizer, DEFAULT_FRAMES
+from tiles import render_tiles
+from batch import run_batch
+from instrumentation import SearchStats
+from bounded import DEFAULT_BEAM_WIDTH, DEFAULT_MAX_FRONTIER
+from heuristics import DistanceField, LandmarkHeuristic
+from hierarchy import DEFAULT_CLUSTER_SIZE
+
+# Precomputed heuristics selectable with --heuristic, by name.
+HEURISTICS = {"alt": LandmarkHeuristic, "exact": DistanceField}
+
+# Example usage: python .\maze_solver\main.py .\data\maze2.txt --algorithm bfs
+#                python .\maze_solver\main.py --batch .\data --workers 4 --output results.jsonl
+
+
+def parse_args(argv=None):
+    """
+    Parses the command-line arguments.
+
+    Args:
+        argv (list): The arguments to parse. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        usage="python main.py maze.txt [--algorithm NAME] [--engine NAME] [--cell-size PX] [--palette] [--tiles DIR] [--quiet]\n"
+              "       [--stats text|json] [--beam-width N] [--max-frontier N]\n"
+              "       [--heuristic manhattan|alt|exact] [--landmarks N] [--heuristic-file FILE] [--heatmap FILE]\n"
+              "       [--components] [--cluster-size N] [--animate FILE] [--frames N]\n"
+              "       python main.py --batch DIR [--workers N] [--output FILE] [--algorithm NAME] [--engine NAME]")
+    parser.add_argument("maze", nargs="?", help="path to the maze file")
+    parser.add_argument("--algorithm", default="astar", choices=sorted(ALGORITHMS),
+                        help="search algorithm to use (default: astar)")
+    parser.add_argument("--engine", default="node", choices=sorted(ENGINES),
+                        help="search engine to use (default: node)")
+    parser.add_argument("--cell-size", type=int, default=None,
+                        help="size of a maze cell in the image, in pixels (default: up to 50, fitting large mazes)")
+    parser.add_argument("--palette", action="store_true",
+                        help="save the image as a smaller palette PNG")
+    parser.add_argument("--tiles", metavar="DIR",
+                        help="write a pyramid of PNG tiles to DIR instead of a single image, "
+                             "for mazes too large for one image (cell size: a power of two, default 8)")
+    parser.add_argument("--cluster-size", type=int, default=DEFAULT_CLUSTER_SIZE,
+                        help=f"side of the clusters of the hpa algorithm, in cells (default: {DEFAULT_CLUSTER_SIZE})")
+    parser.add_argument("--components", action="store_true",
+                        help="label the connected components first, so that an unreachable goal fails without searching")
+    parser.add_argument("--heatmap", metavar="FILE",
+                        help="also draw the distance of every cell from the goal as a heatmap image to FILE")
+    parser.add_argument("--animate", metavar="FILE",
+                        help="record the expansion order and draw it as an animation to FILE (.gif, .png or .apng)")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES,
+                        help=f"largest number of frames of the --animate animation (default: {DEFAULT_FRAMES})")
+    parser.add_argument("--heuristic", default="manhattan", choices=["manhattan", *HEURISTICS],
+                        help="heuristic of A*, greedy and the memory-bounded searches: Manhattan distance, "
+                             "landmarks (ALT) or the exact distance field of the goal (default: manhattan)")
+    parser.add_argument("--landmarks", type=int, default=8,
+                        help="number of landmarks of the alt heuristic (default: 8)")
+    parser.add_argument("--heuristic-file", metavar="FILE",
+                        help="load the precomputed heuristic from FILE (.npz) if it exists, "
+                             "otherwise compute it and save it there")
+    parser.add_argument("--beam-width", type=int, default=DEFAULT_BEAM_WIDTH,
+                        help=f"cells kept per layer by the beam algorithm (default: {DEFAULT_BEAM_WIDTH})")
+    parser.add_argument("--max-frontier", type=int, default=DEFAULT_MAX_FRONTIER,
+                        help=f"heap entries kept by the sma algorithm (default: {DEFAULT_MAX_FRONTIER})")
+    parser.add_argument("--quiet", action="store_true",
+                        help="do not print the maze before and after solving")
+    parser.add_argument("--stats", choices=("text", "json"),
+                        help="collect search counters and timers and print them as text or as one JSON line")
+    parser.add_argument("--batch", metavar="DIR",
+                        help="solve every maze file of a directory and write JSON Lines results")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes in batch mode (default: number of CPUs)")
+    parser.add_argument("--chunksize", type=int, default=16,
+                        help="number of files sent to a worker at a time in batch mode (default: 16)")
+    parser.add_argument("--pattern", default="*.txt",
+                        help="glob pattern of the maze files in batch mode (default: *.txt)")
+    parser.add_argument("--output", metavar="FILE",
+                        help="file the batch results are written to (default: standard output)")
+    args = parser.parse_args(argv)
+
+    if args.landmarks < 1:
+        parser.error("--landmarks must be at least 1")
+    if args.frames < 1:
+        parser.error("--frames must be at least 1")
+    if args.animate is not None and os.path.splitext(args.animate)[1].lower() not in (".gif", ".png", ".apng"):
+        parser.error("--animate expects a .gif, .png or .apng file")
+    if args.animate is not None and args.algorithm in UNTRACED:
+        parser.error(f"the '{args.algorithm}' algorithm does not record the expansion order needed by --animate")
+    if args.cluster_size < 2:
+        parser.error("--cluster-size must be at least 2")
+    if args.beam_width < 1:
+        parser.error("--beam-width must be at least 1")
+    if args.max_frontier < 2:
+        parser.error("--max-frontier must be at least 2")
+    if args.cell_size is not None and args.cell_size < 1:
+        parser.error("--cell-size must be at least 1")
+    if args.tiles is not None and args.cell_size is not None and args.cell_size & (args.cell_size - 1):
+        parser.error("--cell-size must be a power of two with --tiles")
+    if (args.maze is None) == (args.batch is None):
+        parser.error("expected either a maze file or --batch DIR")
+    if args.batch is not None:
+        unsupported = [option for option, used in (
+            ("--heuristic", args.heuristic != "manhattan"),
+            ("--components", args.components),
+            ("--beam-width", args.beam_width != DEFAULT_BEAM_WIDTH),
+            ("--max-frontier", args.max_frontier != DEFAULT_MAX_FRONTIER),
+            ("--tiles", args.tiles is not None),
+            ("--heatmap", args.heatmap is not None),
+            ("--animate", args.animate is not None),
+        ) if used]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} cannot be combined with --batch")
+    if args.algorithm not in ENGINES[args.engine]:
+        parser.error(f"the {args.engine} engine does not provide the '{args.algorithm}' algorithm, "
+                     f"expected one of {sorted(ENGINES[args.engine])}")
+    return args
+
+
+def batch(args):
+    """
+    Solves every maze file of the `--batch` directory in a process pool, without printing
+    or rendering the mazes, and writes one JSON record per file.
+
+    Args:
+        args (argparse.Namespace): The parsed command-line arguments.
+    """
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        counts = run_batch(args.batch, output, workers=args.workers, chunksize=args.chunksize,
+                           pattern=args.pattern, algorithm=args.algorithm, engine=args.engine)
+    finally:
+        if args.output:
+            output.close()
+    print(f"Solved: {counts['ok']}, failed: {counts['error']}", file=sys.stderr)
+
+
+def load_heuristic(args, maze):
+    """
+    Builds the precomputed heuristic selected with `--heuristic`, or loads it from
+    `--heuristic-file` when that file exists (and saves it there otherwise).
+
+    Args:
+        args (argparse.Namespace): The parsed command-line arguments.
+        maze (Maze): The maze to solve.
+
+    Returns:
+        FieldHeuristic: The heuristic, or None for the Manhattan distance.
+
+    Raises:
+        ValueError: If the heuristic file was computed for another maze or holds another heuristic.
+    """
+    if args.heuristic == "manhattan":
+        return None
+    heuristic_class = HEURISTICS[args.heuristic]
+    if args.heuristic_file and os.path.exists(args.heuristic_file):
+        return heuristic_class.load(args.heuristic_file, maze)
+    if heuristic_class is LandmarkHeuristic:
+        heuristic = LandmarkHeuristic(maze, args.landmarks)
+    else:
+        heuristic = DistanceField(maze)
+    if args.heuristic_file:
+        heuristic.save(args.heuristic_file)
+    return heuristic
+
+
+def print_stats(args, solver):
+    """
+    Prints the instrumentation collected while solving, as aligned text or as a single
+    JSON line (`--stats json`).
+
+    Args:
+        args (argparse.Namespace): The parsed command-line arguments.
+        solver (Solver): The solver, after `solve()`.
+    """
+    summary = {
+        "maze": args.maze,
+        "algorithm": args.algorithm,
+        "engine": args.engine,
+        "num_explored": solver.num_explored,
+        "path_length": len(solver.maze.solution[1]),
+        "optimal": solver.optimal,
+        **solver.stats.summary(),
+    }
+    if args.stats == "json":
+        print(json.dumps(summary))
+        return
+    times = summary.pop("time")
+    for name, value in summary.items():
+        print(f"{name + ':':<18}{value}")
+    for name, seconds in times.items():
+        print(f"{'time.' + name + ':':<18}{seconds:.6f} s")
 
-# Example usage: python .\maze_solver\main.py .\data\maze2.txt
 
 def main():
     """
     Main function to load a maze from a file, solve it using the Solver class, 
-    and print the maze before and after solving. 
+    and print the maze before and after solving (unless `--quiet` is given). 
 
-    The function expects a command-line argument specifying the path to the maze file.
+    The function expects a command-line argument specifying the path to the maze file,
+    and optionally the search algorithm and engine to use. With `--batch DIR`, every maze
+    file of the directory is solved instead (see `batch`).
 
-    Exits with an error message if the correct number of arguments is not provided.
+    Exits with an error message if the arguments are invalid.
     """
-    # Check if the correct number of arguments is passed (should be 2 arguments: the script and the maze file)
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python main.py maze.txt")  # If not, show usage and exit.
+    args = parse_args()
+    if args.batch is not None:
+        return batch(args)
+
+    # Optional instrumentation, also timing the load and render phases
+    stats = SearchStats() if args.stats else None
+    phase = stats.phase if stats is not None else lambda name: nullcontext()
 
     # Load the maze from the file provided in the command-line argument.
-    maze = Maze(sys.argv[1])  
-    maze.print()  # Print the maze layout before solving
+    with phase("load"):
+        maze = Maze(args.maze)
+
+    if args.components:
+        with phase("components"):
+            maze.build_components()
+
+    if args.algorithm == "hpa":
+        with phase("hierarchy"):
+            maze.build_hierarchy(args.cluster_size)
+
+    with phase("heuristic"):
+        heuristic = load_heuristic(args, maze)
+
+    # Create a Solver object to solve the maze with the requested algorithm.
+    solver = Solver(maze, algorithm=args.algorithm, engine=args.engine, stats=stats,
+                    beam_width=args.beam_width, max_frontier=args.max_frontier, heuristic=heuristic,
+                    trace=args.animate is not None)
+
+    if not args.quiet:
+        maze.print()  # Print the maze layout before solving
 
     print("Solving...")  # Indicate the solving process is starting
-    
-    # Create a Solver object to solve the maze.
-    solver = Solver(maze)  
     solver.solve()  # Solve the maze using the solver
     
     # Print the number of states explored during the solving process.
     print("States Explored:", solver.num_explored)
+    print("Optimal:", "yes" if solver.optimal else "not guaranteed")
+    if maze.weighted:
+        print("Path Cost:", maze.path_cost())  # Sum of the terrain costs along the path
     
     # Print the maze layout again, this time with the solution path.
-    maze.print()  # Print the solution path on the maze
-
-     # Create the 'images' directory if it does not exist
-    if not os.path.exists('images'):
-        os.makedirs('images')
+    if not args.quiet:
+        maze.print()  # Print the solution path on the maze
 
     # Visualize and save the maze with the solution and explored cells
-    visualizer = MazeVisualizer(maze, solution=maze.solution, explored=solver.explored)
-    visualizer.draw_maze(os.path.join('images', "maze.png"), show_solution=True, show_explored=True)
+    with phase("render"):
+        visualizer = MazeVisualizer(maze, solution=maze.solution, explored=solver.explored, cell_size=args.cell_size)
+        mode = "P" if args.palette else "RGBA"
+        if args.tiles is not None:
+            levels = render_tiles(visualizer, args.tiles, cell_size=args.cell_size or 8,
+                                  show_solution=True, show_explored=True, mode=mode)
+            print(f"Wrote {len(levels)} zoom levels of tiles to {args.tiles}")
+        else:
+            # Create the 'images' directory if it does not exist
+            if not os.path.exists('images'):
+                os.makedirs('images')
+            visualizer.draw_maze(os.path.join('images', "maze.png"), show_solution=True, show_explored=True, mode=mode)
+        if args.heatmap is not None:
+            visualizer.draw_heatmap(args.heatmap, mode="P" if args.palette else "RGB")
+        if args.animate is not None:
+            num_frames = visualizer.draw_animation(args.animate, solver.trace, frames=args.frames)
+            print(f"Wrote {num_frames} frames of {len(solver.trace)} expansions to {args.animate}")
 
+    if stats is not None:
+        print_stats(args, solver)
 
 
 # Ensure that the main function is executed only if this script is run directly.
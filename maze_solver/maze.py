@@ -1,29 +1,64 @@
-from search import Solver
+import sys
+import numpy as np
+from utils import UP, DOWN, LEFT, RIGHT, MOVES
+from corridors import CorridorGraph
+from components import ComponentIndex
+from hierarchy import ClusterGraph, DEFAULT_CLUSTER_SIZE
+from mazefile import read_maze, write_binary, write_text
+from distance import distance_field, distance_fields
+
 
 class Maze():
     """
-    This class represents a maze and provides functionality to load, 
-    validate, and print the maze. The maze is loaded from a text file 
-    where 'A' represents the start point, 'B' represents the goal, 
-    walls are represented by any non-space character, and spaces represent 
-    open paths.
+    This class represents a maze and provides functionality to load,
+    validate, and print the maze. The maze is loaded from a text file
+    where 'A' represents the start point, 'B' represents the goal,
+    walls are represented by any other non-space character, and spaces represent
+    open paths. The digits '1' to '9' are open cells with a traversal cost.
+
+    Internally the maze is stored as a NumPy array with one byte per cell, together
+    with a precomputed move mask per cell, so that parsing and neighbor lookups do not
+    depend on nested Python lists.
 
     Attributes:
         start (tuple): A tuple representing the coordinates of the start point (row, column).
         goal (tuple): A tuple representing the coordinates of the goal point (row, column).
         height (int): The height (number of rows) of the maze.
         width (int): The width (number of columns) of the maze.
-        walls (list): A 2D list representing the maze layout. 
+        grid (numpy.ndarray): A (height, width) uint8 array where 1 is a wall and 0 is open space.
+        moves (numpy.ndarray): A (height, width) uint8 array of move masks. Each cell holds the
+                               UP/DOWN/LEFT/RIGHT bits of the moves allowed from it.
+        flat_moves (bytearray): The same move masks indexed by the flat cell index `row * width + col`.
+        costs (numpy.ndarray): A (height, width) uint8 array of cell costs (the cost of moving
+                               into the cell, 1 to 9), or None if every cell costs 1.
+        flat_costs (bytearray): The same costs indexed by flat cell index, or None.
+        min_cost (int): The lowest cost of an open cell, used to scale heuristics.
+        walls (list): A 2D list representing the maze layout, built lazily from `grid`.
                       Each element is either `True` (wall) or `False` (open space).
         solution (list): A list representing the solution path, if available, containing coordinates of the path.
-    
+        components (ComponentIndex): The connected-components index answering reachability
+                                     before a search, or None until `build_components` is called.
+        hierarchy (ClusterGraph): The cluster abstraction used by hierarchical search (HPA*),
+                                  or None until it is built.
+        listeners (list): Callables notified as `listener(row, col, wall)` after every `set_wall`,
+                          such as incremental planners and caches that depend on the walls.
+
     Methods:
         __init__(filename): Initializes the maze by reading the file, validating the start and goal points,
                              and determining the maze's dimensions and layout.
-        print(): Prints the maze to the console with 'A' for the start point, 
+        print(): Prints the maze to the console with 'A' for the start point,
                  'B' for the goal, and '█' for walls.
-        neighbors(state): Returns a list of possible neighboring states from the current position, 
+        neighbors(state): Returns a list of possible neighboring states from the current position,
                           considering the maze boundaries and open spaces.
+        build_corridors(): Precomputes the corridor graph used for repeated queries.
+        load_corridors(filename): Loads a corridor graph saved with `CorridorGraph.save`.
+        build_components(): Labels the connected components, so that unreachable goals fail fast.
+        build_hierarchy(cluster_size): Splits the maze into clusters for hierarchical search.
+        save(filename, binary=True): Writes the maze in the binary or text format.
+        path_cost(cells): Returns the cost of a path.
+        set_wall(row, col, wall): Adds or removes a wall at runtime and notifies the listeners.
+        distance_field(sources): Returns the number of moves from the nearest source to every cell.
+        distance_fields(sources, workers): Returns one distance field per source, optionally in parallel.
     """
 
     def __init__(self, filename):
@@ -31,81 +66,238 @@ class Maze():
         Initializes the maze by reading the contents of a file, validating the start ('A') and goal ('B') points,
         and creating the internal representation of the maze's walls and open spaces.
 
+        In the text format, the digits '1' to '9' are open cells with that traversal cost
+        (the cost of moving into the cell); spaces cost 1.
+
+        Both the text format and the compact binary format of `mazefile` are accepted;
+        the format is detected from the first bytes of the file. Text files are parsed
+        through a memory map, one band of rows at a time.
+
         Args:
             filename (str): The path to the maze file.
-        
+
         Raises:
             Exception: If the maze file does not contain exactly one start ('A') and one goal ('B') point.
+            ValueError: If a binary maze file is malformed.
+        """
+        self._load(*read_maze(filename))
+
+    def _load(self, grid, start, goal, costs=None):
+        """
+        Stores the wall grid, endpoints and cell costs and precomputes the move masks.
+
+        Args:
+            grid (numpy.ndarray): A (height, width) uint8 array where 1 is a wall.
+            start (tuple): The start cell (row, column).
+            goal (tuple): The goal cell (row, column).
+            costs (numpy.ndarray): A (height, width) uint8 array of cell costs, or None
+                                   if every cell costs 1.
+        """
+        self.grid = grid
+        self.height, self.width = grid.shape
+        self.start = start
+        self.goal = goal
+        self._load_costs(costs)
+        self._walls = None  # List-of-lists view, built on first access
+        self._build_moves()
+        self.corridors = None  # Corridor graph, built on demand
+        self.components = None  # Connected-components index, built on demand
+        self.hierarchy = None  # Cluster abstraction for hierarchical search, built on demand
+        self.solution = None
+        self.listeners = []  # Notified of wall changes
+
+    def _build_moves(self):
+        """
+        Computes the move mask of every cell in one vectorized pass over the grid.
+        The masks are kept in the `flat_moves` bytearray so that search code can index them
+        without NumPy scalar overhead; `moves` is a NumPy view over the same memory.
+        """
+        open_cells = self.grid == 0
+        self.flat_moves = bytearray(self.grid.size)
+        self.moves = masks = np.frombuffer(self.flat_moves, dtype=np.uint8).reshape(self.grid.shape)
+        # Fill the masks in place, one uint8 pass per direction, to avoid large temporaries
+        vertical = open_cells[1:, :] & open_cells[:-1, :]  # Pairs of open cells on top of each other
+        masks[1:, :] |= vertical * np.uint8(UP)
+        masks[:-1, :] |= vertical * np.uint8(DOWN)
+        del vertical
+        horizontal = open_cells[:, 1:] & open_cells[:, :-1]  # Pairs of open cells side by side
+        masks[:, 1:] |= horizontal * np.uint8(LEFT)
+        masks[:, :-1] |= horizontal * np.uint8(RIGHT)
+
+    def _load_costs(self, costs):
+        """
+        Stores the cell costs in the `flat_costs` bytearray, with `costs` as a NumPy view
+        over the same memory. Mazes whose open cells all cost 1 keep both as None, so that
+        searches can use their unit-cost code paths.
+
+        Args:
+            costs (numpy.ndarray): A (height, width) array of cell costs, or None.
+        """
+        open_cells = self.grid == 0
+        if costs is None or not (costs[open_cells] != 1).any():
+            self.costs = self.flat_costs = None
+            self.min_cost = 1
+            return
+        self.flat_costs = bytearray(costs.astype(np.uint8).tobytes())
+        self.costs = np.frombuffer(self.flat_costs, dtype=np.uint8).reshape(self.grid.shape)
+        self.min_cost = int(self.costs[open_cells].min())
+
+    def set_wall(self, row, col, wall=True):
+        """
+        Adds or removes a wall at runtime, such as a door closing or opening.
+
+        The move masks of the cell and of its four neighbors are updated in place, the
+        corridor graph (which no longer matches the walls) is dropped, and every listener
+        is then called as `listener(row, col, wall)`. An opened cell keeps its terrain cost.
+        Setting a cell to its current state does nothing.
+
+        Args:
+            row (int): The row of the cell.
+            col (int): The column of the cell.
+            wall (bool): True to add a wall, False to open the cell.
+
+        Raises:
+            ValueError: If the cell is outside the maze, or is the start or the goal and `wall` is True.
         """
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise ValueError(f"Cell {(row, col)} is outside the maze")
+        if wall and (row, col) in (self.start, self.goal):
+            raise ValueError("The start and the goal cannot be walls")
+        if bool(self.grid[row, col]) == wall:
+            return
 
-        # Read the file content
-        with open(filename) as f:
-            contents = f.read()
-
-        # Validate the presence of exactly one start ('A') and one goal ('B')
-        if contents.count("A") != 1:
-            raise Exception("Maze must have exactly one start point ('A').")
-        if contents.count("B") != 1:
-            raise Exception("Maze must have exactly one goal point ('B').")
-
-        # Split contents into lines and determine maze dimensions
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
-
-        # Create an internal representation of the maze (walls and open spaces)
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    # Mark the start and goal positions as open space
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    # Mark walls and open paths
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    # Handle any index errors caused by uneven row lengths
-                    row.append(False)
-            self.walls.append(row)
-        self.solution = None 
-
-    def print(self):
-        """
-        Prints the maze to the console in a visually formatted manner. 
-        The start point ('A') and goal point ('B') are displayed at their 
-        respective positions, walls are represented by '█', and open spaces 
+        self.grid[row, col] = wall
+        if self._walls is not None:
+            self._walls[row][col] = wall
+        idx = row * self.width + col
+        flat_moves = self.flat_moves
+        mask = 0
+        for bit, opposite, dr, dc in ((UP, DOWN, -1, 0), (DOWN, UP, 1, 0), (LEFT, RIGHT, 0, -1), (RIGHT, LEFT, 0, 1)):
+            r, c = row + dr, col + dc
+            if not (0 <= r < self.height and 0 <= c < self.width) or self.grid[r, c]:
+                continue
+            neighbor = r * self.width + c
+            if wall:
+                flat_moves[neighbor] &= ~opposite
+            else:
+                flat_moves[neighbor] |= opposite
+                mask |= bit
+        flat_moves[idx] = mask
+
+        if not wall and self.flat_costs is not None:
+            # Keep the heuristics admissible if the opened cell is the cheapest one
+            self.flat_costs[idx] = max(self.flat_costs[idx], 1)
+            self.min_cost = min(self.min_cost, self.flat_costs[idx])
+        self.corridors = None
+        for listener in self.listeners:
+            listener(row, col, wall)
+
+    @property
+    def weighted(self):
+        """
+        Whether some open cells cost more than 1 to enter.
+
+        Returns:
+            bool: True if the maze has terrain costs.
+        """
+        return self.flat_costs is not None
+
+    def path_cost(self, cells=None):
+        """
+        Computes the cost of a path: the sum of the costs of the cells entered.
+
+        Args:
+            cells (list): The cells of the path, without the start cell, as in the
+                          solution format. Defaults to the cells of `solution`.
+
+        Returns:
+            int: The cost of the path, which is its length on unit-cost mazes.
+        """
+        if cells is None:
+            cells = self.solution[1]
+        if self.flat_costs is None:
+            return len(cells)
+        return sum(self.flat_costs[row * self.width + col] for row, col in cells)
+
+    @property
+    def walls(self):
+        """
+        A list-of-lists view of the maze layout, kept for compatibility.
+        It is built from `grid` the first time it is accessed.
+
+        Returns:
+            list: A 2D list where `True` is a wall and `False` is open space.
+        """
+        if self._walls is None:
+            self._walls = self.grid.astype(bool).tolist()
+        return self._walls
+
+    def print(self, stream=None, viewport=None, step=1):
+        """
+        Prints the maze to the console in a visually formatted manner.
+        The start point ('A') and goal point ('B') are displayed at their
+        respective positions, walls are represented by '█', and open spaces
         are represented by spaces. If a solution exists, it is represented by '*'.
+
+        The whole frame is built with array operations and written in a single call.
+        Huge mazes can be summarized by printing only part of them (`viewport`) and/or
+        one character per `step` x `step` block of cells. A block shows 'A', 'B' or '*'
+        if it contains such a cell, and a wall if most of its cells are walls.
+
+        Args:
+            stream (file): The text stream to write to. Defaults to `sys.stdout`.
+            viewport (tuple): The (top, left, height, width) of the region of the maze to
+                              print, clipped to the maze. Defaults to the whole maze.
+            step (int): The number of cells per printed character along each axis.
+
+        Raises:
+            ValueError: If `step` is not positive.
         """
-        solution = self.solution[1] if self.solution is not None else None  # Get the solution path if it exists
-        print()  # Print a blank line before starting
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
-                    print("█", end="")  # Wall
-                elif (i, j) == self.start:
-                    print("A", end="")  # Start point
-                elif (i, j) == self.goal:
-                    print("B", end="")  # Goal point
-                elif solution is not None and (i, j) in solution:
-                    print("*", end="")  # If part of the solution path, display '*'
-                else:
-                    print(" ", end="")  # Empty space
-            print()  # New line at the end of each row
-        print()  # Blank line after the maze is printed
+        if step < 1:
+            raise ValueError("step must be at least 1")
+        top, left, height, width = viewport if viewport is not None else (0, 0, self.height, self.width)
+        top, left = max(top, 0), max(left, 0)
+        bottom, right = min(top + height, self.height), min(left + width, self.width)
+        rows, cols = max(bottom - top, 0), max(right - left, 0)
+
+        # Pad the region to whole blocks; padding counts as open space
+        out_rows, out_cols = -(-rows // step), -(-cols // step)
+        walls = np.zeros((out_rows * step, out_cols * step), dtype=np.uint32)
+        walls[:rows, :cols] = self.grid[top:bottom, left:right]
+        # Marks in increasing priority: 1 solution, 2 goal, 3 start
+        marks = np.zeros((out_rows, out_cols), dtype=np.uint8)
+        points = [self.solution[1]] if self.solution is not None and self.solution[1] else []
+        points += [[self.goal], [self.start]]
+        for mark, cells in enumerate(points, start=4 - len(points)):
+            cells = np.array(cells, dtype=np.int64).reshape(-1, 2) - (top, left)
+            cells = cells[(cells >= 0).all(axis=1) & (cells < (rows, cols)).all(axis=1)]
+            marks[cells[:, 0] // step, cells[:, 1] // step] = mark
+
+        wall_count = walls.reshape(out_rows, step, out_cols, step).sum(axis=(1, 3))
+        cells_per_block = np.zeros_like(walls)
+        cells_per_block[:rows, :cols] = 1
+        cells_per_block = cells_per_block.reshape(out_rows, step, out_cols, step).sum(axis=(1, 3))
+
+        chars = np.full((out_rows, out_cols + 1), ord("\n"), dtype=np.uint32)
+        chars[:, :-1] = np.where(2 * wall_count > cells_per_block, ord("█"), ord(" "))
+        if self.costs is not None and step == 1:
+            # Terrain costs are shown as digits
+            terrain = np.zeros_like(walls)
+            terrain[:rows, :cols] = self.costs[top:bottom, left:right]
+            terrain[walls != 0] = 1
+            chars[:, :-1] = np.where(terrain > 1, terrain + ord("0"), chars[:, :-1])
+        chars[:, :-1] = np.where(marks > 0, np.array([0, ord("*"), ord("B"), ord("A")], dtype=np.uint32)[marks],
+                                 chars[:, :-1])
+
+        # Blank lines before and after the maze
+        frame = "\n" + chars.astype("<u4").tobytes().decode("utf-32-le") + "\n"
+        (stream if stream is not None else sys.stdout).write(frame)
 
     def neighbors(self, state):
         """
-        Given a state (row, col), returns a list of possible neighboring states 
-        considering the boundaries of the maze and walls. The neighbors are 
-        valid if they are within the maze dimensions and not blocked by a wall.
+        Given a state (row, col), returns a list of possible neighboring states
+        considering the boundaries of the maze and walls. The neighbors are
+        read from the precomputed move mask of the cell.
 
         Args:
             state (tuple): A tuple representing the current state (row, column).
@@ -116,17 +308,117 @@ class Maze():
                   Valid actions are "up", "down", "left", and "right".
         """
         row, col = state  # Unpack the current state (row, col)
-        # List of possible moves (actions) and their resulting positions
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
-        ]
-
-        result = []  # List to store valid neighboring states
-        for action, (r, c) in candidates:
-            # Check if the neighbor is within bounds and not a wall
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))  # Add valid neighbors to the result list
-        return result
\ No newline at end of file
+        mask = self.flat_moves[row * self.width + col]  # Moves allowed from this cell
+        return [(action, (row + dr, col + dc)) for action, dr, dc in MOVES[mask]]
+
+    def distance_field(self, sources=None):
+        """
+        Computes the breadth-first distance field of the maze: the number of moves from
+        the nearest source cell to every cell, with a vectorized NumPy wavefront. Terrain
+        costs are ignored; every move counts as 1.
+
+        Args:
+            sources (list): The source cells as (row, column) tuples. Defaults to the goal.
+
+        Returns:
+            numpy.ndarray: A (height, width) int32 array, `UNREACHED` (2**31 - 1) for walls
+                           and for cells that no source can reach.
+
+        Raises:
+            ValueError: If a source is outside the maze or is a wall.
+        """
+        return distance_field(self, sources if sources is not None else [self.goal])
+
+    def distance_fields(self, sources, workers=1):
+        """
+        Computes one breadth-first distance field per source cell. With several workers,
+        the fields are computed across a pool of processes that share the move masks
+        and their output through shared memory.
+
+        Args:
+            sources (list): The source cells as (row, column) tuples.
+            workers (int): The number of worker processes. None uses one per CPU; 1
+                           computes the fields in the current process.
+
+        Returns:
+            numpy.ndarray: A (len(sources), height, width) int32 array of distance fields.
+
+        Raises:
+            ValueError: If there is no source, or one is outside the maze or is a wall.
+        """
+        return distance_fields(self, sources, workers)
+
+    def save(self, filename, binary=True):
+        """
+        Writes the maze to a file, in the compact binary format by default or in the
+        text format ('#' for walls).
+
+        Args:
+            filename (str): The path of the file to write.
+            binary (bool): Whether to use the binary format.
+        """
+        (write_binary if binary else write_text)(filename, self.grid, self.start, self.goal, self.costs)
+
+    def build_corridors(self):
+        """
+        Precomputes the corridor graph of the maze: dead-end branches are pruned,
+        junctions become nodes and the corridors between them become weighted edges.
+        The graph does not depend on the start and goal, so it can answer any query.
+
+        Returns:
+            CorridorGraph: The graph, also stored in `corridors`.
+        """
+        self.corridors = CorridorGraph(self)
+        return self.corridors
+
+    def build_components(self):
+        """
+        Labels the connected components of the open cells (see `components.ComponentIndex`).
+        Once built, `Solver` checks that the goal can be reached before searching and
+        raises `UnreachableError` at once when it cannot. The index follows `set_wall`
+        changes on its own.
+
+        Returns:
+            ComponentIndex: The index, also stored in `components`.
+        """
+        if self.components is not None:
+            self.components.detach()
+        self.components = ComponentIndex(self)
+        return self.components
+
+    def build_hierarchy(self, cluster_size=DEFAULT_CLUSTER_SIZE):
+        """
+        Splits the maze into square clusters and finds the transitions across their
+        borders, for hierarchical search (see `hierarchy.ClusterGraph`). The distances
+        inside each cluster are cached on first use; the graph follows `set_wall`
+        changes on its own, dropping only the caches of the clusters affected.
+
+        Args:
+            cluster_size (int): The side of the clusters, in cells.
+
+        Returns:
+            ClusterGraph: The graph, also stored in `hierarchy`.
+
+        Raises:
+            ValueError: If `cluster_size` is below 2, or the maze has terrain costs.
+        """
+        if self.hierarchy is not None:
+            self.hierarchy.detach()
+        self.hierarchy = ClusterGraph(self, cluster_size)
+        return self.hierarchy
+
+    def load_corridors(self, filename):
+        """
+        Loads a corridor graph saved with `CorridorGraph.save`, instead of building it.
+
+        Args:
+            filename (str): The path of the saved graph.
+
+        Returns:
+            CorridorGraph: The graph, also stored in `corridors`.
+
+        Raises:
+            ValueError: If the graph was built for a different maze.
+        """
+        self.corridors = CorridorGraph.load(filename, self)
+        return self.corridors
@@ -0,0 +1,357 @@
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import numpy as np
+
+# Binary maze format: a 64-byte header followed by the walls, one bit per cell
+# (1 = wall), packed row by row with each row padded to a whole number of bytes
+# (least significant bit first). Weighted mazes add one cost byte per cell after
+# the walls.
+MAGIC = b"MAZEBIN\x01"
+HEADER = struct.Struct("<8sQQQQQQQ")  # Magic, height, width, start row/col, goal row/col, flags
+HEADER_SIZE = 64
+HAS_COSTS = 1  # Header flag: a cost section follows the walls
+
+# Number of cells processed at a time when scanning or writing row bands
+BAND_CELLS = 1 << 22
+
+
+def is_binary(filename):
+    """
+    Tells whether a file is in the binary maze format.
+
+    Args:
+        filename (str): The path to the maze file.
+
+    Returns:
+        bool: True if the file starts with the binary format's magic bytes.
+    """
+    with open(filename, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_maze(filename):
+    """
+    Reads a maze file in either format, detected from its first bytes.
+
+    Args:
+        filename (str): The path to the maze file.
+
+    Returns:
+        tuple: (grid, start, goal, costs), where `grid` is a (height, width) uint8 array
+               with 1 for walls, `start` and `goal` are (row, column) tuples, and `costs`
+               is a (height, width) uint8 array of cell costs (1 to 9), or None when every
+               cell costs 1.
+
+    Raises:
+        Exception: If a text maze does not contain exactly one start ('A') and one goal ('B') point.
+        ValueError: If a binary maze file is malformed.
+    """
+    if is_binary(filename):
+        return read_binary(filename)
+    return read_text(filename)
+
+
+def read_text(filename):
+    """
+    Reads a text maze through a memory map, one band of rows at a time.
+
+    The file is never loaded as a whole: newlines are located in fixed-size chunks of
+    the mapping, and each row is parsed straight from the mapped bytes into the wall
+    grid. When every row has the same length (the usual case), whole bands of rows are
+    parsed at once through a strided view of the mapping. Files with non-ASCII
+    characters (e.g. '█' walls) are decoded one row at a time.
+
+    Spaces are open cells with a cost of 1 and the digits '1' to '9' are open cells
+    with that cost; every other character except 'A' and 'B' is a wall.
+
+    Args:
+        filename (str): The path to the maze file.
+
+    Returns:
+        tuple: (grid, start, goal, costs), as for `read_maze`.
+
+    Raises:
+        Exception: If the maze does not contain exactly one start ('A') and one goal ('B') point.
+    """
+    if os.path.getsize(filename) == 0:
+        parsed = _TextMaze(0, 0)
+    else:
+        with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            line_starts, line_ends, ascii = _line_bounds(mm)
+            if ascii:
+                parsed = _parse_ascii(mm, line_starts, line_ends)
+            else:
+                parsed = _parse_unicode(mm, line_starts, line_ends)
+
+    # Validate the presence of exactly one start ('A') and one goal ('B')
+    if len(parsed.starts) != 1:
+        raise Exception("Maze must have exactly one start point ('A').")
+    if len(parsed.goals) != 1:
+        raise Exception("Maze must have exactly one goal point ('B').")
+    return parsed.grid, parsed.starts[0], parsed.goals[0], parsed.costs
+
+
+def _line_bounds(mm):
+    """
+    Locates the lines of a mapped text file, scanning it in fixed-size chunks.
+
+    Args:
+        mm (mmap.mmap): The mapped file.
+
+    Returns:
+        tuple: (starts, ends, ascii) where `starts` and `ends` are int64 arrays of the
+               byte offsets of each line (ends exclude the line break) and `ascii`
+               tells whether the file is plain ASCII.
+    """
+    buf = np.frombuffer(mm, dtype=np.uint8)
+    breaks = []
+    ascii = True
+    for offset in range(0, len(buf), BAND_CELLS):
+        chunk = buf[offset:offset + BAND_CELLS]
+        breaks.append(np.flatnonzero(chunk == ord("\n")) + offset)
+        ascii = ascii and int(chunk.max()) < 128
+    ends = np.concatenate(breaks)
+    starts = np.concatenate(([0], ends + 1))
+    if starts[-1] < len(buf):
+        ends = np.append(ends, len(buf))  # Last line without a line break
+    else:
+        starts = starts[:-1]
+    # Drop the '\r' of Windows line breaks
+    crlf = (ends > starts) & (buf[np.maximum(ends - 1, 0)] == ord("\r"))
+    return starts, ends - crlf, ascii
+
+
+class _TextMaze:
+    """
+    Collects the wall grid, terrain costs and endpoints of a text maze as its rows are parsed.
+
+    Attributes:
+        grid (numpy.ndarray): The (height, width) uint8 wall grid. Short rows are padded
+                              with open space.
+        costs (numpy.ndarray): The uint8 cost of every cell, allocated when the first digit
+                               is found; None while every open cell costs 1.
+        starts (list): The 'A' cells found (at most two are kept).
+        goals (list): The 'B' cells found (at most two are kept).
+    """
+
+    def __init__(self, height, width):
+        """
+        Initializes an open maze of the given size.
+
+        Args:
+            height (int): The number of rows.
+            width (int): The number of columns.
+        """
+        self.grid = np.zeros((height, width), dtype=np.uint8)
+        self.costs = None
+        self.starts = []
+        self.goals = []
+
+    def add_rows(self, chars, row):
+        """
+        Parses a band of rows.
+
+        Args:
+            chars (numpy.ndarray): The character codes of the band, one row per maze row,
+                                   possibly narrower than the maze.
+            row (int): The maze row of the first row of the band.
+        """
+        rows, cols = chars.shape
+        digits = (chars >= ord("1")) & (chars <= ord("9"))
+        walls = chars != ord(" ")
+        walls &= ~digits
+        self.grid[row:row + rows, :cols] = walls
+        if digits.any():
+            if self.costs is None:
+                self.costs = np.ones(self.grid.shape, dtype=np.uint8)
+            self.costs[row:row + rows, :cols][digits] = chars[digits] - ord("0")
+
+        for points, char in ((self.starts, ord("A")), (self.goals, ord("B"))):
+            if len(points) < 2:  # Two are enough to reject the maze
+                found_rows, found_cols = np.nonzero(chars == char)
+                points.extend(zip((found_rows + row).tolist(), found_cols.tolist()))
+                # 'A' and 'B' are open cells
+                self.grid[found_rows + row, found_cols] = 0
+
+
+def _parse_ascii(mm, line_starts, line_ends):
+    """
+    Parses the rows of a mapped ASCII maze.
+
+    Args:
+        mm (mmap.mmap): The mapped file.
+        line_starts (numpy.ndarray): Byte offset of the start of each line.
+        line_ends (numpy.ndarray): Byte offset of the end of each line.
+
+    Returns:
+        _TextMaze: The parsed maze.
+    """
+    buf = np.frombuffer(mm, dtype=np.uint8)
+    lengths = line_ends - line_starts
+    height, width = len(lengths), int(lengths.max())
+    parsed = _TextMaze(height, width)
+
+    stride = int(line_starts[1] - line_starts[0]) if height > 1 else width
+    if (lengths == width).all() and (np.diff(line_starts) == stride).all():
+        # Evenly spaced rows: parse bands of rows through a strided view of the file
+        rows = np.lib.stride_tricks.as_strided(buf[line_starts[0]:], shape=(height, width), strides=(stride, 1))
+        band = max(1, BAND_CELLS // max(width, 1))
+        for top in range(0, height, band):
+            parsed.add_rows(rows[top:top + band], top)
+    else:
+        for row, (start, end) in enumerate(zip(line_starts.tolist(), line_ends.tolist())):
+            parsed.add_rows(buf[start:end].reshape(1, -1), row)
+    return parsed
+
+
+def _parse_unicode(mm, line_starts, line_ends):
+    """
+    Parses the rows of a mapped UTF-8 maze, decoding one row at a time.
+
+    Args:
+        mm (mmap.mmap): The mapped file.
+        line_starts (numpy.ndarray): Byte offset of the start of each line.
+        line_ends (numpy.ndarray): Byte offset of the end of each line.
+
+    Returns:
+        _TextMaze: The parsed maze.
+    """
+    bounds = list(zip(line_starts.tolist(), line_ends.tolist()))
+    width = max(len(mm[start:end].decode()) for start, end in bounds)
+    parsed = _TextMaze(len(bounds), width)
+    for row, (start, end) in enumerate(bounds):
+        chars = np.frombuffer(mm[start:end].decode().encode("utf-32-le"), dtype=np.uint32)
+        parsed.add_rows(chars.reshape(1, -1), row)
+    return parsed
+
+
+def read_binary(filename):
+    """
+    Reads a maze in the binary format. The packed walls are memory-mapped and unpacked
+    into the wall grid in one vectorized step, without any parsing.
+
+    Args:
+        filename (str): The path to the maze file.
+
+    Returns:
+        tuple: (grid, start, goal, costs), as for `read_maze`.
+
+    Raises:
+        ValueError: If the file is not a valid binary maze.
+    """
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) < HEADER_SIZE:
+            raise ValueError(f"{filename} is too short to be a binary maze")
+        magic, height, width, *points, flags = HEADER.unpack_from(mm)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a binary maze")
+        row_bytes = (width + 7) // 8
+        cost_offset = HEADER_SIZE + height * row_bytes
+        if len(mm) < cost_offset + (height * width if flags & HAS_COSTS else 0):
+            raise ValueError(f"{filename} is truncated")
+        packed = np.frombuffer(mm, dtype=np.uint8, count=height * row_bytes, offset=HEADER_SIZE)
+        grid = np.unpackbits(packed.reshape(height, row_bytes), axis=1, count=width, bitorder="little")
+        costs = None
+        if flags & HAS_COSTS:
+            costs = np.frombuffer(mm, dtype=np.uint8, count=height * width, offset=cost_offset)
+            costs = costs.reshape(height, width).copy()
+        del packed  # Release the mapping before it is closed
+
+    start, goal = tuple(points[:2]), tuple(points[2:])
+    for row, col in (start, goal):
+        if not (row < height and col < width) or grid[row, col]:
+            raise ValueError(f"{filename} has its start or goal outside the open cells")
+    return grid, start, goal, costs
+
+
+def write_binary(filename, grid, start, goal, costs=None):
+    """
+    Writes a maze in the binary format, packing the walls one band of rows at a time.
+
+    Args:
+        filename (str): The path of the file to write.
+        grid (numpy.ndarray): A (height, width) array where nonzero cells are walls.
+        start (tuple): The start cell (row, column).
+        goal (tuple): The goal cell (row, column).
+        costs (numpy.ndarray): The (height, width) cell costs, or None if every cell costs 1.
+    """
+    height, width = grid.shape
+    band = max(1, BAND_CELLS // max(width, 1))
+    flags = HAS_COSTS if costs is not None else 0
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, height, width, *start, *goal, flags))
+        for top in range(0, height, band):
+            f.write(np.packbits(grid[top:top + band] != 0, axis=1, bitorder="little").tobytes())
+        if costs is not None:
+            for top in range(0, height, band):
+                f.write(costs[top:top + band].astype(np.uint8).tobytes())
+
+
+def write_text(filename, grid, start, goal, costs=None):
+    """
+    Writes a maze in the text format ('#' for walls, digits for open cells costing
+    more than 1), one band of rows at a time.
+
+    Args:
+        filename (str): The path of the file to write.
+        grid (numpy.ndarray): A (height, width) array where nonzero cells are walls.
+        start (tuple): The start cell (row, column).
+        goal (tuple): The goal cell (row, column).
+        costs (numpy.ndarray): The (height, width) cell costs, or None if every cell costs 1.
+    """
+    height, width = grid.shape
+    band = max(1, BAND_CELLS // (width + 1))
+    with open(filename, "wb") as f:
+        for top in range(0, height, band):
+            chars = np.full((min(band, height - top), width + 1), ord("\n"), dtype=np.uint8)
+            chars[:, :width] = np.where(grid[top:top + band] != 0, ord("#"), ord(" "))
+            if costs is not None:
+                terrain = (grid[top:top + band] == 0) & (costs[top:top + band] > 1)
+                chars[:, :width][terrain] = costs[top:top + band][terrain] + ord("0")
+            for (row, col), char in ((start, "A"), (goal, "B")):
+                if top <= row < top + band:
+                    chars[row - top, col] = ord(char)
+            f.write(chars.tobytes())
+
+
+def convert(source, destination):
+    """
+    Converts a maze file to the other format: text mazes are written in the binary
+    format and binary mazes in the text format.
+
+    Args:
+        source (str): The path of the maze to convert.
+        destination (str): The path of the converted maze.
+    """
+    binary = is_binary(source)
+    (write_text if binary else write_binary)(destination, *read_maze(source))
+
+
+def fingerprint(maze):
+    """
+    Hashes the wall layout of a maze, and its terrain costs if it has any, so that saved
+    indexes can be checked against it.
+
+    Args:
+        maze (Maze): The maze to hash.
+
+    Returns:
+        str: A hexadecimal digest of the maze shape, walls and costs.
+    """
+    digest = hashlib.sha1(f"{maze.height}x{maze.width}".encode())
+    digest.update(np.ascontiguousarray(maze.grid).tobytes())
+    if maze.flat_costs is not None:
+        digest.update(maze.flat_costs)
+    return digest.hexdigest()
+
+
+# Example usage: python .\maze_solver\mazefile.py .\data\maze1.txt .\data\maze1.bin
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a maze between the text and binary formats.")
+    parser.add_argument("source", help="maze file to convert (text or binary)")
+    parser.add_argument("destination", help="converted maze file (in the other format)")
+    args = parser.parse_args()
+    convert(args.source, args.destination)
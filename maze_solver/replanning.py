@@ -0,0 +1,270 @@
+from array import array
+from heapq import heappush, heappop
+from flat_search import INDEX_BITS, INDEX_MASK, UNREACHED, flat_deltas, path_solution
+
+# Heap keys pack (k1, k2) into a single int, k1 above k2, and the heap entries
+# pack the key above the flat cell index, as in `flat_search`.
+KEY_BITS = 32
+
+
+class DStarLite:
+    """
+    An incremental planner (D* Lite) that keeps its search between calls, so that the
+    path can be repaired after walls change or the start moves, instead of solving the
+    maze again from scratch.
+
+    The search runs backwards, from the goal towards the start, on flat cell indices:
+    `g` holds the cost to reach the goal from every settled cell and `rhs` its one-step
+    lookahead. The planner registers itself in `maze.listeners`, so that every
+    `Maze.set_wall` marks the changed cell; the next `replan` only re-expands the cells
+    whose cost to the goal changed. Moving the start only shifts the heap keys by the
+    accumulated heuristic offset `km`, and does not invalidate the search.
+
+    Terrain costs are supported: moving into a cell costs its terrain cost, and the
+    Manhattan heuristic is scaled by the cheapest cell cost. Changing the goal, or opening
+    a cell cheaper than every other one, restarts the search from scratch.
+
+    Attributes:
+        maze (Maze): The maze being planned on.
+        start (int): Flat index of the start cell of the last plan.
+        goal (int): Flat index of the goal cell.
+        km (int): The heuristic offset accumulated by start moves.
+        g (array): Cost to the goal of every cell, `UNREACHED` if unknown.
+        rhs (array): One-step lookahead cost to the goal of every cell.
+        num_expanded (int): The number of cells expanded by the last `replan`.
+        expanded (list): Flat indices of the cells expanded by the last `replan`.
+
+    Methods:
+        replan(start=None): Repairs the search and returns the updated solution.
+        detach(): Stops listening to the maze's wall changes.
+    """
+
+    def __init__(self, maze):
+        """
+        Initializes the planner. The first `replan` runs the full search.
+
+        Args:
+            maze (Maze): The maze to plan on.
+        """
+        self.maze = maze
+        self.width = maze.width
+        self.deltas = flat_deltas(maze.width)
+        self.pending = set()  # Flat indices of the cells changed since the last replan
+        self.num_expanded = 0
+        self.expanded = []
+        self._reset()
+        maze.listeners.append(self._on_wall_change)
+
+    def _reset(self):
+        """
+        Drops the search state and queues the goal, as before the first plan.
+        """
+        maze = self.maze
+        size = maze.height * maze.width
+        self.start = maze.start[0] * self.width + maze.start[1]
+        self.start_row, self.start_col = maze.start
+        self.goal = maze.goal[0] * self.width + maze.goal[1]
+        self.min_cost = maze.min_cost  # Heuristic scale the keys were computed with
+        self.km = 0
+        self.g = array("i", [UNREACHED]) * size
+        self.rhs = array("i", [UNREACHED]) * size
+        self.heap = []
+        self.open = {}  # Flat index -> key of its live heap entry
+        self.pending.clear()
+        self.rhs[self.goal] = 0
+        self._queue(self.goal)
+
+    def _on_wall_change(self, row, col, wall):
+        """
+        Marks a cell whose wall changed, to be repaired by the next `replan`.
+        """
+        self.pending.add(row * self.width + col)
+
+    def detach(self):
+        """
+        Stops listening to the maze's wall changes. The planner must not be used afterwards.
+        """
+        self.maze.listeners.remove(self._on_wall_change)
+
+    def _heuristic(self, idx):
+        """
+        Returns the scaled Manhattan distance from the current start to a cell.
+        """
+        row, col = divmod(idx, self.width)
+        return (abs(row - self.start_row) + abs(col - self.start_col)) * self.min_cost
+
+    def _key(self, idx):
+        """
+        Returns the packed (k1, k2) key of a cell, with k2 = min(g, rhs) and
+        k1 = k2 + heuristic + km.
+        """
+        best = min(self.g[idx], self.rhs[idx])
+        return ((best + self._heuristic(idx) + self.km) << KEY_BITS) | best
+
+    def _queue(self, idx):
+        """
+        Queues an inconsistent cell (g != rhs) with its current key, or drops a
+        consistent cell from the queue. Outdated heap entries are skipped when popped.
+        """
+        if self.g[idx] != self.rhs[idx]:
+            key = self._key(idx)
+            self.open[idx] = key
+            heappush(self.heap, (key << INDEX_BITS) | idx)
+        else:
+            self.open.pop(idx, None)
+
+    def _update(self, idx):
+        """
+        Recomputes the lookahead cost of a cell from its neighbors, and queues it if
+        it became inconsistent.
+        """
+        if idx != self.goal:
+            g, costs = self.g, self.maze.flat_costs
+            best = UNREACHED
+            for delta in self.deltas[self.maze.flat_moves[idx]]:
+                neighbor = idx + delta
+                if g[neighbor] < UNREACHED:
+                    # Moving from this cell into the neighbor costs the neighbor's terrain cost
+                    cost = g[neighbor] + (costs[neighbor] if costs is not None else 1)
+                    if cost < best:
+                        best = cost
+            self.rhs[idx] = best
+        self._queue(idx)
+
+    def _repair(self):
+        """
+        Expands inconsistent cells until the start is consistent and no queued cell
+        can still lower its cost (the D* Lite ComputeShortestPath loop).
+        """
+        g, rhs, heap, open_keys = self.g, self.rhs, self.heap, self.open
+        flat_moves, deltas, costs = self.maze.flat_moves, self.deltas, self.maze.flat_costs
+        start = self.start
+        expanded = self.expanded = []
+
+        while heap:
+            entry = heap[0]
+            idx = entry & INDEX_MASK
+            key = entry >> INDEX_BITS
+            if open_keys.get(idx) != key:
+                heappop(heap)  # Stale entry, the cell was re-queued or became consistent
+                continue
+            start_best = min(g[start], rhs[start])
+            if key >= ((start_best + self.km) << KEY_BITS) | start_best and rhs[start] == g[start]:
+                break
+            heappop(heap)
+
+            current = self._key(idx)
+            if key < current:
+                # The key was computed before the start moved, queue it again with the new one
+                open_keys[idx] = current
+                heappush(heap, (current << INDEX_BITS) | idx)
+                continue
+            del open_keys[idx]
+            expanded.append(idx)
+
+            if g[idx] > rhs[idx]:
+                # Overconsistent: settle the cell and offer it to its neighbors
+                g[idx] = rhs[idx]
+                through = g[idx] + (costs[idx] if costs is not None else 1)
+                for delta in deltas[flat_moves[idx]]:
+                    neighbor = idx + delta
+                    if neighbor != self.goal and through < rhs[neighbor]:
+                        rhs[neighbor] = through
+                        self._queue(neighbor)
+            else:
+                # Underconsistent: the cell got more expensive, so its neighbors may need another way
+                g[idx] = UNREACHED
+                self._update(idx)
+                for delta in deltas[flat_moves[idx]]:
+                    self._update(idx + delta)
+
+        self.num_expanded = len(expanded)
+
+    def _apply_changes(self):
+        """
+        Updates the lookahead costs of the changed cells and of their four neighbors.
+        The neighbors are found from the grid bounds, since the move masks of a cell
+        that became a wall no longer point to them.
+        """
+        height, width = self.maze.height, self.width
+        for idx in self.pending:
+            self._update(idx)
+            row, col = divmod(idx, width)
+            if row > 0:
+                self._update(idx - width)
+            if row < height - 1:
+                self._update(idx + width)
+            if col > 0:
+                self._update(idx - 1)
+            if col < width - 1:
+                self._update(idx + 1)
+        self.pending.clear()
+
+    def _extract_path(self):
+        """
+        Follows the cheapest neighbors from the start down to the goal.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+        """
+        g, costs = self.g, self.maze.flat_costs
+        flat_moves, deltas = self.maze.flat_moves, self.deltas
+        idx = self.start
+        path = [idx]
+        while idx != self.goal:
+            best = best_cost = None
+            for delta in deltas[flat_moves[idx]]:
+                neighbor = idx + delta
+                if g[neighbor] < UNREACHED:
+                    cost = g[neighbor] + (costs[neighbor] if costs is not None else 1)
+                    if best is None or cost < best_cost:
+                        best, best_cost = neighbor, cost
+            idx = best
+            path.append(idx)
+        return path_solution(path, self.width)
+
+    def replan(self, start=None):
+        """
+        Repairs the search after the wall changes made since the last call, and for a
+        new start cell if one is given, then stores the updated path in `maze.solution`.
+
+        The first call runs the full backward search. Later calls only expand the cells
+        whose cost to the goal changed, which after a local change is a small part of
+        the maze.
+
+        Args:
+            start (tuple): The new start cell (row, column), for example the agent's
+                           current position. Defaults to `maze.start`.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+
+        Raises:
+            ValueError: If the start cell is outside the maze or is a wall.
+            Exception: If no solution is found, an exception is raised.
+        """
+        maze = self.maze
+        self.num_expanded, self.expanded = 0, []
+        if start is not None:
+            row, col = start
+            if not (0 <= row < maze.height and 0 <= col < maze.width) or maze.grid[row, col]:
+                raise ValueError(f"Start {start} is not an open cell of the maze")
+            maze.start = (row, col)
+
+        if maze.goal != divmod(self.goal, self.width) or maze.min_cost < self.min_cost:
+            self._reset()  # The keys and costs to the goal no longer hold
+        start_idx = maze.start[0] * self.width + maze.start[1]
+        if start_idx != self.start:
+            # D* Lite: shift every key by the heuristic distance the start moved
+            self.start_row, self.start_col = divmod(self.start, self.width)
+            self.km += self._heuristic(start_idx)
+            self.start = start_idx
+        self.start_row, self.start_col = maze.start
+
+        self._apply_changes()
+        self._repair()
+        if self.g[self.start] >= UNREACHED:
+            maze.solution = None
+            raise Exception("No solution")
+        maze.solution = self._extract_path()
+        return maze.solution
@@ -1,8 +1,18 @@
+from array import array
+from functools import partial
+from operator import attrgetter
+import numpy as np
 from node import Node
 from frontier import StackFrontier
 from frontier import QueueFrontier
 from frontier import AStarFrontier
 from utils import manhattan_distance
+from flat_search import flat_astar, flat_bfs, flat_cells
+from bidirectional import bidirectional_bfs, bidirectional_astar
+from jps import jump_point_search
+from cache import PathCache
+from replanning import DStarLite
+from bounded import DEFAULT_BEAM_WIDTH, DEFAULT_MAX_FRONTIER, ida_star, beam_search, bounded_astar
 
 class Solver:
     """
@@ -10,42 +20,238 @@ class Solver:
     It finds a path from the start ('A') to the goal ('B') by exploring 
     states using a frontier, keeping track of explored states to avoid cycles.
 
+    The search strategy is picked by name from a registry (see `ALGORITHMS` and
+    `FLAT_ALGORITHMS`), so switching between BFS, DFS, A*, greedy best-first search
+    and Dijkstra does not require editing the code.
+
     Attributes:
         maze (Maze): The maze to solve.
+        algorithm (str): The name of the search algorithm to use.
+        engine (str): The search engine to use, "node" or "flat".
         num_explored (int): The number of states explored during the solution process.
-        explored (set): A set of states that have been explored.
+        optimal (bool): Whether the last solution is guaranteed to be a shortest (least-cost)
+                        path, set by `solve`.
+        heuristic (FieldHeuristic): The precomputed heuristic used by A*, greedy search and
+                                    the memory-bounded searches instead of the Manhattan
+                                    distance, or None.
+        beam_width (int): The number of cells kept per layer by the "beam" algorithm.
+        max_frontier (int): The heap size cap of the "sma" algorithm.
+        explored (set): A set of states that have been explored. The flat-index searches
+                        keep their expanded cells as flat indices, converted to states on
+                        first access, so that a solve whose explored set is not read does
+                        not pay for building hundreds of thousands of tuples.
+        trace (array): The flat indices (`row * width + col`) of the expanded cells as
+                       int32 values in expansion order, across calls, or None when
+                       tracing is off (see `UNTRACED` for the strategies that cannot record it).
+        path_cache (PathCache): The cache of shortest-path trees used by `solve_many`,
+                                created on first use.
+        stats (SearchStats): Optional counters, timers and event hook (see `instrumentation`).
+        planner (DStarLite): The incremental planner used by `replan`, created on first use.
     
     Methods:
         solve(): Solves the maze and stores the solution path in the maze.
+        solve_many(queries): Answers many (start, goal) queries without touching the maze.
+        replan(start): Repairs the previous plan after wall changes or a start move.
     """
 
-    def __init__(self, maze):
+    def __init__(self, maze, algorithm="astar", engine="node", stats=None,
+                 beam_width=DEFAULT_BEAM_WIDTH, max_frontier=DEFAULT_MAX_FRONTIER, heuristic=None,
+                 trace=False):
         """
         Initializes the solver with the given maze.
 
         Args:
             maze (Maze): The maze object to solve.
+            algorithm (str): The search algorithm, one of the names registered for the engine
+                             ("bfs", "dfs", "astar", "greedy" or "dijkstra" for the node engine).
+            engine (str): "node" runs the search with Node objects and a frontier class.
+                          "flat" runs the search on flat cell indices with array-backed state
+                          (see `flat_search.flat_astar`), which is much faster on large grids.
+            stats (SearchStats): Counters, timers and event hook to update while solving.
+                                 Defaults to None, which disables instrumentation.
+            beam_width (int): The number of cells kept per layer by beam search ("beam").
+            max_frontier (int): The maximum number of heap entries of the memory-bounded
+                                A* search ("sma").
+            heuristic (FieldHeuristic): A precomputed heuristic (`heuristics.DistanceField`
+                                        or `heuristics.LandmarkHeuristic`) for A* and greedy
+                                        search on either engine, and for "idastar", "beam"
+                                        and "sma". Defaults to None, which uses the Manhattan
+                                        distance.
+            trace (bool): Whether to record the order in which cells are expanded in `trace`.
+                          Off by default, which costs a single None check per expansion.
+
+        Raises:
+            ValueError: If the engine is unknown or does not provide the algorithm, or if
+                        a trace is asked of an algorithm that cannot record one.
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {sorted(ENGINES)}")
+        if algorithm not in ENGINES[engine]:
+            raise ValueError(f"Unknown algorithm '{algorithm}' for the {engine} engine, "
+                             f"expected one of {sorted(ENGINES[engine])}")
+        if trace and algorithm in UNTRACED:
+            raise ValueError(f"The '{algorithm}' algorithm does not record expansion traces")
         self.maze = maze  # The maze to solve
+        self.algorithm = algorithm  # The search algorithm to use
+        self.engine = engine  # The search engine to use
         self.num_explored = 0  # Counter for the number of states explored
-        self.explored = set()  # Set to store explored states
+        self._explored = set()  # Set to store explored states
+        self._unconverted = []  # Arrays of expanded flat indices not yet added to _explored
+        self.path_cache = None  # Shortest-path trees shared by solve_many calls
+        self.stats = stats  # Optional instrumentation
+        self.planner = None  # Incremental planner shared by replan calls
+        self.optimal = None  # Whether the last solution is guaranteed optimal
+        self.beam_width = beam_width  # Cells kept per layer by beam search
+        self.max_frontier = max_frontier  # Heap size cap of the bounded A* search
+        self.heuristic = heuristic  # Precomputed heuristic, None for Manhattan
+        self.trace = array("i") if trace else None  # Expansion order, as flat indices
+
+    @property
+    def explored(self):
+        """
+        The set of explored states, after adding those recorded as flat indices.
+        """
+        if self._unconverted:
+            self._explored.update(flat_cells(np.concatenate(self._unconverted), self.maze.width))
+            self._unconverted.clear()
+        return self._explored
 
     def solve(self):
         """
-        Solves the maze using a depth-first search algorithm.
+        Solves the maze using the selected search algorithm.
         
-        The algorithm starts at the start point ('A'), explores the maze by 
-        moving through neighboring cells, and backtracks when necessary. 
-        If the goal ('B') is found, it stores the actions and the sequence 
-        of cells leading to the goal in the maze's solution attribute.
+        The algorithm starts at the start point ('A') and explores the maze by 
+        moving through neighboring cells. If the goal ('B') is found, it stores
+        the actions and the sequence of cells leading to the goal in the maze's
+        solution attribute, and sets `optimal` to whether the path is guaranteed to be
+        a shortest (least-cost) one.
+
+        If the maze has a connected-components index (see `Maze.build_components`), a
+        goal that cannot be reached fails at once, without searching.
+
+        Raises:
+            UnreachableError: If the component index shows that the goal cannot be reached.
+            Exception: If no solution is found, an exception is raised.
+        """
+        if self.maze.components is not None:
+            self.maze.components.check(self.maze.start, self.maze.goal)
+        strategy = ENGINES[self.engine][self.algorithm]
+        # Memory-bounded strategies override this with the outcome of their run
+        self.optimal = self.algorithm in OPTIMAL[self.engine] and not (
+            self.maze.weighted and self.algorithm in UNIT_COST_OPTIMAL)
+        if self.stats is None:
+            self.maze.solution = strategy(self)
+            return
+        with self.stats.phase("search"):
+            self.maze.solution = strategy(self)
+        self.stats.emit("goal", self.maze.goal)
+
+    def solve_many(self, queries, cache=None, max_sources=16):
+        """
+        Answers a batch of (start, goal) queries on the maze, without changing
+        `maze.solution`, `explored` or `num_explored`.
+
+        Queries are answered from single-source shortest-path trees kept in an LRU
+        cache, so repeated starts or goals only cost the length of their path. The
+        cache is kept between calls; its `hits` and `misses` counters show how much
+        work was reused.
+
+        Args:
+            queries (iterable): (start, goal) pairs of open cells, as (row, column) tuples.
+            cache (PathCache): The cache to use, for example one shared between solvers.
+                               Defaults to this solver's `path_cache`.
+            max_sources (int): The number of trees kept when `path_cache` is created.
+
+        Returns:
+            list: One (actions, cells) solution per query, or None when the goal cannot be reached.
+
+        Raises:
+            ValueError: If a query cell is outside the maze or is a wall.
+        """
+        if cache is None:
+            if self.path_cache is None:
+                self.path_cache = PathCache(self.maze, max_sources)
+            cache = self.path_cache
+        return [cache.path(start, goal) for start, goal in queries]
+
+    def replan(self, start=None):
+        """
+        Plans a path with an incremental D* Lite planner (see `replanning.DStarLite`) and
+        stores it in `maze.solution`. The planner is kept between calls and is notified of
+        every `Maze.set_wall`, so a later call only repairs the part of the search affected
+        by the wall changes and by the start move since the previous call, which after a
+        local change costs a small fraction of a full `solve`.
+
+        `num_explored`, `explored` and `trace` (when tracing) are updated with the cells
+        expanded by each call.
+
+        Args:
+            start (tuple): The new start cell (row, column), for example the agent's
+                           current position. Defaults to `maze.start`.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+
+        Raises:
+            ValueError: If the start cell is outside the maze or is a wall.
+            UnreachableError: If the component index shows that the goal cannot be reached.
+            Exception: If no solution is found, an exception is raised.
+        """
+        if self.maze.components is not None:
+            self.maze.components.check(start if start is not None else self.maze.start, self.maze.goal)
+        if self.planner is None:
+            self.planner = DStarLite(self.maze)
+        self.optimal = True  # D* Lite paths are least-cost paths
+        try:
+            if self.stats is None:
+                return self.planner.replan(start)
+            with self.stats.phase("replan"):
+                return self.planner.replan(start)
+        finally:
+            self.num_explored += self.planner.num_expanded
+            self._unconverted.append(np.array(self.planner.expanded, dtype=np.int64))
+            if self.trace is not None:
+                self.trace.extend(self.planner.expanded)
+
+    def frontier_search(self, frontier_class, priority=None):
+        """
+        Runs a graph search that removes nodes from a frontier until the goal is reached.
+
+        Args:
+            frontier_class (type): The frontier class that decides the expansion order.
+            priority (callable): For priority frontiers, a function returning the cost of a node.
+                                 None for stack and queue frontiers. A queued node is replaced
+                                 when a cheaper path to its state is found, so A* and Dijkstra
+                                 return least-cost paths on weighted mazes too.
+
+        Returns:
+            tuple: The solution as (actions, cells).
 
         Raises:
             Exception: If no solution is found, an exception is raised.
         """
         # Start at the 'A' point in the maze and create the initial node
         start = Node(state=self.maze.start, parent=None, action=None)
-        frontier = AStarFrontier()  # Use a stack frontier (depth-first search) oa queue frontier (breadth-first search)
-        frontier.add(start, start.f)  # Add the start node to the frontier
+        frontier = frontier_class()
+        neighbors = self.maze.neighbors
+        # Terrain costs; the Manhattan distance is scaled by the cheapest cost to stay admissible
+        costs, width, h_scale = self.maze.flat_costs, self.maze.width, self.maze.min_cost
+        trace = self.trace
+        explored = self.explored
+        heuristic = manhattan_distance
+        if self.heuristic is not None:
+            heuristic, h_scale = self.heuristic, 1  # Precomputed estimates are already costs
+            if priority is not None:
+                # Break ties towards the lower estimate, so that a tight heuristic does not
+                # expand every cell of the equally short paths
+                by_cost = priority
+                priority = lambda node: (by_cost(node), node.h)
+        if self.stats is not None:
+            # Swap in counting and timing wrappers; the loop below is unchanged
+            frontier = self.stats.wrap_frontier(frontier)
+            neighbors = self.stats.timed("neighbors", "neighbor_calls", neighbors)
+            heuristic = self.stats.timed("heuristic", "heuristic_calls", heuristic)
+        self._push(frontier, start, priority)  # Add the start node to the frontier
 
         # Explore nodes until the frontier is empty
         while True:
@@ -55,6 +261,8 @@ class Solver:
             # Remove a node from the frontier
             node = frontier.remove()
             self.num_explored += 1  # Increment the number of states explored
+            if trace is not None:
+                trace.append(node.state[0] * width + node.state[1])
 
             # Check if the goal has been reached
             if node.state == self.maze.goal:
@@ -66,17 +274,306 @@ class Solver:
                     node = node.parent  # Move to the parent node
                 actions.reverse()  # Reverse the actions to get the path from start to goal
                 cells.reverse()  # Reverse the cells to get the path from start to goal
-                self.maze.solution = (actions, cells)  # Store the solution in the maze
-                return  # Return the solution
+                return actions, cells  # Return the solution
 
             # Add the current state to the explored set
-            self.explored.add(node.state)
+            explored.add(node.state)
 
             # Explore the neighbors of the current state
-            for action, state in self.maze.neighbors(node.state):
-                # If the state is not in the frontier or already explored, add it to the frontier
-                if not frontier.contains_state(state) and state not in self.explored:
-                    g = node.g + 1  # Assuming each move has a cost of 1
-                    h = manhattan_distance(state, self.maze.goal)
-                    child = Node(state=state, parent=node, action=action, g=g, h=h)  # Create a child node
-                    frontier.add(child, child.f)  # Add the child node to the frontier
+            for action, state in neighbors(node.state):
+                if state in explored:
+                    continue
+                # Stack and queue frontiers keep the first node found for a state
+                queued = frontier.contains_state(state)
+                if queued and priority is None:
+                    continue
+                # Moving into a cell costs 1, or its terrain cost on weighted mazes
+                g = node.g + (costs[state[0] * width + state[1]] if costs is not None else 1)
+                h = heuristic(state, self.maze.goal) * h_scale
+                child = Node(state=state, parent=node, action=action, g=g, h=h)  # Create a child node
+                # Priority frontiers replace a queued node when the new one has a lower cost
+                if queued and priority(child) >= frontier.cost(state):
+                    continue
+                self._push(frontier, child, priority)  # Add the child node to the frontier
+
+    @staticmethod
+    def _push(frontier, node, priority):
+        """
+        Adds a node to a frontier, with its cost when the frontier is ordered by priority.
+        """
+        if priority is None:
+            frontier.add(node)
+        else:
+            frontier.add(node, priority(node))
+
+    def flat_search(self, g_weight=1, h_weight=1):
+        """
+        Solves the maze with the flat-index engine and converts its
+        results back to the `explored` format. Dijkstra on an unweighted maze
+        runs the vectorized breadth-first search instead (see `wavefront_search`).
+
+        Args:
+            g_weight (int): Weight of the path cost in the priority.
+            h_weight (int): Weight of the Manhattan heuristic in the priority.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+
+        Raises:
+            Exception: If no solution is found, an exception is raised.
+        """
+        if not h_weight and not self.maze.weighted:
+            # With unit costs, Dijkstra expands the cells by distance, as breadth-first search
+            return self.wavefront_search()
+        solution, closed, num_explored = flat_astar(self.maze, g_weight, h_weight, self.heuristic, self.trace)
+        self._record_closed(closed, num_explored)
+        return solution
+
+    def wavefront_search(self):
+        """
+        Solves the maze with the vectorized breadth-first search of the flat engine
+        (see `flat_search.flat_bfs`) and converts its results back to the `explored` format.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+
+        Raises:
+            Exception: If no solution is found, an exception is raised.
+        """
+        solution, closed, num_explored = flat_bfs(self.maze, self.trace)
+        self._record_closed(closed, num_explored)
+        return solution
+
+    def bidirectional_search(self, heuristic=False):
+        """
+        Solves the maze by searching from the start and from the goal at the same time
+        and stitching the two half-paths together where they meet.
+
+        `explored` and `num_explored` cover the cells expanded by both sides.
+
+        Args:
+            heuristic (bool): Use A* on each side instead of breadth-first search.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+
+        Raises:
+            ValueError: If the maze has terrain costs.
+            Exception: If no solution is found, an exception is raised.
+        """
+        self._require_unit_costs("Bidirectional search")
+        search = bidirectional_astar if heuristic else bidirectional_bfs
+        solution, closed, num_explored = search(self.maze, self.trace)
+        self._record_closed(closed, num_explored)
+        return solution
+
+    def jump_point_search(self):
+        """
+        Solves the maze with Jump Point Search, which only expands the cells where
+        shortest paths can turn and skips the straight runs in between.
+
+        `num_explored` counts the expanded jump points, while `explored` holds both
+        the jump points and every cell scanned while jumping.
+
+        Returns:
+            tuple: The solution as (actions, cells), cell by cell as with A*.
+
+        Raises:
+            ValueError: If the maze has terrain costs.
+            Exception: If no solution is found, an exception is raised.
+        """
+        self._require_unit_costs("Jump Point Search")
+        solution, closed, scanned, num_explored = jump_point_search(self.maze, self.trace)
+        self._record_closed(closed, num_explored)
+        self._record_closed(scanned, 0)
+        return solution
+
+    def corridor_search(self):
+        """
+        Solves the maze on its corridor graph, building the graph first if the maze
+        does not have one yet. Only junctions are expanded; the corridors between
+        them are expanded back into cells at the end.
+
+        `num_explored` and `explored` cover the graph nodes that were expanded.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+
+        Raises:
+            ValueError: If the maze has terrain costs.
+            Exception: If no solution is found, an exception is raised.
+        """
+        self._require_unit_costs("Corridor search")
+        graph = self.maze.corridors or self.maze.build_corridors()
+        solution, expanded, num_explored = graph.search(self.maze.start, self.maze.goal)
+        self._record_expanded(expanded, num_explored)
+        return solution
+
+    def hierarchical_search(self):
+        """
+        Solves the maze with HPA* on its cluster abstraction, building it with the
+        default cluster size first if the maze does not have one yet (see
+        `Maze.build_hierarchy`). A* runs on the transition cells between clusters, and
+        only the route found is refined into cells, so the path is valid but not always
+        the shortest.
+
+        `num_explored` and `explored` cover the abstract nodes that were expanded.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+
+        Raises:
+            ValueError: If the maze has terrain costs.
+            Exception: If no solution is found, an exception is raised.
+        """
+        self._require_unit_costs("Hierarchical search")
+        graph = self.maze.hierarchy or self.maze.build_hierarchy()
+        solution, expanded, num_explored = graph.search(self.maze.start, self.maze.goal)
+        self._record_expanded(expanded, num_explored)
+        return solution
+
+    def ida_search(self):
+        """
+        Solves the maze with IDA*, whose frontier is only the current path and the
+        pending siblings of its cells (see `bounded.ida_star`). The path is optimal.
+
+        `num_explored` counts the expansions of every iteration, and `stats` (if any)
+        receives the frontier counters. `explored` is left empty, since a set of every
+        expanded cell is what bounded searches avoid keeping.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+
+        Raises:
+            Exception: If no solution is found, an exception is raised.
+        """
+        solution, num_explored, _ = ida_star(self.maze, self.heuristic, self.stats)
+        self.num_explored += num_explored
+        return solution
+
+    def beam_search(self):
+        """
+        Solves the maze with a beam search keeping `beam_width` cells per layer (see
+        `bounded.beam_search`). `optimal` is only True if no cell had to be dropped.
+
+        `explored` is left empty and `stats` receives the frontier counters, as with
+        `ida_search`.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+
+        Raises:
+            ValueError: If `beam_width` is below 1.
+            Exception: If no solution is found, an exception is raised.
+        """
+        solution, num_explored, num_dropped = beam_search(self.maze, self.beam_width, self.heuristic, self.stats)
+        self.num_explored += num_explored
+        # Without drops, the layers are a breadth-first search
+        self.optimal = num_dropped == 0 and not self.maze.weighted
+        return solution
+
+    def bounded_search(self):
+        """
+        Solves the maze with A* whose heap is capped at `max_frontier` entries, dropping
+        the worst half of the heap when it is full (see `bounded.bounded_astar`).
+        `optimal` is only True if nothing had to be dropped.
+
+        `explored` is left empty and `stats` receives the frontier counters, as with
+        `ida_search`.
+
+        Returns:
+            tuple: The solution as (actions, cells).
+
+        Raises:
+            ValueError: If `max_frontier` is below 2.
+            Exception: If no solution is found, an exception is raised.
+        """
+        solution, num_explored, num_dropped = bounded_astar(self.maze, self.max_frontier, self.heuristic,
+                                                            self.stats)
+        self.num_explored += num_explored
+        self.optimal = num_dropped == 0
+        return solution
+
+    def _require_unit_costs(self, name):
+        """
+        Rejects weighted mazes for the strategies that assume every move costs 1.
+
+        Args:
+            name (str): The name of the strategy, for the error message.
+
+        Raises:
+            ValueError: If the maze has terrain costs.
+        """
+        if self.maze.weighted:
+            raise ValueError(f"{name} does not support weighted mazes, use astar or dijkstra")
+
+    def _record_closed(self, closed, num_explored):
+        """
+        Adds the results of a flat-index search to `num_explored` and `explored`.
+
+        Args:
+            closed (bytearray): Flags of the expanded cells, by flat index.
+            num_explored (int): The number of states the search expanded.
+        """
+        self.num_explored += num_explored
+        self._unconverted.append(np.flatnonzero(np.frombuffer(closed, dtype=np.uint8)))
+
+    def _record_expanded(self, expanded, num_explored):
+        """
+        Adds the results of a graph search to `num_explored`, `explored` and `trace`.
+
+        Args:
+            expanded (list): Flat indices of the expanded graph nodes, in expansion order.
+            num_explored (int): The number of nodes the search expanded.
+        """
+        self.num_explored += num_explored
+        self._unconverted.append(np.array(expanded, dtype=np.int64))
+        if self.trace is not None:
+            self.trace.extend(expanded)
+
+
+# Search algorithms of the node engine, by name.
+ALGORITHMS = {
+    "bfs": partial(Solver.frontier_search, frontier_class=QueueFrontier),
+    "dfs": partial(Solver.frontier_search, frontier_class=StackFrontier),
+    "astar": partial(Solver.frontier_search, frontier_class=AStarFrontier, priority=attrgetter("f")),
+    "greedy": partial(Solver.frontier_search, frontier_class=AStarFrontier, priority=attrgetter("h")),
+    "dijkstra": partial(Solver.frontier_search, frontier_class=AStarFrontier, priority=attrgetter("g")),
+    "bidirectional": partial(Solver.bidirectional_search, heuristic=False),
+    "bidirectional-astar": partial(Solver.bidirectional_search, heuristic=True),
+    "jps": Solver.jump_point_search,
+    "corridors": Solver.corridor_search,
+    "hpa": Solver.hierarchical_search,
+    "idastar": Solver.ida_search,
+    "beam": Solver.beam_search,
+    "sma": Solver.bounded_search,
+}
+
+# Search algorithms of the flat engine, by name.
+FLAT_ALGORITHMS = {
+    "bfs": Solver.wavefront_search,
+    "astar": partial(Solver.flat_search, g_weight=1, h_weight=1),
+    "greedy": partial(Solver.flat_search, g_weight=0, h_weight=1),
+    "dijkstra": partial(Solver.flat_search, g_weight=1, h_weight=0),
+}
+
+# Algorithms whose paths are always shortest (least-cost on weighted mazes), by engine.
+# "beam" and "sma" set `Solver.optimal` from the outcome of each run.
+OPTIMAL = {
+    "node": {"bfs", "astar", "dijkstra", "bidirectional", "bidirectional-astar", "jps", "corridors", "idastar"},
+    "flat": {"bfs", "astar", "dijkstra"},
+}
+
+# Algorithms that count moves rather than costs, so only optimal on unweighted mazes.
+UNIT_COST_OPTIMAL = {"bfs"}
+
+# Memory-bounded algorithms, which cannot record `Solver.trace`: it would grow with
+# every re-expansion, which is the memory they avoid using.
+UNTRACED = {"idastar", "beam", "sma"}
+
+# Algorithm registries by engine name.
+ENGINES = {
+    "node": ALGORITHMS,
+    "flat": FLAT_ALGORITHMS,
+}
+
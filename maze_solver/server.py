@@ -0,0 +1,536 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from time import perf_counter
+import numpy as np
+from maze import Maze
+from search import Solver, ENGINES
+
+# Example usage: python .\maze_solver\server.py --port 8765 --workers 4
+#                python .\maze_solver\server.py --socket /tmp/maze.sock --preload .\data\maze2.txt
+
+# A long-running solve server: mazes stay parsed in the worker processes between
+# requests, so a request only pays for its search, not for starting Python, importing
+# the modules and parsing the maze file again.
+#
+# Protocol: newline-delimited JSON over TCP or a Unix socket. A client may send many
+# requests without waiting for the answers (pipelining); every answer repeats the "id"
+# of its request, and answers are written as soon as they are ready, so they can come
+# back in a different order.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Mazes kept resident per worker process, least recently used evicted first.
+DEFAULT_MAX_MAZES = 8
+
+# The number of recent latencies the percentiles are computed over.
+DEFAULT_WINDOW = 10000
+
+# The longest request line accepted, in bytes.
+LINE_LIMIT = 2 ** 20
+
+# Mazes kept by the current worker process: resolved path -> (mtime, maze, start, goal),
+# least recently used first. The start and goal are those of the file, since requests
+# move `maze.start` and `maze.goal`.
+_resident = OrderedDict()
+_limits = {"max_mazes": DEFAULT_MAX_MAZES}
+
+
+def _init_worker(max_mazes, preload):
+    """
+    Pool initializer: sets the residency limit of the worker process and loads the
+    preloaded mazes.
+    """
+    _limits["max_mazes"] = max_mazes
+    for filename in preload:
+        resident_maze(filename)
+
+
+def resident_maze(filename):
+    """
+    Returns the parsed maze of a file, loading it only if this process has not loaded
+    it yet or if the file changed since (a different modification time).
+
+    Args:
+        filename (str): The path to the maze file.
+
+    Returns:
+        tuple: A tuple (maze, start, goal, cached), where `start` and `goal` are the
+               points of the file and `cached` is whether the maze was already resident.
+
+    Raises:
+        OSError: If the file cannot be read.
+        Exception: If the maze file is invalid (see `Maze`).
+    """
+    path = os.path.realpath(filename)
+    mtime = os.stat(path).st_mtime_ns
+    entry = _resident.get(path)
+    if entry is not None and entry[0] == mtime:
+        _resident.move_to_end(path)
+        return entry[1], entry[2], entry[3], True
+
+    maze = Maze(path)
+    _resident[path] = (mtime, maze, maze.start, maze.goal)
+    _resident.move_to_end(path)
+    while len(_resident) > _limits["max_mazes"]:
+        _resident.popitem(last=False)
+    return maze, maze.start, maze.goal, False
+
+
+def _open_cell(maze, cell):
+    """
+    Checks that a requested cell is an open cell of the maze.
+
+    Raises:
+        ValueError: If the cell is outside the maze or is a wall.
+    """
+    row, col = cell
+    if not (0 <= row < maze.height and 0 <= col < maze.width) or maze.grid[row, col]:
+        raise ValueError(f"Cell {cell} is not an open cell of the maze")
+    return cell
+
+
+def solve_request(request):
+    """
+    Worker task: solves one request on the resident maze of its file.
+
+    Errors raised while loading or solving are reported in the record instead of being
+    raised, as in `batch.solve_file`.
+
+    Args:
+        request (dict): A request checked by `parse_request`.
+
+    Returns:
+        dict: The status ("ok" or "error"), the path length, number of explored states,
+              whether the path is optimal and whether the maze was resident, or the
+              error message, plus the time spent in the worker ("solve_time", in seconds)
+              and the cells of the path if the request asked for them.
+    """
+    started = perf_counter()
+    try:
+        maze, start, goal, cached = resident_maze(request["maze"])
+        maze.start = _open_cell(maze, request["start"]) if request["start"] is not None else start
+        maze.goal = _open_cell(maze, request["goal"]) if request["goal"] is not None else goal
+        solver = Solver(maze, algorithm=request["algorithm"], engine=request["engine"])
+        solver.solve()
+        record = {
+            "status": "ok",
+            "path_length": len(maze.solution[1]),
+            "num_explored": solver.num_explored,
+            "optimal": solver.optimal,
+            "cached": cached,
+        }
+        if request["path"]:
+            record["cells"] = [list(cell) for cell in maze.solution[1]]
+    except Exception as e:
+        record = {"status": "error", "error": str(e)}
+    record["solve_time"] = round(perf_counter() - started, 6)
+    return record
+
+
+def _cell_field(request, name):
+    """
+    Reads an optional (row, column) field of a request.
+
+    Raises:
+        ValueError: If the field is not a pair of integers.
+    """
+    cell = request.get(name)
+    if cell is None:
+        return None
+    if not (isinstance(cell, list) and len(cell) == 2 and all(type(v) is int for v in cell)):
+        raise ValueError(f"'{name}' must be a [row, column] pair of integers")
+    return tuple(cell)
+
+
+def parse_request(request):
+    """
+    Checks a decoded request and fills in its defaults.
+
+    A solve request is an object with the fields:
+
+    - "maze" (required): the path of the maze file, as seen by the server.
+    - "start", "goal": [row, column] cells, defaulting to the 'A' and 'B' of the file.
+    - "algorithm", "engine": the solver mode, defaulting to "astar" on the "node" engine.
+    - "path": whether to return the cells of the path (default: false).
+    - "id": any value, repeated in the answer.
+
+    `{"op": "stats"}` asks for the server statistics instead (see `LatencyStats.summary`).
+
+    Args:
+        request (dict): The decoded JSON request.
+
+    Returns:
+        dict: The request with every field set.
+
+    Raises:
+        ValueError: If a field is missing or invalid.
+    """
+    if not isinstance(request, dict):
+        raise ValueError("A request must be a JSON object")
+    op = request.get("op", "solve")
+    if op == "stats":
+        return {"op": op, "id": request.get("id")}
+    if op != "solve":
+        raise ValueError(f"Unknown op '{op}', expected 'solve' or 'stats'")
+    if not isinstance(request.get("maze"), str):
+        raise ValueError("'maze' must be the path of a maze file")
+    engine = request.get("engine", "node")
+    algorithm = request.get("algorithm", "astar")
+    if not isinstance(engine, str) or engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {sorted(ENGINES)}")
+    if not isinstance(algorithm, str) or algorithm not in ENGINES[engine]:
+        raise ValueError(f"Unknown algorithm '{algorithm}' for the {engine} engine, "
+                         f"expected one of {sorted(ENGINES[engine])}")
+    return {
+        "op": op,
+        "id": request.get("id"),
+        "maze": request["maze"],
+        "start": _cell_field(request, "start"),
+        "goal": _cell_field(request, "goal"),
+        "algorithm": algorithm,
+        "engine": engine,
+        "path": bool(request.get("path", False)),
+    }
+
+
+def percentiles(samples):
+    """
+    Summarizes durations as milliseconds.
+
+    Args:
+        samples (iterable): Durations in seconds.
+
+    Returns:
+        dict: The mean, median (p50), p90, p99 and maximum in milliseconds, or an
+              empty dict if there is no sample.
+    """
+    values = np.fromiter(samples, dtype=np.float64) * 1000
+    if not len(values):
+        return {}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p90": round(float(p90), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+class LatencyStats:
+    """
+    Per-request counters and latencies of a server.
+
+    The latency of a request runs from the moment its line was read to the moment its
+    answer was written; it includes the time the request waited for a worker. The solve
+    time is the part spent in the worker. Percentiles cover the last `window` requests.
+
+    Attributes:
+        requests (int): The number of solve requests answered.
+        errors (int): The number of those that failed.
+        loads (int): The number of requests that had to parse their maze file.
+        latencies (deque): The recent latencies, in seconds.
+        solve_times (deque): The recent solve times, in seconds.
+
+    Methods:
+        record(latency, record): Adds an answered request.
+        summary(): Returns the counters and latency percentiles as a JSON-serializable dict.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        """
+        Initializes the counters to zero.
+
+        Args:
+            window (int): The number of recent requests the percentiles cover.
+        """
+        self.started = perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.loads = 0
+        self.latencies = deque(maxlen=window)
+        self.solve_times = deque(maxlen=window)
+
+    def record(self, latency, record):
+        """
+        Adds an answered solve request.
+
+        Args:
+            latency (float): The latency of the request, in seconds.
+            record (dict): The answer of the request.
+        """
+        self.requests += 1
+        if record["status"] != "ok":
+            self.errors += 1
+        elif not record["cached"]:
+            self.loads += 1
+        self.latencies.append(latency)
+        if "solve_time" in record:
+            self.solve_times.append(record["solve_time"])
+
+    def summary(self):
+        """
+        Returns the counters and the latency percentiles.
+
+        Returns:
+            dict: The request, error and maze load counts, the uptime in seconds, and the
+                  "latency" and "solve" percentiles in milliseconds (see `percentiles`).
+        """
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "maze_loads": self.loads,
+            "uptime": round(perf_counter() - self.started, 3),
+            "latency": percentiles(self.latencies),
+            "solve": percentiles(self.solve_times),
+        }
+
+
+class SolveServer:
+    """
+    An asyncio server answering solve requests (see `parse_request`) from a pool of
+    worker processes that keep the parsed mazes resident (see `resident_maze`).
+
+    The event loop only reads, decodes and writes lines; every search runs in the pool,
+    so a long search never delays the other connections. Mazes are resident per worker
+    process: each worker parses a file the first time it gets a request for it, and
+    again only when the file's modification time changes.
+
+    Backpressure: at most `max_pending` requests are in flight across all connections.
+    A slot is taken once a request line is read, so idle connections hold none. When
+    every slot is taken, a connection with a request waits for one before reading its
+    next line, so fast clients are slowed down by the socket buffers instead of growing
+    the queue without bound. A connection whose answers are not
+    being read is not read from either, until its socket buffer drains, so a stalled
+    client only blocks itself.
+
+    Attributes:
+        executor (ProcessPoolExecutor): The worker pool.
+        max_pending (int): The maximum number of requests in flight.
+        stats (LatencyStats): The counters and latencies of the answered requests.
+
+    Methods:
+        start(host, port, path): Starts listening on TCP or on a Unix socket.
+        handle(reader, writer): Serves one connection.
+        close(): Stops listening and shuts the worker pool down.
+    """
+
+    def __init__(self, workers=None, max_pending=None, max_mazes=DEFAULT_MAX_MAZES, preload=()):
+        """
+        Starts the worker pool.
+
+        Args:
+            workers (int): The number of worker processes. Defaults to the number of CPUs.
+            max_pending (int): The maximum number of requests in flight. Defaults to
+                               4 per worker, enough to keep every worker busy.
+            max_mazes (int): The number of mazes each worker keeps resident.
+            preload (list): Maze files every worker loads at startup.
+
+        Raises:
+            ValueError: If `workers`, `max_pending` or `max_mazes` is below 1.
+        """
+        workers = workers or os.cpu_count() or 1
+        max_pending = max_pending or 4 * workers
+        if min(workers, max_pending, max_mazes) < 1:
+            raise ValueError("workers, max_pending and max_mazes must be at least 1")
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            initargs=(max_mazes, list(preload)))
+        self.max_pending = max_pending
+        self.pending = asyncio.Semaphore(max_pending)
+        self.stats = LatencyStats()
+        self.server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """
+        Starts listening for connections.
+
+        Args:
+            host (str): The TCP address to listen on.
+            port (int): The TCP port to listen on.
+            path (str): The path of a Unix socket to listen on instead of TCP.
+        """
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path=path, limit=LINE_LIMIT)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+
+    async def handle(self, reader, writer):
+        """
+        Serves one connection: reads request lines and answers each one as soon as it
+        is solved, while the next lines are already being read.
+
+        Args:
+            reader (asyncio.StreamReader): The incoming stream.
+            writer (asyncio.StreamWriter): The outgoing stream.
+        """
+        answers = set()
+        try:
+            while True:
+                # A client that does not read its answers stops being read from; the
+                # lines it keeps sending then wait in its socket buffer
+                await writer.drain()
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # A line over LINE_LIMIT or a lost connection: the stream cannot be resumed
+                    break
+                if not line:
+                    break
+                # Only a line that was read takes a pending slot, so idle connections never
+                # keep the others from being served
+                await self.pending.acquire()
+                answer = asyncio.create_task(self._answer(line, perf_counter(), writer))
+                answers.add(answer)
+                answer.add_done_callback(answers.discard)
+            if answers:
+                await asyncio.gather(*answers)
+            await writer.drain()
+        except ConnectionError:
+            pass  # The client went away, nobody is left to answer
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _answer(self, line, received, writer):
+        """
+        Decodes, solves and answers one request line, then frees its pending slot. The
+        answer is only buffered: the connection's reading loop waits for it to be sent.
+        """
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+                request_id = request.get("id") if isinstance(request, dict) else None
+                request = parse_request(request)
+            except ValueError as e:  # Also raised for invalid JSON
+                record = {"status": "error", "error": str(e)}
+            else:
+                if request["op"] == "stats":
+                    record = {"status": "ok", **self.stats.summary()}
+                else:
+                    try:
+                        loop = asyncio.get_running_loop()
+                        record = await loop.run_in_executor(self.executor, solve_request, request)
+                    except BrokenProcessPool as e:
+                        record = {"status": "error", "error": f"Worker pool failed: {e}"}
+                    record["latency"] = round(perf_counter() - received, 6)
+                    self.stats.record(record["latency"], record)
+            if not writer.is_closing():
+                writer.write(json.dumps({"id": request_id, **record}).encode() + b"\n")
+        finally:
+            self.pending.release()
+
+    async def close(self):
+        """
+        Stops listening, then shuts the worker pool down once the running searches are done.
+        Open connections are not waited for.
+        """
+        if self.server is not None:
+            self.server.close()
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, path=None, workers=None, max_pending=None,
+                max_mazes=DEFAULT_MAX_MAZES, preload=(), log=None):
+    """
+    Runs a solve server until SIGINT or SIGTERM.
+
+    Args:
+        host (str): The TCP address to listen on.
+        port (int): The TCP port to listen on.
+        path (str): The path of a Unix socket to listen on instead of TCP. The socket
+                    file is removed on exit.
+        workers (int): The number of worker processes. Defaults to the number of CPUs.
+        max_pending (int): The maximum number of requests in flight.
+        max_mazes (int): The number of mazes each worker keeps resident.
+        preload (list): Maze files every worker loads at startup.
+        log (file): A text stream receiving the address and the final statistics.
+
+    Returns:
+        dict: The final statistics (see `LatencyStats.summary`).
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Not available on Windows, where Ctrl+C raises KeyboardInterrupt instead
+
+    server = SolveServer(workers, max_pending, max_mazes, preload)
+    try:
+        await server.start(host, port, path)
+        if log is not None:
+            print(f"Listening on {path or f'{host}:{port}'}", file=log, flush=True)
+        await stop.wait()
+    finally:
+        await server.close()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+    summary = server.stats.summary()
+    if log is not None:
+        print(json.dumps(summary), file=log)
+    return summary
+
+
+def parse_args(argv=None):
+    """
+    Parses the command-line arguments.
+
+    Args:
+        argv (list): The arguments to parse. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Serve maze solve requests, keeping the mazes in memory.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"TCP address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--socket", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="requests in flight before the server stops reading (default: 4 per worker)")
+    parser.add_argument("--max-mazes", type=int, default=DEFAULT_MAX_MAZES,
+                        help=f"mazes kept in memory by each worker (default: {DEFAULT_MAX_MAZES})")
+    parser.add_argument("--preload", nargs="+", default=[], metavar="FILE",
+                        help="maze files every worker loads at startup")
+    args = parser.parse_args(argv)
+
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.max_pending is not None and args.max_pending < 1:
+        parser.error("--max-pending must be at least 1")
+    if args.max_mazes < 1:
+        parser.error("--max-mazes must be at least 1")
+    if args.socket is not None and not hasattr(asyncio, "start_unix_server"):
+        parser.error("Unix sockets are not available on this platform")
+    return args
+
+
+def main():
+    """
+    Runs the solve server until it is interrupted, then prints its statistics.
+    """
+    args = parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.socket, args.workers, args.max_pending,
+                          args.max_mazes, args.preload, log=sys.stderr))
+    except KeyboardInterrupt:
+        pass
+
+
+# Ensure that the main function is executed only if this script is run directly.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import json
+import os
+import numpy as np
+from visualizer import BORDER, WALL, START, GOAL, SOLUTION, EXPLORED, EMPTY, scale_classes, to_image
+
+# Importance of each color class when several cells are merged into one pixel:
+# the most important class of the block is drawn. Indexed by color class.
+RANK = np.zeros(7, dtype=np.uint8)
+for rank, color_class in enumerate((BORDER, EMPTY, EXPLORED, WALL, SOLUTION, GOAL, START)):
+    RANK[color_class] = rank
+CLASS_OF_RANK = np.argsort(RANK).astype(np.uint8)
+
+
+def reduce_classes(classes):
+    """
+    Halves a grid of color classes in both dimensions, keeping the most important
+    class (see RANK) of every 2x2 block. Odd grids are padded with the border class.
+
+    Args:
+        classes (numpy.ndarray): A (rows, columns) array of color classes.
+
+    Returns:
+        numpy.ndarray: A (ceil(rows / 2), ceil(columns / 2)) array of color classes.
+    """
+    rows, cols = classes.shape
+    ranks = np.zeros((rows + rows % 2, cols + cols % 2), dtype=np.uint8)  # RANK[BORDER] == 0
+    ranks[:rows, :cols] = RANK[classes]
+    blocks = ranks.reshape(ranks.shape[0] // 2, 2, ranks.shape[1] // 2, 2)
+    return CLASS_OF_RANK[blocks.max(axis=(1, 3))]
+
+
+class TileLevel:
+    """
+    Writes the tiles of one zoom level a row of tiles at a time, from the color classes
+    of the level received from the top down. Only the class rows of the current row of
+    tiles are kept.
+    """
+
+    def __init__(self, directory, zoom, size, rows, columns, tile_size, mode):
+        """
+        Creates the directories of the level.
+
+        Args:
+            directory (str): The directory the tiles are written to.
+            zoom (int): The zoom level, 0 for the single tile of the whole maze.
+            size (int): The size of a cell (or of a block of merged cells) in pixels.
+            rows (int): The number of class rows of the level.
+            columns (int): The number of class columns of the level.
+            tile_size (int): The width and height of a tile in pixels.
+            mode (str): "RGBA", "RGB", or "P" for palette tiles.
+        """
+        self.directory = os.path.join(directory, str(zoom))
+        self.size = size
+        self.border = size // 25  # Same default as MazeVisualizer
+        self.num_rows = rows
+        self.tile_size = tile_size
+        self.mode = mode
+        self.tiles_y = -(-rows * size // tile_size)
+        self.tiles_x = -(-columns * size // tile_size)
+        # Class rows held, starting at row `top` of the level, and the next row of tiles
+        self.classes = np.empty((0, columns), dtype=np.uint8)
+        self.top = 0
+        self.ty = 0
+        for tx in range(self.tiles_x):
+            os.makedirs(os.path.join(self.directory, str(tx)), exist_ok=True)
+
+    def add(self, classes):
+        """
+        Appends the next class rows of the level and writes every row of tiles they complete.
+
+        Args:
+            classes (numpy.ndarray): A (rows, columns) array of color classes.
+        """
+        self.classes = np.concatenate((self.classes, classes))
+        while self.ty < self.tiles_y:
+            # Band of class rows covered by this row of tiles
+            y = self.ty * self.tile_size
+            top = y // self.size
+            bottom = min(-(-(y + self.tile_size) // self.size), self.num_rows)
+            if self.top + len(self.classes) < bottom:
+                break
+            self.write_row(self.classes[top - self.top:bottom - self.top], y)
+            # The last row of a band may also start the next one
+            following = (y + self.tile_size) // self.size
+            self.classes = self.classes[following - self.top:]
+            self.top = following
+            self.ty += 1
+
+    def write_row(self, band, y):
+        """
+        Writes one row of tiles.
+
+        Args:
+            band (numpy.ndarray): The class rows covered by the row of tiles.
+            y (int): The pixel row of the top of the tiles.
+        """
+        top = y // self.size
+        for tx in range(self.tiles_x):
+            x = tx * self.tile_size
+            left = x // self.size
+            pixels = scale_classes(band[:, left:-(-(x + self.tile_size) // self.size)], self.size, self.border)
+            pixels = pixels[y - top * self.size:y - top * self.size + self.tile_size,
+                            x - left * self.size:x - left * self.size + self.tile_size]
+            tile = np.full((self.tile_size, self.tile_size), BORDER, dtype=np.uint8)
+            tile[:pixels.shape[0], :pixels.shape[1]] = pixels
+            to_image(tile, self.mode).save(os.path.join(self.directory, str(tx), f"{self.ty}.png"))
+
+
+def render_tiles(visualizer, directory, tile_size=256, cell_size=8, show_solution=True,
+                 show_explored=False, mode="RGBA"):
+    """
+    Renders the maze as a pyramid of fixed-size PNG tiles, for mazes whose full image
+    would not fit in memory.
+
+    The most detailed zoom level draws every cell with `cell_size` pixels. Each level
+    below halves the scale, first by shrinking the cells down to one pixel, then by
+    merging 2x2 blocks of cells into one pixel (see `reduce_classes`), until the whole
+    maze fits in a single tile at level 0. Tiles are written to `directory/z/x/y.png`,
+    where `x` is the tile column and `y` the tile row, and are padded with the border
+    color at the right and bottom edges of the maze. A `tiles.json` file describes the
+    levels.
+
+    The color classes are computed one band of `tile_size` maze rows at a time and
+    merged into the lower levels as they come, every level writing a row of tiles as
+    soon as its rows are complete. Peak memory is therefore a few rows of tiles: it
+    grows with the width of the maze but not with its height or with the image size
+    (the explored and solution cells are also held, when drawn).
+
+    Args:
+        visualizer (MazeVisualizer): The visualizer holding the maze, solution and
+                                     explored cells, whose color rules are used.
+        directory (str): The directory the tiles are written to.
+        tile_size (int): The width and height of a tile in pixels.
+        cell_size (int): The size of a cell in pixels at the most detailed level,
+                         a power of two.
+        show_solution (bool): Whether to show the solution path on the maze.
+        show_explored (bool): Whether to show the explored cells.
+        mode (str): "RGBA", "RGB", or "P" for palette tiles.
+
+    Returns:
+        list: One dict per zoom level, from level 0, with the `zoom`, the `scale` in
+              pixels per cell (below 1 when cells are merged) and the number of tile
+              `columns` and `rows`.
+
+    Raises:
+        ValueError: If `tile_size` is not positive or `cell_size` is not a power of two.
+    """
+    if tile_size < 1:
+        raise ValueError("tile_size must be positive")
+    if cell_size < 1 or cell_size & (cell_size - 1):
+        raise ValueError("cell_size must be a power of two")
+
+    # (rows, columns, pixels per cell, cells per pixel) of every level, most detailed first
+    shape = (visualizer.maze.height, visualizer.maze.width)
+    levels = [(*shape, cell_size, 1)]
+    while max(shape) * levels[-1][2] > tile_size:
+        size, merged = levels[-1][2:]
+        if size > 1:
+            levels.append((*shape, size // 2, 1))
+        else:
+            shape = (-(-shape[0] // 2), -(-shape[1] // 2))
+            levels.append((*shape, 1, merged * 2))
+
+    tile_levels = [TileLevel(directory, len(levels) - 1 - index, size, rows, cols, tile_size, mode)
+                   for index, (rows, cols, size, merged) in enumerate(levels)]
+    # The levels fed with the same classes, by cells per pixel
+    writers = {}
+    for (_, _, _, merged), writer in zip(levels, tile_levels):
+        writers.setdefault(merged, []).append(writer)
+    # A last odd row of classes of a level, waiting for its pair to be merged
+    unpaired = {}
+
+    def feed(merged, classes):
+        for writer in writers[merged]:
+            writer.add(classes)
+        if merged * 2 in writers:
+            if merged in unpaired:
+                classes = np.concatenate((unpaired.pop(merged), classes))
+            if len(classes) % 2:
+                unpaired[merged], classes = classes[-1:], classes[:-1]
+            if len(classes):
+                feed(merged * 2, reduce_classes(classes))
+
+    for classes in visualizer.class_bands(tile_size, show_solution, show_explored):
+        feed(1, classes)
+    # The rows left unpaired at the bottom are merged with the border, as by reduce_classes
+    for merged in sorted(writers):
+        if merged in unpaired:
+            feed(merged * 2, reduce_classes(unpaired.pop(merged)))
+
+    described = [{"zoom": zoom, "scale": size / merged, "columns": writer.tiles_x, "rows": writer.tiles_y}
+                 for zoom, ((_, _, size, merged), writer) in enumerate(zip(levels[::-1], tile_levels[::-1]))]
+    with open(os.path.join(directory, "tiles.json"), "w") as f:
+        json.dump({"tile_size": tile_size, "height": visualizer.maze.height,
+                   "width": visualizer.maze.width, "levels": described}, f, indent=2)
+    return described
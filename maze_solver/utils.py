@@ -1,3 +1,25 @@
+# Bits of the per-cell move mask. A set bit means the move is allowed from that cell.
+UP = 1
+DOWN = 2
+LEFT = 4
+RIGHT = 8
+
+# For every possible 4-bit mask, the moves it allows as (action, row offset, column offset),
+# in the same order as the original candidate list (up, down, left, right).
+MOVES = tuple(
+    tuple(
+        move for bit, move in (
+            (UP, ("up", -1, 0)),
+            (DOWN, ("down", 1, 0)),
+            (LEFT, ("left", 0, -1)),
+            (RIGHT, ("right", 0, 1)),
+        )
+        if mask & bit
+    )
+    for mask in range(16)
+)
+
+
 def manhattan_distance(state1, state2):
     """
     Calculates the Manhattan distance between two states.
@@ -11,4 +33,4 @@ def manhattan_distance(state1, state2):
     """
     x1, y1 = state1
     x2, y2 = state2
-    return abs(x1 - x2) + abs(y1 - y2)
\ No newline at end of file
+    return abs(x1 - x2) + abs(y1 - y2)
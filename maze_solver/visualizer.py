@@ -1,12 +1,71 @@
-from PIL import Image, ImageDraw
+import numpy as np
+from PIL import Image
+from flat_search import UNREACHED
+from animation import frame_writer
+
+# Color classes of the rendered cells, used as indices into PALETTE.
+BORDER = 0
+WALL = 1
+START = 2
+GOAL = 3
+SOLUTION = 4
+EXPLORED = 5
+EMPTY = 6
+
+PALETTE = np.array([
+    (0, 0, 0),        # Border between cells, black
+    (40, 40, 40),     # Walls are drawn in grey
+    (255, 0, 0),      # Start (A) is drawn in red
+    (0, 171, 28),     # Goal (B) is drawn in green
+    (220, 235, 113),  # Gold color for solution cells
+    (212, 97, 85),    # Red for explored cells
+    (237, 240, 252),  # Empty spaces are drawn in light grey
+], dtype=np.uint8)
+
+# Heatmap cells use the classes from HEAT up to 255, one per color of a ramp going from
+# dark purple (near the sources) through blue and green to yellow (farthest cells).
+HEAT = len(PALETTE)
+HEAT_LEVELS = 256 - HEAT
+HEAT_COLORS = np.array([(68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)])
+
+
+def heat_ramp(levels=HEAT_LEVELS):
+    """
+    Interpolates the HEAT_COLORS anchors into a ramp of colors.
+
+    Args:
+        levels (int): The number of colors.
+
+    Returns:
+        numpy.ndarray: A (levels, 3) uint8 array of colors.
+    """
+    anchors = np.linspace(0, 1, len(HEAT_COLORS))
+    steps = np.linspace(0, 1, levels)
+    return np.stack([np.interp(steps, anchors, HEAT_COLORS[:, channel]) for channel in range(3)],
+                    axis=1).round().astype(np.uint8)
+
+
+HEAT_PALETTE = np.concatenate([PALETTE, heat_ramp()])
+
+# Animations draw the cells expanded since the previous frame in their own class, blue,
+# before they turn to the explored color.
+CURRENT = len(PALETTE)
+ANIMATION_PALETTE = np.concatenate([PALETTE, [(66, 135, 245)]]).astype(np.uint8)
+
+# The number of frames an expansion trace is split into by default.
+DEFAULT_FRAMES = 200
+
 
 class MazeVisualizer:
     """
     A class responsible for visualizing a maze, its solution, and explored cells.
     Uses PIL (Python Imaging Library) to create a visual representation of the maze.
+
+    The image is built with NumPy: every cell gets a color class, the class grid is
+    scaled up to pixels by broadcasting, and the result is handed to PIL in one step.
     """
 
-    def __init__(self, maze, solution=None, explored=None):
+    def __init__(self, maze, solution=None, explored=None, cell_size=None, cell_border=None, max_image_size=5000):
         """
         Initializes the MazeVisualizer with the maze, solution, and explored cells.
 
@@ -14,6 +73,11 @@ class MazeVisualizer:
         maze (Maze): The maze to be visualized.
         solution (tuple): The solution to the maze, consisting of a list of actions and a list of cells. Defaults to None.
         explored (set): A set of explored cells during the search process. Defaults to an empty set if None.
+        cell_size (int): The size of each cell in pixels. Defaults to the largest size up to 50 pixels
+                         that keeps the image within `max_image_size`, down to 1 pixel.
+        cell_border (int): The thickness of the border around each cell in pixels. Defaults to 2 pixels
+                           for 50-pixel cells, scaled down with the cell size.
+        max_image_size (int): The largest width or height in pixels used when picking `cell_size`.
         """
         # Store passed parameters
         self.maze = maze
@@ -21,10 +85,87 @@ class MazeVisualizer:
         # Assign an empty set if 'explored' is not provided
         self.explored = explored if explored is not None else set()
         # Cell size and border thickness
-        self.cell_size = 50
-        self.cell_border = 2
+        if cell_size is None:
+            cell_size = max(1, min(50, max_image_size // max(maze.height, maze.width)))
+        self.cell_size = cell_size
+        self.cell_border = cell_border if cell_border is not None else cell_size // 25
 
-    def draw_maze(self, filename, show_solution=True, show_explored=False):
+    def cell_classes(self, show_solution=True, show_explored=False):
+        """
+        Computes the color class of every cell of the maze.
+
+        Parameters:
+        show_solution (bool): Whether to mark the solution path. Defaults to True.
+        show_explored (bool): Whether to mark the explored cells. Defaults to False.
+
+        Returns:
+        numpy.ndarray: A (height, width) uint8 array of color classes (see PALETTE).
+        """
+        return next(self.class_bands(self.maze.height, show_solution, show_explored))
+
+    def class_bands(self, band_rows, show_solution=True, show_explored=False):
+        """
+        Computes the color classes of the maze one band of rows at a time, so that
+        only one band is held in memory besides the marked cells.
+
+        Parameters:
+        band_rows (int): The number of rows of a band (the last band may be shorter).
+        show_solution (bool): Whether to mark the solution path. Defaults to True.
+        show_explored (bool): Whether to mark the explored cells. Defaults to False.
+
+        Yields:
+        numpy.ndarray: A (rows, width) uint8 array of color classes (see PALETTE), from the top.
+        """
+        # Later assignments take precedence: walls, then start and goal, then the solution
+        marks = []
+        if show_explored and self.explored:
+            marks.append((EXPLORED, np.array(list(self.explored), dtype=np.int64).reshape(-1, 2)))
+        if show_solution and self.solution is not None and self.solution[1]:
+            marks.append((SOLUTION, np.array(self.solution[1], dtype=np.int64).reshape(-1, 2)))
+        # Sorted by row, so that the cells of a band are a slice
+        marks = [(color_class, cells[np.argsort(cells[:, 0], kind="stable")]) for color_class, cells in marks]
+
+        for top in range(0, self.maze.height, band_rows):
+            bottom = min(top + band_rows, self.maze.height)
+            classes = np.full((bottom - top, self.maze.width), EMPTY, dtype=np.uint8)
+            for color_class, cells in marks:
+                first, last = np.searchsorted(cells[:, 0], (top, bottom))
+                classes[cells[first:last, 0] - top, cells[first:last, 1]] = color_class
+            for (row, col), color_class in ((self.maze.goal, GOAL), (self.maze.start, START)):
+                if top <= row < bottom:
+                    classes[row - top, col] = color_class
+            classes[self.maze.grid[top:bottom] != 0] = WALL
+            yield classes
+
+    def cell_pixels(self, classes):
+        """
+        Scales a grid of color classes up to one class per pixel, drawing the border
+        around every cell.
+
+        Parameters:
+        classes (numpy.ndarray): A (rows, columns) array of color classes.
+
+        Returns:
+        numpy.ndarray: A (rows * cell_size, columns * cell_size) uint8 array of color classes.
+        """
+        return scale_classes(classes, self.cell_size, self.cell_border)
+
+    def render(self, show_solution=True, show_explored=False, mode="RGBA"):
+        """
+        Renders the maze to a PIL image.
+
+        Parameters:
+        show_solution (bool): Whether to show the solution path on the maze. Defaults to True.
+        show_explored (bool): Whether to show the explored cells. Defaults to False.
+        mode (str): "RGBA", "RGB", or "P" for a palette image using one byte per pixel.
+
+        Returns:
+        PIL.Image.Image: The rendered image.
+        """
+        pixels = self.cell_pixels(self.cell_classes(show_solution, show_explored))
+        return to_image(pixels, mode)
+
+    def draw_maze(self, filename, show_solution=True, show_explored=False, mode="RGBA"):
         """
         Draws the maze to an image file, optionally displaying the solution and explored cells.
 
@@ -32,45 +173,181 @@ class MazeVisualizer:
         filename (str): The name of the output image file.
         show_solution (bool): Whether to show the solution path on the maze. Defaults to True.
         show_explored (bool): Whether to show the explored cells. Defaults to False.
+        mode (str): "RGBA", "RGB", or "P" for a smaller palette image. Defaults to "RGBA".
         """
-        # Calculate the image dimensions based on the maze size
-        width = self.maze.width * self.cell_size
-        height = self.maze.height * self.cell_size
-        
-        # Create a new image with a black background
-        img = Image.new("RGBA", (width, height), "black")
-        draw = ImageDraw.Draw(img)
-
-        # Iterate through each cell in the maze
-        for i, row in enumerate(self.maze.walls):
-            for j, col in enumerate(row):
-                if col:
-                    # Walls are drawn in grey
-                    fill = (40, 40, 40)
-                elif (i, j) == self.maze.start:
-                    # Start (A) is drawn in red
-                    fill = (255, 0, 0)
-                elif (i, j) == self.maze.goal:
-                    # Goal (B) is drawn in green
-                    fill = (0, 171, 28)
-                # If a solution exists and solution cells need to be displayed
-                elif self.solution is not None and show_solution and (i, j) in self.solution[1]:
-                    fill = (220, 235, 113)  # Gold color for solution cells
-                # If explored cells need to be displayed
-                elif show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)  # Red for explored cells
-                else:
-                    # Empty spaces are drawn in light grey
-                    fill = (237, 240, 252)
-
-                # Draw the rectangle for each cell
-                draw.rectangle(
-                    [
-                        (j * self.cell_size + self.cell_border, i * self.cell_size + self.cell_border),
-                        ((j + 1) * self.cell_size - self.cell_border, (i + 1) * self.cell_size - self.cell_border)
-                    ],
-                    fill=fill
-                )
-        
         # Save the generated image with the provided filename
-        img.save(filename)
+        self.render(show_solution, show_explored, mode).save(filename)
+
+    def heat_classes(self, distances):
+        """
+        Computes the color class of every cell of a heatmap: walls keep their color,
+        reachable cells get a heat class scaled from their distance, and open cells that
+        cannot be reached are drawn as empty space.
+
+        Parameters:
+        distances (numpy.ndarray): A (height, width) array of distances, such as the result
+                                   of `Maze.distance_field`, with `UNREACHED` for unreachable cells.
+
+        Returns:
+        numpy.ndarray: A (height, width) uint8 array of color classes (see HEAT_PALETTE).
+        """
+        reached = distances != UNREACHED
+        farthest = int(distances[reached].max(initial=0))
+        levels = distances.astype(np.int64) * (HEAT_LEVELS - 1) // max(farthest, 1)
+        classes = np.where(reached, HEAT + levels.clip(0, HEAT_LEVELS - 1), EMPTY).astype(np.uint8)
+        classes[self.maze.grid != 0] = WALL
+        return classes
+
+    def render_heatmap(self, distances=None, mode="RGB"):
+        """
+        Renders a distance field as a heatmap over the maze.
+
+        Parameters:
+        distances (numpy.ndarray): A (height, width) array of distances. Defaults to the
+                                   distance field from the goal.
+        mode (str): "RGBA", "RGB", or "P" for a palette image using one byte per pixel.
+
+        Returns:
+        PIL.Image.Image: The rendered image.
+        """
+        if distances is None:
+            distances = self.maze.distance_field()
+        pixels = self.cell_pixels(self.heat_classes(distances))
+        return to_image(pixels, mode, HEAT_PALETTE)
+
+    def draw_heatmap(self, filename, distances=None, mode="RGB"):
+        """
+        Draws a distance field as a heatmap over the maze to an image file.
+
+        Parameters:
+        filename (str): The name of the output image file.
+        distances (numpy.ndarray): A (height, width) array of distances. Defaults to the
+                                   distance field from the goal.
+        mode (str): "RGBA", "RGB", or "P" for a smaller palette image. Defaults to "RGB".
+        """
+        self.render_heatmap(distances, mode).save(filename)
+
+    def draw_animation(self, filename, trace, frames=DEFAULT_FRAMES, duration=40, final_duration=2000,
+                       show_solution=True):
+        """
+        Draws the expansion order of a search as an animated GIF or APNG (picked from the
+        extension of `filename`: .gif, .png or .apng).
+
+        The trace is split into batches of consecutive expansions, one per frame. Each
+        frame only holds the region around the cells that changed since the previous
+        frame: the cells of its batch, drawn in the CURRENT color, and those of the previous
+        batch, turning to the explored color. Frames are written to the file as they are
+        rendered, so memory does not grow with the length of the trace. The last frame
+        shows the solution path, if any.
+
+        Parameters:
+        filename (str): The name of the output animation file.
+        trace (array): The flat indices of the expanded cells in expansion order, such as
+                       `Solver.trace`.
+        frames (int): The largest number of frames the trace is split into. Defaults to DEFAULT_FRAMES.
+        duration (int): How long each frame is shown, in milliseconds. Defaults to 40.
+        final_duration (int): How long the last frame is shown, in milliseconds. Defaults to 2000.
+        show_solution (bool): Whether the last frame shows the solution path. Defaults to True.
+
+        Returns:
+        int: The number of frames written.
+
+        Raises:
+        ValueError: If `frames` is below 1 or the file extension is not supported.
+        """
+        if frames < 1:
+            raise ValueError("frames must be at least 1")
+        order = np.asarray(trace, dtype=np.int64)
+        step = max(1, -(-len(order) // frames))  # Expansions per frame
+        num_frames = 2 + -(-len(order) // step)  # The maze alone, one per batch, and the end
+
+        classes = self.cell_classes(show_solution=False)
+        flat = classes.reshape(-1)  # A view: painting it paints `classes`
+        paintable = flat == EMPTY  # Walls, start and goal keep their color
+        height, width = classes.shape
+        size = (width * self.cell_size, height * self.cell_size)
+
+        with frame_writer(filename, size, ANIMATION_PALETTE, num_frames) as writer:
+            writer.add(self.cell_pixels(classes), (0, 0), duration)
+            previous = np.empty(0, dtype=np.int64)
+            for begin in range(0, len(order), step):
+                batch = order[begin:begin + step]
+                batch = batch[paintable[batch]]
+                flat[previous] = EXPLORED
+                flat[batch] = CURRENT
+                writer.add(*self._changed_region(classes, np.concatenate([previous, batch])), duration)
+                previous = batch
+
+            flat[previous] = EXPLORED
+            changed = [previous]
+            if show_solution and self.solution is not None and self.solution[1]:
+                cells = np.array(self.solution[1], dtype=np.int64).reshape(-1, 2)
+                path = cells[:, 0] * width + cells[:, 1]
+                path = path[paintable[path]]
+                flat[path] = SOLUTION
+                changed.append(path)
+            writer.add(*self._changed_region(classes, np.concatenate(changed)), final_duration)
+        return num_frames
+
+    def _changed_region(self, classes, changed):
+        """
+        Renders the smallest rectangle of cells holding every changed cell.
+
+        Parameters:
+        classes (numpy.ndarray): The (height, width) color classes of the current frame.
+        changed (numpy.ndarray): Flat indices of the cells that changed.
+
+        Returns:
+        tuple: The pixels of the region and its (x, y) offset in pixels. When nothing
+               changed, the start cell is drawn again, since a frame cannot be empty.
+        """
+        if len(changed):
+            rows, cols = np.divmod(changed, classes.shape[1])
+            top, bottom, left, right = rows.min(), rows.max() + 1, cols.min(), cols.max() + 1
+        else:
+            top, left = self.maze.start
+            bottom, right = top + 1, left + 1
+        pixels = self.cell_pixels(classes[top:bottom, left:right])
+        return pixels, (int(left) * self.cell_size, int(top) * self.cell_size)
+
+
+def scale_classes(classes, size, border=0):
+    """
+    Scales a grid of color classes up to `size` pixels per cell, leaving `border` pixels
+    around the colored part of every cell black.
+
+    Parameters:
+    classes (numpy.ndarray): A (rows, columns) array of color classes.
+    size (int): The size of each cell in pixels.
+    border (int): The thickness of the border around each cell in pixels.
+
+    Returns:
+    numpy.ndarray: A (rows * size, columns * size) uint8 array of color classes.
+    """
+    rows, cols = classes.shape
+    # Pixels of a cell that are painted; the others stay black
+    inside = np.zeros(size, dtype=bool)
+    inside[border:size - border + 1] = True
+    pixels = np.where(inside[None, :, None, None] & inside[None, None, None, :],
+                      classes[:, None, :, None], np.uint8(BORDER))
+    return pixels.reshape(rows * size, cols * size)
+
+
+def to_image(pixels, mode="RGBA", palette=PALETTE):
+    """
+    Converts an array of color classes to a PIL image.
+
+    Parameters:
+    pixels (numpy.ndarray): A 2D uint8 array of color classes.
+    mode (str): "RGBA", "RGB", or "P" for a palette image.
+    palette (numpy.ndarray): The color of every class. Defaults to PALETTE.
+
+    Returns:
+    PIL.Image.Image: The image.
+    """
+    if mode == "P":
+        image = Image.fromarray(pixels, mode="P")
+        image.putpalette(palette.reshape(-1).tolist())
+        return image
+    image = Image.fromarray(palette[pixels], mode="RGB")
+    return image.convert(mode) if mode != "RGB" else image
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules of maze_solver import each other by their bare names, as when the
+# scripts are run from that directory.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maze_solver"))
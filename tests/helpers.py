@@ -0,0 +1,51 @@
+import os
+from maze import Maze
+from mazefile import write_text
+from generator import generate
+
+
+def grid_maze(directory, grid, start, goal, costs=None):
+    """
+    Writes a maze to a new text file in a directory and loads it.
+
+    Args:
+        directory (pathlib.Path): The directory of the maze files, such as `tmp_path`.
+        grid (numpy.ndarray): The walls, 1 for walls.
+        start (tuple): The start cell (row, column).
+        goal (tuple): The goal cell (row, column).
+        costs (numpy.ndarray): The terrain costs, or None for an unweighted maze.
+
+    Returns:
+        Maze: The loaded maze.
+    """
+    filename = directory / f"maze{len(os.listdir(directory))}.txt"
+    write_text(str(filename), grid, start, goal, costs)
+    return Maze(str(filename))
+
+
+def generated_maze(directory, kind, size, seed=0):
+    """
+    Generates a maze (see `generator.generate`), writes it to a new text file in a
+    directory and loads it.
+    """
+    return grid_maze(directory, *generate(kind, size, seed))
+
+
+def walk(maze, solution, start=None):
+    """
+    Asserts that a solution is a walk of open cells, one move at a time, from the start
+    to the goal of the maze, with actions matching the moves.
+
+    Returns:
+        int: The cost of the path.
+    """
+    offsets = {"up": (-1, 0), "down": (1, 0), "left": (0, -1), "right": (0, 1)}
+    actions, cells = solution
+    assert len(actions) == len(cells)
+    row, col = start if start is not None else maze.start
+    for action, (next_row, next_col) in zip(actions, cells):
+        assert offsets[action] == (next_row - row, next_col - col)
+        assert not maze.grid[next_row, next_col]
+        row, col = next_row, next_col
+    assert (row, col) == maze.goal
+    return maze.path_cost(cells)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+from search import Solver
+from visualizer import MazeVisualizer
+from helpers import generated_maze
+
+
+# Searches whose trace holds every explored cell (JPS only traces its jump points)
+@pytest.mark.parametrize("extension", ["gif", "png"])
+@pytest.mark.parametrize("engine, algorithm", [("node", "astar"), ("node", "dfs"), ("flat", "astar"), ("flat", "bfs")])
+def test_last_frame_matches_the_rendered_search(tmp_path, extension, engine, algorithm):
+    maze = generated_maze(tmp_path, "rooms", 30, 4)
+    solver = Solver(maze, algorithm, engine, trace=True)
+    solver.solve()
+    visualizer = MazeVisualizer(maze, solution=maze.solution, explored=solver.explored, cell_size=6)
+    filename = str(tmp_path / f"search.{extension}")
+    num_frames = visualizer.draw_animation(filename, solver.trace, frames=7)
+
+    with Image.open(filename) as animation:
+        frames = [frame.convert("RGB") for frame in ImageSequence.Iterator(animation)]
+    assert len(frames) == num_frames <= 7 + 2
+    assert np.array_equal(np.asarray(frames[0]), np.asarray(visualizer.render(show_solution=False, mode="RGB")))
+    expected = np.asarray(visualizer.render(show_solution=True, show_explored=True, mode="RGB"))
+    assert np.array_equal(np.asarray(frames[-1]), expected)
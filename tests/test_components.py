@@ -0,0 +1,57 @@
+import random
+import numpy as np
+import pytest
+from search import Solver
+from components import UnreachableError, label_components
+from generator import generate
+from helpers import grid_maze, generated_maze
+
+
+def assert_same_partition(maze):
+    """
+    Asserts that the live index splits the open cells into the same components as a
+    fresh labeling.
+    """
+    index = maze.components
+    fresh = label_components(maze)
+    ids = {}
+    for idx in np.flatnonzero(fresh >= 0).tolist():
+        component = index.component(divmod(idx, maze.width))
+        # Every fresh component maps to exactly one live id, and back
+        assert ids.setdefault(int(fresh[idx]), component) == component
+    assert len(set(ids.values())) == len(ids) == index.num_components
+    assert (index.labels < 0).tolist() == (fresh < 0).tolist()
+
+
+@pytest.mark.parametrize("kind", ["backtracker", "rooms", "obstacles"])
+@pytest.mark.parametrize("seed", range(3))
+def test_components_follow_wall_changes(tmp_path, kind, seed):
+    rng = random.Random(seed)
+    maze = generated_maze(tmp_path, kind, 25, seed)
+    maze.build_components()
+    assert_same_partition(maze)
+    for _ in range(150):
+        cell = (rng.randrange(maze.height), rng.randrange(maze.width))
+        if cell not in (maze.start, maze.goal):
+            maze.set_wall(*cell, not maze.grid[cell])
+            assert_same_partition(maze)
+
+
+def test_unreachable_goal_fails_before_searching(tmp_path):
+    grid, start, goal = generate("rooms", 30, 0)
+    row, col = goal
+    grid[max(row - 1, 0):row + 2, max(col - 1, 0):col + 2] = 1
+    grid[goal] = 0
+    maze = grid_maze(tmp_path, grid, start, goal)
+    maze.build_components()
+    for algorithm, engine in [("astar", "node"), ("bfs", "flat"), ("dijkstra", "flat")]:
+        solver = Solver(maze, algorithm, engine, trace=True)
+        with pytest.raises(UnreachableError):
+            solver.solve()
+        assert solver.num_explored == 0
+        assert not solver.explored and not solver.trace
+    solver = Solver(maze)
+    with pytest.raises(UnreachableError):
+        solver.replan()
+    assert solver.num_explored == 0 and solver.planner is None
+
@@ -0,0 +1,82 @@
+import random
+import numpy as np
+import pytest
+from maze import Maze
+from search import Solver
+from mazefile import write_text
+from generator import generate
+from helpers import walk
+
+
+def queries(maze, count, seed):
+    """
+    Returns random (start, goal) pairs of open cells.
+    """
+    rng = random.Random(seed)
+    cells = [tuple(cell) for cell in np.argwhere(maze.grid == 0).tolist()]
+    return [(rng.choice(cells), rng.choice(cells)) for _ in range(count)]
+
+
+def shortest_costs(maze, pairs):
+    """
+    Returns the BFS path length of every pair, None when there is no path.
+    """
+    costs = []
+    for start, goal in pairs:
+        maze.start, maze.goal = start, goal
+        try:
+            Solver(maze, "bfs", "flat").solve()
+            costs.append(maze.path_cost())
+        except Exception:
+            costs.append(None)
+    return costs
+
+
+def corridor_costs(maze, pairs):
+    """
+    Returns the checked corridor-search path length of every pair, None when there is no path.
+    """
+    costs = []
+    for start, goal in pairs:
+        maze.start, maze.goal = start, goal
+        try:
+            Solver(maze, "corridors").solve()
+            costs.append(walk(maze, maze.solution))
+        except Exception as e:
+            assert str(e) == "No solution"
+            costs.append(None)
+    return costs
+
+
+@pytest.mark.parametrize("kind", ["backtracker", "prim", "rooms", "obstacles"])
+def test_saved_corridor_graph_answers_like_bfs(tmp_path, kind):
+    filename = str(tmp_path / "maze.txt")
+    write_text(filename, *generate(kind, 41, 3))
+    maze = Maze(filename)
+    maze.build_corridors().save(str(tmp_path / "corridors.npz"))
+
+    loaded = Maze(filename)
+    graph = loaded.load_corridors(str(tmp_path / "corridors.npz"))
+    assert graph.nodes == maze.corridors.nodes
+    assert graph.edge_cells == maze.corridors.edge_cells
+    pairs = queries(loaded, 40, 0)
+    assert corridor_costs(loaded, pairs) == shortest_costs(loaded, pairs)
+    assert loaded.corridors is graph  # Reused by every query
+
+
+def test_corridor_graph_goes_stale_after_wall_changes(tmp_path):
+    filename = str(tmp_path / "maze.txt")
+    write_text(filename, *generate("obstacles", 41, 1))
+    maze = Maze(filename)
+    maze.build_corridors().save(str(tmp_path / "corridors.npz"))
+    row, col = next(cell for cell in np.argwhere(maze.grid == 0).tolist()
+                    if tuple(cell) not in (maze.start, maze.goal))
+    maze.set_wall(row, col, True)
+    assert maze.corridors is None
+    with pytest.raises(ValueError):
+        maze.load_corridors(str(tmp_path / "corridors.npz"))
+
+    # The graph is built again for the new walls
+    pairs = queries(maze, 30, 1)
+    assert corridor_costs(maze, pairs) == shortest_costs(maze, pairs)
+    assert maze.corridors is not None
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from search import Solver
+from generator import GENERATORS, generate
+from flat_search import flat_cells
+from helpers import grid_maze, generated_maze, walk
+
+
+def solve(maze, algorithm, engine, **options):
+    """
+    Solves the maze and returns the solver, after checking the path.
+    """
+    solver = Solver(maze, algorithm, engine, **options)
+    solver.solve()
+    walk(maze, maze.solution)
+    return solver
+
+
+@pytest.mark.parametrize("kind", sorted(GENERATORS))
+@pytest.mark.parametrize("algorithm", ["bfs", "dijkstra"])
+def test_flat_wavefront_matches_node_bfs(tmp_path, kind, algorithm):
+    maze = generated_maze(tmp_path, kind, 60, 1)
+    node = solve(maze, "bfs", "node")
+    node_cost = maze.path_cost()
+    flat = solve(maze, algorithm, "flat", trace=True)
+    assert maze.path_cost() == node_cost
+    assert flat.optimal
+    # The layers before the goal's are expanded by both; BFS stops inside the goal's layer
+    assert flat.num_explored <= node.num_explored
+    assert flat.num_explored == len(flat.explored) == len(flat.trace)
+    assert flat_cells(np.array(flat.trace), maze.width) == flat.explored
+    assert flat.trace[0] == maze.start[0] * maze.width + maze.start[1]
+    assert flat.trace[-1] == maze.goal[0] * maze.width + maze.goal[1]
+
+
+def test_flat_wavefront_without_solution(tmp_path):
+    grid, start, goal = generate("rooms", 40, 0)
+    # Wall the goal in
+    row, col = goal
+    grid[max(row - 1, 0):row + 2, max(col - 1, 0):col + 2] = 1
+    grid[goal] = 0
+    maze = grid_maze(tmp_path, grid, start, goal)
+    with pytest.raises(Exception, match="No solution"):
+        Solver(maze, "bfs", "flat").solve()
+
+
+def test_flat_dijkstra_on_weighted_maze_is_least_cost(tmp_path):
+    grid, start, goal = generate("obstacles", 40, 2)
+    costs = np.random.default_rng(2).integers(1, 10, grid.shape).astype(np.uint8)
+    maze = grid_maze(tmp_path, grid, start, goal, costs)
+    solve(maze, "dijkstra", "node")
+    node_cost = maze.path_cost()
+    solve(maze, "dijkstra", "flat")
+    assert maze.path_cost() == node_cost
+
+
+@pytest.mark.parametrize("algorithm", ["bfs", "astar"])
+def test_flat_engine_on_one_column(tmp_path, algorithm):
+    maze = grid_maze(tmp_path, np.zeros((5, 1), dtype=np.uint8), (4, 0), (0, 0))
+    solve(maze, algorithm, "flat")
+    assert maze.solution == (["up"] * 4, [(3, 0), (2, 0), (1, 0), (0, 0)])
+
+
+@pytest.mark.parametrize("kind", sorted(GENERATORS))
+@pytest.mark.parametrize("seed", range(3))
+def test_flat_best_first_keeps_the_parents_of_expanded_cells(tmp_path, kind, seed):
+    maze = generated_maze(tmp_path, kind, 50, seed)
+    open_cells = int(np.count_nonzero(maze.grid == 0))
+    solve(maze, "astar", "node")
+    node_cost = maze.path_cost()
+
+    flat = solve(maze, "astar", "flat")
+    assert maze.path_cost() == node_cost
+    assert flat.num_explored <= open_cells
+    # Greedy search reaches expanded cells again through shorter paths. They must keep
+    # the parent they were expanded from, so each cell of the path comes after the
+    # previous one in expansion order
+    greedy = solve(maze, "greedy", "flat", trace=True)
+    assert greedy.num_explored <= open_cells
+    order = {idx: position for position, idx in enumerate(greedy.trace)}
+    path = [maze.start, *maze.solution[1]]
+    positions = [order[row * maze.width + col] for row, col in path]
+    assert positions == sorted(positions)
@@ -0,0 +1,77 @@
+import random
+import pytest
+from search import Solver
+from hierarchy import ClusterGraph
+from helpers import generated_maze, walk
+
+
+def shortest_cost(maze):
+    """
+    Returns the length of a shortest path with the flat BFS, or None if there is none.
+    """
+    try:
+        Solver(maze, "bfs", "flat").solve()
+    except Exception as e:
+        assert str(e) == "No solution"
+        return None
+    return maze.path_cost()
+
+
+def bordering(graph, row, col):
+    """
+    Returns the cluster of a cell and those across the cluster borders the cell lies on.
+    """
+    size = graph.cluster_size
+    rb, cb = row // size, col // size
+    clusters = {(rb, cb)}
+    if row % size == 0:
+        clusters.add((rb - 1, cb))
+    if row % size == size - 1 or row == graph.maze.height - 1:
+        clusters.add((rb + 1, cb))
+    if col % size == 0:
+        clusters.add((rb, cb - 1))
+    if col % size == size - 1 or col == graph.maze.width - 1:
+        clusters.add((rb, cb + 1))
+    return clusters
+
+
+def tables(graph, cluster):
+    """
+    Returns the distance table of a cluster with sorted edge lists, for comparisons.
+    """
+    return {node: sorted(edges) for node, edges in graph._cluster_edges(cluster).items()}
+
+
+@pytest.mark.parametrize("kind", ["rooms", "obstacles", "prim"])
+@pytest.mark.parametrize("seed", range(2))
+def test_hpa_walks_after_wall_changes(tmp_path, kind, seed):
+    rng = random.Random(seed)
+    maze = generated_maze(tmp_path, kind, 40, seed)
+    graph = maze.build_hierarchy(cluster_size=8)
+    for _ in range(30):
+        graph.precompute()
+        cached = dict(graph.edges)
+        for _ in range(rng.randint(1, 3)):
+            cell = (rng.randrange(maze.height), rng.randrange(maze.width))
+            if cell in (maze.start, maze.goal):
+                continue
+            before = set(graph.edges)
+            maze.set_wall(*cell, not maze.grid[cell])
+            dropped = before - set(graph.edges)
+            assert (cell[0] // 8, cell[1] // 8) not in graph.edges
+            assert dropped <= bordering(graph, *cell)
+        # The tables kept are the same objects, and still match a fresh graph
+        fresh = ClusterGraph(maze, cluster_size=8)
+        for cluster, table in graph.edges.items():
+            assert table is cached[cluster]
+            assert tables(graph, cluster) == tables(fresh, cluster)
+        fresh.detach()
+
+        optimal = shortest_cost(maze)
+        solver = Solver(maze, "hpa")
+        if optimal is None:
+            with pytest.raises(Exception, match="No solution"):
+                solver.solve()
+            continue
+        solver.solve()
+        assert walk(maze, maze.solution) >= optimal
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from search import Solver
+from generator import GENERATORS, generate
+from helpers import grid_maze, generated_maze, walk
+
+
+def bfs_cost(maze):
+    """
+    Returns the length of a shortest path, found by the node engine's BFS.
+    """
+    Solver(maze, "bfs", "node").solve()
+    return maze.path_cost()
+
+
+@pytest.mark.parametrize("kind", sorted(GENERATORS))
+@pytest.mark.parametrize("seed", range(4))
+def test_jps_paths_are_shortest(tmp_path, kind, seed):
+    maze = generated_maze(tmp_path, kind, 45, seed)
+    optimal = bfs_cost(maze)
+    solver = Solver(maze, "jps")
+    solver.solve()
+    assert walk(maze, maze.solution) == optimal
+    assert solver.optimal
+
+
+def test_jps_expands_few_cells_on_an_open_grid(tmp_path):
+    maze = grid_maze(tmp_path, np.zeros((60, 60), dtype=np.uint8), (0, 0), (59, 59))
+    solver = Solver(maze, "jps")
+    solver.solve()
+    assert walk(maze, maze.solution) == 118
+    assert solver.num_explored < 60
+
+
+def test_jps_without_solution_and_on_weighted_mazes(tmp_path):
+    grid, start, goal = generate("obstacles", 30, 0)
+    row, col = goal
+    grid[max(row - 1, 0):row + 2, max(col - 1, 0):col + 2] = 1
+    grid[goal] = 0
+    with pytest.raises(Exception, match="No solution"):
+        Solver(grid_maze(tmp_path, grid, start, goal), "jps").solve()
+    costs = np.full(grid.shape, 2, dtype=np.uint8)
+    with pytest.raises(ValueError):
+        Solver(grid_maze(tmp_path, grid, start, goal, costs), "jps").solve()
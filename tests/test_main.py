@@ -0,0 +1,17 @@
+import pytest
+from main import parse_args
+
+
+@pytest.mark.parametrize("option", [
+    ["--heuristic", "exact"], ["--components"], ["--beam-width", "5"], ["--max-frontier", "50"],
+    ["--tiles", "tiles"], ["--heatmap", "heat.png"], ["--animate", "search.gif"],
+])
+def test_batch_rejects_single_maze_options(option, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["--batch", "data", *option])
+    assert f"{option[0]} cannot be combined with --batch" in capsys.readouterr().err
+
+
+def test_batch_accepts_its_own_options():
+    args = parse_args(["--batch", "data", "--workers", "2", "--algorithm", "bfs", "--engine", "flat"])
+    assert (args.batch, args.workers, args.algorithm, args.engine) == ("data", 2, "bfs", "flat")
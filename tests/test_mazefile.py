@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from maze import Maze
+from mazefile import HEADER_SIZE, MAGIC, convert, is_binary, read_binary, write_text
+from helpers import grid_maze
+
+
+def random_maze(height, width, seed, weighted=False):
+    """
+    Returns (grid, start, goal, costs) with random walls, the start in the first cell
+    and the goal in the last one.
+    """
+    rng = np.random.default_rng(seed)
+    grid = (rng.random((height, width)) < 0.3).astype(np.uint8)
+    start, goal = (0, 0), (height - 1, width - 1)
+    grid[start] = grid[goal] = 0
+    costs = rng.integers(1, 10, (height, width)).astype(np.uint8) if weighted else None
+    return grid, start, goal, costs
+
+
+def assert_same_maze(maze, other):
+    assert np.array_equal(maze.grid, other.grid)
+    assert (maze.start, maze.goal) == (other.start, other.goal)
+    assert maze.flat_costs == other.flat_costs
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+@pytest.mark.parametrize("shape", [(1, 10), (10, 1), (7, 13), (9, 8), (5, 17), (33, 64)])
+def test_binary_round_trip(tmp_path, shape, weighted):
+    text_file = str(tmp_path / "maze.txt")
+    write_text(text_file, *random_maze(*shape, seed=sum(shape), weighted=weighted))
+    text = Maze(text_file)
+    binary_file = str(tmp_path / "maze.bin")
+    convert(text_file, binary_file)
+    assert is_binary(binary_file)
+    binary = Maze(binary_file)
+    assert_same_maze(text, binary)
+    if weighted:
+        assert binary.flat_costs is not None
+
+    # And back to text, through Maze.save
+    again_file = str(tmp_path / "again.txt")
+    binary.save(again_file, binary=False)
+    assert not is_binary(again_file)
+    assert_same_maze(text, Maze(again_file))
+
+
+def test_binary_file_is_bit_packed(tmp_path):
+    maze = grid_maze(tmp_path, *random_maze(10, 13, 0))
+    filename = str(tmp_path / "maze.bin")
+    maze.save(filename)
+    # Each row of 13 cells takes 2 bytes
+    with open(filename, "rb") as f:
+        assert len(f.read()) == HEADER_SIZE + 10 * 2
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_truncated_binary_is_rejected(tmp_path, weighted):
+    maze = grid_maze(tmp_path, *random_maze(12, 20, 1, weighted))
+    filename = tmp_path / "maze.bin"
+    maze.save(str(filename))
+    data = filename.read_bytes()
+    filename.write_bytes(data[:-1])
+    with pytest.raises(ValueError, match="truncated"):
+        read_binary(str(filename))
+    filename.write_bytes(data[:HEADER_SIZE - 1])
+    with pytest.raises(ValueError, match="too short"):
+        read_binary(str(filename))
+
+
+def test_bad_magic_is_rejected(tmp_path):
+    maze = grid_maze(tmp_path, *random_maze(12, 20, 2))
+    filename = tmp_path / "maze.bin"
+    maze.save(str(filename))
+    data = filename.read_bytes()
+    filename.write_bytes(b"MAZEBIN\x02" + data[len(MAGIC):])
+    assert not is_binary(str(filename))
+    with pytest.raises(ValueError, match="not a binary maze"):
+        read_binary(str(filename))
@@ -0,0 +1,108 @@
+import random
+import numpy as np
+import pytest
+from search import Solver
+from generator import generate
+from helpers import grid_maze, generated_maze, walk
+
+
+def fresh_cost(maze):
+    """
+    Solves the maze from scratch with flat A* and returns the path cost, or None.
+    """
+    try:
+        Solver(maze, "astar", "flat").solve()
+    except Exception as e:
+        assert str(e) == "No solution"
+        return None
+    return maze.path_cost()
+
+
+def replanned_cost(solver, start=None):
+    """
+    Replans and returns the checked path cost, or None when there is no path.
+    """
+    try:
+        solution = solver.replan(start)
+    except Exception as e:
+        assert str(e) == "No solution"
+        return None
+    return walk(solver.maze, solution)
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_replan_matches_astar_while_walls_change(tmp_path, weighted, seed):
+    rng = random.Random(seed)
+    grid, start, goal = generate("obstacles", 30, seed)
+    costs = np.random.default_rng(seed).integers(1, 10, grid.shape).astype(np.uint8) if weighted else None
+    maze = grid_maze(tmp_path, grid, start, goal, costs)
+    solver = Solver(maze)
+    assert replanned_cost(solver) == fresh_cost(maze)
+
+    for _ in range(40):
+        # Toggle a few cells, as doors closing and opening
+        for _ in range(rng.randint(1, 6)):
+            cell = (rng.randrange(maze.height), rng.randrange(maze.width))
+            if cell not in (maze.start, maze.goal):
+                maze.set_wall(*cell, not maze.grid[cell])
+        # Move the agent a few steps along its last path, which shifts the keys by km
+        new_start = None
+        if maze.solution is not None and maze.solution[1] and rng.random() < 0.7:
+            cells = maze.solution[1]
+            new_start = cells[min(rng.randint(1, 4), len(cells)) - 1]
+            if maze.grid[new_start]:
+                new_start = None
+        expected_start = new_start or maze.start
+        cost = replanned_cost(solver, new_start)
+        assert maze.start == expected_start
+        assert cost == fresh_cost(maze)
+
+
+def test_replan_repairs_only_after_changes(tmp_path):
+    maze = generated_maze(tmp_path, "obstacles", 60, 3)
+    solver = Solver(maze)
+    first = replanned_cost(solver)
+    assert solver.planner.num_expanded > 0
+    # Nothing changed: the search is kept and nothing is expanded again
+    assert replanned_cost(solver) == first
+    assert solver.planner.num_expanded == 0
+
+    # Close a cell in the middle of the path
+    row, col = maze.solution[1][len(maze.solution[1]) // 2]
+    maze.set_wall(row, col, True)
+    assert replanned_cost(solver) == fresh_cost(maze)
+    assert 0 < solver.planner.num_expanded < maze.height * maze.width
+
+
+def test_replan_follows_the_listener_until_detached(tmp_path):
+    grid, start, goal = generate("backtracker", 21, 5)
+    maze = grid_maze(tmp_path, grid, start, goal)
+    solver = Solver(maze)
+    replanned_cost(solver)
+    assert solver.planner._on_wall_change in maze.listeners
+
+    # In a perfect maze, closing any cell of the path disconnects the goal
+    row, col = maze.solution[1][len(maze.solution[1]) // 2]
+    maze.set_wall(row, col, True)
+    assert replanned_cost(solver) is None
+    maze.set_wall(row, col, False)
+    assert replanned_cost(solver) == fresh_cost(maze)
+
+    solver.planner.detach()
+    assert solver.planner._on_wall_change not in maze.listeners
+
+
+def test_replan_after_goal_change(tmp_path):
+    maze = generated_maze(tmp_path, "rooms", 40, 2)
+    solver = Solver(maze)
+    replanned_cost(solver)
+    maze.goal = (maze.height - 1, 0)
+    assert replanned_cost(solver) == fresh_cost(maze)
+
+
+def test_replan_rejects_a_wall_start(tmp_path):
+    grid, start, goal = generate("backtracker", 11, 0)
+    maze = grid_maze(tmp_path, grid, start, goal)
+    with pytest.raises(ValueError):
+        Solver(maze).replan((0, 0))
@@ -0,0 +1,50 @@
+import asyncio
+from mazefile import write_text
+from generator import generate
+from server import SolveServer
+from client import SolveClient, run_load
+
+
+async def serve_with_idle_connections(num_idle, load):
+    """
+    Starts a server with one worker and two pending slots, opens idle connections that
+    never send a line, then runs `load(port)` and returns its result.
+    """
+    server = SolveServer(workers=1, max_pending=2)
+    await server.start(port=0)
+    port = server.server.sockets[0].getsockname()[1]
+    idle = [await asyncio.open_connection("127.0.0.1", port) for _ in range(num_idle)]
+    try:
+        return await asyncio.wait_for(load(port), timeout=20)
+    finally:
+        for _, writer in idle:
+            writer.close()
+        await server.close()
+
+
+def test_idle_connections_do_not_hold_pending_slots(tmp_path):
+    filename = str(tmp_path / "maze.txt")
+    write_text(filename, *generate("rooms", 30, 1))
+
+    async def solve(port):
+        client = await SolveClient.connect(port=port)
+        try:
+            return await client.solve(filename)
+        finally:
+            await client.close()
+
+    answer = asyncio.run(serve_with_idle_connections(3, solve))
+    assert answer["status"] == "ok"
+
+
+def test_load_with_more_connections_than_pending_slots(tmp_path):
+    filename = str(tmp_path / "maze.txt")
+    write_text(filename, *generate("rooms", 30, 1))
+    queries = [(None, None)] * 12
+
+    async def load(port):
+        return await run_load(filename, queries, connections=5, depth=1, port=port)
+
+    result = asyncio.run(serve_with_idle_connections(0, load))
+    assert result["requests"] == len(queries)
+    assert result["errors"] == 0
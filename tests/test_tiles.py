@@ -0,0 +1,34 @@
+import json
+import numpy as np
+from PIL import Image
+from search import Solver
+from visualizer import MazeVisualizer, BORDER, scale_classes
+from tiles import render_tiles, reduce_classes
+from helpers import grid_maze
+
+
+def test_banded_tiles_match_the_whole_maze_pyramid(tmp_path):
+    # Odd sides, so that the merged levels are padded, and bands much shorter than the maze
+    rng = np.random.default_rng(3)
+    grid = (rng.random((45, 70)) < 0.2).astype(np.uint8)
+    grid[0, 0] = grid[44, 69] = 0
+    maze = grid_maze(tmp_path, grid, (0, 0), (44, 69))
+    solver = Solver(maze, "bfs")
+    solver.solve()
+    visualizer = MazeVisualizer(maze, solution=maze.solution, explored=solver.explored)
+    directory = tmp_path / "tiles"
+    levels = render_tiles(visualizer, str(directory), tile_size=16, cell_size=4, show_explored=True, mode="P")
+
+    assert [level["scale"] for level in levels] == [1 / 8, 1 / 4, 1 / 2, 1, 2, 4]
+    assert json.loads((directory / "tiles.json").read_text())["levels"] == levels
+    classes = visualizer.cell_classes(show_solution=True, show_explored=True)
+    for level in reversed(levels):
+        size = max(1, int(level["scale"]))
+        expected = np.full((level["rows"] * 16, level["columns"] * 16), BORDER, dtype=np.uint8)
+        pixels = scale_classes(classes, size, size // 25)
+        expected[:pixels.shape[0], :pixels.shape[1]] = pixels
+        stitched = np.block([[np.asarray(Image.open(directory / str(level["zoom"]) / str(tx) / f"{ty}.png"))
+                              for tx in range(level["columns"])] for ty in range(level["rows"])])
+        assert np.array_equal(stitched, expected), level
+        if level["scale"] <= 1:
+            classes = reduce_classes(classes)
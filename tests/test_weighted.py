@@ -0,0 +1,60 @@
+from heapq import heappush, heappop
+import numpy as np
+import pytest
+from maze import Maze
+from search import Solver
+from generator import generate
+from helpers import grid_maze, walk
+
+
+def dijkstra_cost(grid, costs, start, goal):
+    """
+    Returns the least cost from the start to the goal, paying the cost of every cell
+    entered, with a plain heap-based Dijkstra over the grid.
+    """
+    height, width = grid.shape
+    best = {start: 0}
+    heap = [(0, start)]
+    while heap:
+        cost, (row, col) = heappop(heap)
+        if (row, col) == goal:
+            return cost
+        if cost > best[(row, col)]:
+            continue
+        for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if 0 <= r < height and 0 <= c < width and not grid[r, c]:
+                next_cost = cost + int(costs[r, c])
+                if next_cost < best.get((r, c), next_cost + 1):
+                    best[(r, c)] = next_cost
+                    heappush(heap, (next_cost, (r, c)))
+    return None
+
+
+def test_text_digits_are_terrain_costs(tmp_path):
+    filename = tmp_path / "maze.txt"
+    filename.write_text("A19#\n #5 \n  2B\n")
+    maze = Maze(str(filename))
+    assert maze.weighted and maze.min_cost == 1
+    assert maze.costs.tolist() == [[1, 1, 9, 1], [1, 1, 5, 1], [1, 1, 2, 1]]
+    Solver(maze, "dijkstra").solve()
+    assert walk(maze, maze.solution) == 6  # Down, down, right, right (2), right
+
+    # Costs of 1 everywhere are a plain maze
+    filename.write_text("A11\n 1B\n")
+    assert not Maze(str(filename)).weighted
+
+
+@pytest.mark.parametrize("kind", ["rooms", "obstacles", "prim"])
+@pytest.mark.parametrize("seed", range(3))
+def test_weighted_searches_find_least_cost_paths(tmp_path, kind, seed):
+    grid, start, goal = generate(kind, 35, seed)
+    # Expensive terrain, so that the cheapest path is rarely a shortest one
+    costs = np.random.default_rng(seed).integers(2, 10, grid.shape).astype(np.uint8)
+    maze = grid_maze(tmp_path, grid, start, goal, costs)
+    expected = dijkstra_cost(maze.grid, maze.costs, start, goal)  # The start and goal cost 1
+    for engine, algorithm in [("node", "astar"), ("node", "dijkstra"), ("flat", "astar"), ("flat", "dijkstra")]:
+        solver = Solver(maze, algorithm, engine)
+        solver.solve()
+        assert solver.optimal
+        assert walk(maze, maze.solution) == expected, (engine, algorithm)
+    assert walk(maze, Solver(maze).replan()) == expected